@@ -1,14 +1,17 @@
-import finbourne_sdk_utils.cocoon.cocoon
-import finbourne_sdk_utils.cocoon.instruments
-import finbourne_sdk_utils.cocoon.properties
-import finbourne_sdk_utils.cocoon.systemConfiguration
-import finbourne_sdk_utils.cocoon.utilities
-import finbourne_sdk_utils.cocoon.async_tools
-import finbourne_sdk_utils.cocoon.validator  # noqa: F401
-import finbourne_sdk_utils.cocoon.dateorcutlabel  # noqa: F401
+from typing import TYPE_CHECKING
 
-import finbourne_sdk_utils.extract  # noqa: F401
-import finbourne_sdk_utils.jupyter_tools  # noqa: F401
-import finbourne_sdk_utils.logger  # noqa: F401
-import finbourne_sdk_utils.lpt  # noqa: F401
-import finbourne_sdk_utils.pandas_utils  # noqa: F401
+from finbourne_sdk_utils._lazy import attach
+
+# The subpackages are imported when first used, see finbourne_sdk_utils._lazy
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submodules=["cocoon", "extract", "jupyter_tools", "logger", "lpt", "pandas_utils"],
+)
+
+if TYPE_CHECKING:
+    from finbourne_sdk_utils import cocoon as cocoon
+    from finbourne_sdk_utils import extract as extract
+    from finbourne_sdk_utils import jupyter_tools as jupyter_tools
+    from finbourne_sdk_utils import logger as logger
+    from finbourne_sdk_utils import lpt as lpt
+    from finbourne_sdk_utils import pandas_utils as pandas_utils
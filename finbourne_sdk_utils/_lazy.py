@@ -0,0 +1,46 @@
+import importlib
+from typing import Callable, Dict, Iterable, List, Tuple
+
+
+def attach(
+    package: str, submodules: Iterable[str] = (), attributes: Dict[str, str] | None = None
+) -> Tuple[Callable[[str], object], Callable[[], List[str]], List[str]]:
+    """
+    Creates the module level __getattr__ and __dir__ (PEP 562) for a package so that its submodules, and the
+    attributes it re-exports from them, are only imported when they are first used. Importing the package itself
+    then costs next to nothing, rather than importing the LUSID SDK, pandas or IPython up front
+
+    Parameters
+    ----------
+    package : str
+        The name of the package i.e. __name__
+    submodules : Iterable[str]
+        The names of the submodules to import when they are first used
+    attributes : Dict[str, str] | None
+        The names of the attributes re-exported by the package, mapped to the module each is imported from
+
+    Returns
+    -------
+    Tuple[Callable[[str], object], Callable[[], List[str]], List[str]]
+        The __getattr__, __dir__ and __all__ of the package
+    """
+    submodules = set(submodules)
+    attributes = dict(attributes or {})
+    names = sorted(submodules | set(attributes))
+
+    def __getattr__(name: str) -> object:
+        if name in attributes:
+            value = getattr(importlib.import_module(attributes[name]), name)
+        elif name in submodules:
+            value = importlib.import_module(f"{package}.{name}")
+        else:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+        # Keep the value on the package so that __getattr__ is only called the first time
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(importlib.import_module(package))) | set(names))
+
+    return __getattr__, __dir__, names
@@ -1,34 +1,86 @@
-from . import cocoon as cocoon
-from . import instruments as instruments
-from . import properties as properties
-from . import systemConfiguration as systemConfiguration
-from . import utilities as utilities
-from finbourne_sdk_utils.cocoon.instruments import resolve_instruments as resolve_instruments
-from finbourne_sdk_utils.cocoon.properties import create_property_values as create_property_values
-from finbourne_sdk_utils.cocoon.utilities import set_attributes_recursive as set_attributes_recursive
-from finbourne_sdk_utils.cocoon.cocoon import load_from_data_frame as load_from_data_frame
-from finbourne_sdk_utils.cocoon.utilities import (
-    checkargs as checkargs,
-    load_data_to_df_and_detect_delimiter as load_data_to_df_and_detect_delimiter,
-    check_mapping_fields_exist as check_mapping_fields_exist,
-    parse_args as parse_args,
-    identify_cash_items as identify_cash_items,
-    validate_mapping_file_structure as validate_mapping_file_structure,
-    get_delimiter as get_delimiter,
-    scale_quote_of_type as scale_quote_of_type,
-    strip_whitespace as strip_whitespace,
-    load_json_file as load_json_file,
-    default_fx_forward_model as default_fx_forward_model,
-)
-from finbourne_sdk_utils.cocoon.cocoon_printer import (
-    format_holdings_response as format_holdings_response,
-    format_instruments_response as format_instruments_response,
-    format_portfolios_response as format_portfolios_response,
-    format_quotes_response as format_quotes_response,
-    format_transactions_response as format_transactions_response,
+from typing import TYPE_CHECKING
+
+from finbourne_sdk_utils._lazy import attach
+
+# The submodules and the functions re-exported from them are imported when first used, see finbourne_sdk_utils._lazy
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submodules=[
+        "cocoon",
+        "cocoon_printer",
+        "instruments",
+        "properties",
+        "seed_sample_data",
+        "systemConfiguration",
+        "transaction_type_upload",
+        "utilities",
+        "async_tools",
+        "profiling",
+        "spans",
+        "validator",
+        "dateorcutlabel",
+    ],
+    attributes={
+        "resolve_instruments": "finbourne_sdk_utils.cocoon.instruments",
+        "create_property_values": "finbourne_sdk_utils.cocoon.properties",
+        "set_attributes_recursive": "finbourne_sdk_utils.cocoon.utilities",
+        "load_from_data_frame": "finbourne_sdk_utils.cocoon.cocoon",
+        "checkargs": "finbourne_sdk_utils.cocoon.utilities",
+        "load_data_to_df_and_detect_delimiter": "finbourne_sdk_utils.cocoon.utilities",
+        "check_mapping_fields_exist": "finbourne_sdk_utils.cocoon.utilities",
+        "parse_args": "finbourne_sdk_utils.cocoon.utilities",
+        "identify_cash_items": "finbourne_sdk_utils.cocoon.utilities",
+        "validate_mapping_file_structure": "finbourne_sdk_utils.cocoon.utilities",
+        "get_delimiter": "finbourne_sdk_utils.cocoon.utilities",
+        "scale_quote_of_type": "finbourne_sdk_utils.cocoon.utilities",
+        "strip_whitespace": "finbourne_sdk_utils.cocoon.utilities",
+        "load_json_file": "finbourne_sdk_utils.cocoon.utilities",
+        "default_fx_forward_model": "finbourne_sdk_utils.cocoon.utilities",
+        "pair_transaction_legs": "finbourne_sdk_utils.cocoon.utilities",
+        "format_holdings_response": "finbourne_sdk_utils.cocoon.cocoon_printer",
+        "format_instruments_response": "finbourne_sdk_utils.cocoon.cocoon_printer",
+        "format_portfolios_response": "finbourne_sdk_utils.cocoon.cocoon_printer",
+        "format_quotes_response": "finbourne_sdk_utils.cocoon.cocoon_printer",
+        "format_transactions_response": "finbourne_sdk_utils.cocoon.cocoon_printer",
+        "seed_data": "finbourne_sdk_utils.cocoon.seed_sample_data",
+    },
 )
 
-from . import async_tools as async_tools
-from . import validator as validator
-from . import dateorcutlabel as dateorcutlabel
-from finbourne_sdk_utils.cocoon.seed_sample_data import seed_data as seed_data
+if TYPE_CHECKING:
+    from . import cocoon as cocoon
+    from . import instruments as instruments
+    from . import properties as properties
+    from . import systemConfiguration as systemConfiguration
+    from . import utilities as utilities
+    from finbourne_sdk_utils.cocoon.instruments import resolve_instruments as resolve_instruments
+    from finbourne_sdk_utils.cocoon.properties import create_property_values as create_property_values
+    from finbourne_sdk_utils.cocoon.utilities import set_attributes_recursive as set_attributes_recursive
+    from finbourne_sdk_utils.cocoon.cocoon import load_from_data_frame as load_from_data_frame
+    from finbourne_sdk_utils.cocoon.utilities import (
+        checkargs as checkargs,
+        load_data_to_df_and_detect_delimiter as load_data_to_df_and_detect_delimiter,
+        check_mapping_fields_exist as check_mapping_fields_exist,
+        parse_args as parse_args,
+        identify_cash_items as identify_cash_items,
+        validate_mapping_file_structure as validate_mapping_file_structure,
+        get_delimiter as get_delimiter,
+        scale_quote_of_type as scale_quote_of_type,
+        strip_whitespace as strip_whitespace,
+        load_json_file as load_json_file,
+        default_fx_forward_model as default_fx_forward_model,
+        pair_transaction_legs as pair_transaction_legs,
+    )
+    from finbourne_sdk_utils.cocoon.cocoon_printer import (
+        format_holdings_response as format_holdings_response,
+        format_instruments_response as format_instruments_response,
+        format_portfolios_response as format_portfolios_response,
+        format_quotes_response as format_quotes_response,
+        format_transactions_response as format_transactions_response,
+    )
+
+    from . import async_tools as async_tools
+    from . import profiling as profiling
+    from . import spans as spans
+    from . import validator as validator
+    from . import dateorcutlabel as dateorcutlabel
+    from finbourne_sdk_utils.cocoon.seed_sample_data import seed_data as seed_data
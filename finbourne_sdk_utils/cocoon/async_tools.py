@@ -92,3 +92,36 @@ class ThreadPool:
         self.thread_pool = concurrent.futures.ThreadPoolExecutor(
             max_workers=max_workers
         )
+
+
+async def gather_with_concurrency(limit: int, factories, return_exceptions: bool = False) -> list:
+    """
+    Awaits the awaitables created by a collection of factories, allowing at most `limit` of them to be in flight at
+    any one time. The results are returned in the same order as the factories.
+
+    Parameters
+    ----------
+    limit : int
+        The maximum number of awaitables to run concurrently
+    factories : Iterable[Callable[[], Awaitable]]
+        Zero argument callables which each create the awaitable to run. The awaitable is only created once a slot
+        is available, this matters for functions wrapped with @run_in_executor which are submitted on call
+    return_exceptions : bool
+        Whether to return exceptions as results rather than raising the first one, as per asyncio.gather
+
+    Returns
+    -------
+    list
+        The results of the awaitables
+    """
+
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def bounded(factory):
+        async with semaphore:
+            return await factory()
+
+    return await asyncio.gather(
+        *[bounded(factory) for factory in factories],
+        return_exceptions=return_exceptions,
+    )
@@ -1,5 +1,7 @@
 import asyncio
-import uuid
+import concurrent.futures
+import contextlib
+import functools
 
 import finbourne.sdk.services.lusid as lusid
 import finbourne.sdk.services.lusid.models as lusid_models
@@ -11,8 +13,9 @@ import json
 from typing import Any, List, Tuple, cast
 
 from finbourne_sdk_utils import cocoon
-from finbourne_sdk_utils.cocoon.async_tools import run_in_executor, ThreadPool
+from finbourne_sdk_utils.cocoon.async_tools import run_in_executor, ThreadPool, gather_with_concurrency
 from finbourne_sdk_utils.cocoon.dateorcutlabel import DateOrCutLabel
+from finbourne_sdk_utils.cocoon.spans import SpanRecorder
 from finbourne_sdk_utils.cocoon.utilities import (
     checkargs,
     strip_whitespace,
@@ -353,6 +356,21 @@ class BatchLoader:
                 "You are trying to load transactions without a portfolio code, please ensure that a code is provided."
             )
 
+        # If the existing portfolios in the scope have been listed up front only create the missing ones
+        if "existing_portfolios" in kwargs:
+            return _create_portfolio_if_missing(
+                api_factory=api_factory,
+                existing_portfolios=kwargs["existing_portfolios"],
+                scope=kwargs["scope"],
+                code=kwargs["code"],
+                create=lambda: api_factory.build(
+                    lusid.TransactionPortfoliosApi
+                ).create_portfolio(
+                    scope=kwargs["scope"],
+                    create_transaction_portfolio_request=portfolio_batch[0],
+                ),
+            )
+
         try:
             return api_factory.build(lusid.PortfoliosApi).get_portfolio(
                 scope=kwargs["scope"], code=kwargs["code"]
@@ -407,6 +425,21 @@ class BatchLoader:
                 "You are trying to load a reference portfolio without a portfolio code, please ensure that a code is provided."
             )
 
+        # If the existing portfolios in the scope have been listed up front only create the missing ones
+        if "existing_portfolios" in kwargs:
+            return _create_portfolio_if_missing(
+                api_factory=api_factory,
+                existing_portfolios=kwargs["existing_portfolios"],
+                scope=kwargs["scope"],
+                code=kwargs["code"],
+                create=lambda: api_factory.build(
+                    lusid.ReferencePortfolioApi
+                ).create_reference_portfolio(
+                    scope=kwargs["scope"],
+                    create_reference_portfolio_request=reference_portfolio_batch[0],
+                ),
+            )
+
         try:
             return api_factory.build(lusid.PortfoliosApi).get_portfolio(
                 scope=kwargs["scope"], code=kwargs["code"]
@@ -605,6 +638,151 @@ class BatchLoader:
                 raise e
 
 
+def _create_portfolio_if_missing(
+        api_factory: SyncApiClientFactory,
+        existing_portfolios: dict,
+        scope: str,
+        code: str,
+        create,
+) -> lusid.Portfolio:
+    """
+    Returns the existing portfolio if it is known to exist, otherwise creates it
+
+    Parameters
+    ----------
+    api_factory : SyncApiClientFactory
+        The api factory to use
+    existing_portfolios : dict[str, lusid.Portfolio]
+        The portfolios which already exist in the scope keyed by their code, a portfolio which turns out to exist
+        when it is created is added to it
+    scope : str
+        The scope of the portfolio
+    code : str
+        The code of the portfolio
+    create : callable
+        A function which creates the portfolio in LUSID and returns the response
+
+    Returns
+    -------
+    lusid.Portfolio
+        The existing or newly created portfolio
+    """
+
+    if code in existing_portfolios:
+        return existing_portfolios[code]
+
+    try:
+        return create()
+    except ApiException as e:
+        # The portfolio may have been created since the scope was listed e.g. with a later effective date
+        try:
+            portfolio = api_factory.build(lusid.PortfoliosApi).get_portfolio(
+                scope=scope, code=code
+            )
+        except ApiException:
+            raise e
+
+    # It already existed so is reported with the existing portfolios rather than those created by the load
+    existing_portfolios[code] = portfolio
+    return portfolio
+
+
+@run_in_executor
+def _list_portfolios_for_scope(
+        api_factory: SyncApiClientFactory, scope: str, **kwargs
+) -> dict:
+    """
+    Lists all the portfolios in a scope, handling multiple pages of results
+
+    Parameters
+    ----------
+    api_factory : SyncApiClientFactory
+        The api factory to use
+    scope : str
+        The scope to list the portfolios in
+    kwargs
+        thread_pool - The thread pool to run this function in
+
+    Returns
+    -------
+    dict[str, lusid.Portfolio]
+        The portfolios in the scope keyed by their code
+    """
+
+    portfolios_api = api_factory.build(lusid.PortfoliosApi)
+    existing_portfolios = {}
+    next_page = None
+
+    while True:
+        page_kwargs: dict[str, Any] = {"scope": scope, "limit": 5000}
+
+        if next_page is not None:
+            page_kwargs["page"] = next_page
+
+        response = portfolios_api.list_portfolios_for_scope(**page_kwargs)
+
+        existing_portfolios.update(
+            {portfolio.id.code: portfolio for portfolio in response.values}
+        )
+
+        next_page = response.next_page
+        if next_page is None:
+            return existing_portfolios
+
+
+@run_in_executor
+def _patch_portfolio_sub_holding_keys(
+        api_factory: SyncApiClientFactory,
+        scope: str,
+        code: str,
+        sub_holding_keys: list,
+        **kwargs,
+) -> bool:
+    """
+    Sets the sub-holding keys on a transaction portfolio unless it already has them
+
+    Parameters
+    ----------
+    api_factory : SyncApiClientFactory
+        The api factory to use
+    scope : str
+        The scope of the portfolio
+    code : str
+        The code of the portfolio
+    sub_holding_keys : list[str]
+        The full property keys to use as the sub-holding keys of the portfolio
+    kwargs
+        thread_pool - The thread pool to run this function in
+
+    Returns
+    -------
+    bool
+        Whether or not the portfolio needed to be patched
+    """
+
+    transaction_portfolio_api = api_factory.build(lusid.TransactionPortfoliosApi)
+
+    portfolio_details = transaction_portfolio_api.get_details(scope=scope, code=code)
+
+    # The patch replaces the sub-holding keys, so only skip it if they are already exactly what would be set
+    if set(portfolio_details.sub_holding_keys or []) == set(sub_holding_keys):
+        return False
+
+    transaction_portfolio_api.patch_portfolio_details(
+        scope,
+        code,
+        cast(Any, [
+            {
+                "value": sub_holding_keys,
+                "path": "/subHoldingKeys",
+                "op": "add",
+            }
+        ]),
+    )
+
+    return True
+
+
 async def _load_data(
         api_factory: SyncApiClientFactory,
         single_requests: list,
@@ -631,20 +809,18 @@ async def _load_data(
         A static method on batchloader
     """
 
+    spans = kwargs.get("spans") or SpanRecorder()
+
     # Dynamically call the correct async function to use based on the file type
-    identifier = uuid.uuid4()
-    logging.debug(f"Running load_{file_type}_batch({identifier})")
-    from time import time
-
-    start = time()
-    response = await getattr(BatchLoader, f"load_{file_type}_batch")(
-        api_factory,
-        single_requests,
-        # Any specific arguments e.g. 'code' for transactions, 'effective_at' for holdings is passed in via **kwargs
-        **kwargs,
-    )
-    logging.debug(f"Batch completed ({identifier}) - duration: {time() - start}")
-    return response
+    with spans.span("upload", file_type=file_type, code=kwargs.get("code"), rows=len(single_requests)) as span:
+        if spans.sink is not None:
+            span.set(bytes=sum(len(request.to_json()) for request in single_requests if hasattr(request, "to_json")))
+        return await getattr(BatchLoader, f"load_{file_type}_batch")(
+            api_factory,
+            single_requests,
+            # Any specific arguments e.g. 'code' for transactions, 'effective_at' for holdings is passed in via **kwargs
+            **kwargs,
+        )
 
 
 def _convert_batch_to_models(
@@ -694,104 +870,106 @@ def _convert_batch_to_models(
          A list of populated LUSID request models
     """
 
-    source_columns = [
-        column.get("target", column.get("source")) for column in property_columns
-    ]
-
-    # Get the data types of the columns to be added as properties
-    property_dtypes = data_frame.loc[:, source_columns].dtypes
+    spans = kwargs.get("spans") or SpanRecorder()
+    with spans.span("model_conversion", file_type=file_type, rows=len(data_frame)):
+        source_columns = [
+            column.get("target", column.get("source")) for column in property_columns
+        ]
 
-    # Get the types of the attributes on the top level model for this request
-    open_api_types = get_attributes_and_types(getattr(
-        lusid_models, domain_lookup[file_type]["top_level_model"]
-    ))
+        # Get the data types of the columns to be added as properties
+        property_dtypes = data_frame.loc[:, source_columns].dtypes
 
-    sub_holding_key_dtypes = None
-    sub_holding_keys_row = None
+        # Get the types of the attributes on the top level model for this request
+        open_api_types = get_attributes_and_types(getattr(
+            lusid_models, domain_lookup[file_type]["top_level_model"]
+        ))
 
-    # If there is a sub_holding_keys attribute and it has a dict type this means the sub_holding_keys
-    # need to be populated with property values
-    if (
-            "sub_holding_keys" in open_api_types.keys()
-            and ("Mapping" in open_api_types["sub_holding_keys"] or "dict(" in open_api_types["sub_holding_keys"])
-    ):
-        sub_holding_key_dtypes = data_frame.loc[:, sub_holding_keys].dtypes
-    # If not and they are provided as full keys
-    elif len(sub_holding_keys) > 0:
-        sub_holding_keys_row = cocoon.properties._infer_full_property_keys(
-            partial_keys=sub_holding_keys,
-            properties_scope=sub_holding_keys_scope,
-            domain="Transaction",
-        )
-    # If no keys
-    else:
+        sub_holding_key_dtypes = None
         sub_holding_keys_row = None
 
-    unique_identifiers = kwargs["unique_identifiers"]
-
-    # Iterate over the DataFrame creating the single requests
-    single_requests = []
-    for index, row in data_frame.iterrows():
-
-        # Create the property values for this row
-        if domain_lookup[file_type]["domain"] is None:
-            properties = None
-        else:
-            column_to_scope = {
-                column.get("target", column.get("source")): column.get(
-                    "scope", properties_scope
-                )
-                for column in property_columns
-            }
-
-            properties = cocoon.properties.create_property_values(
-                row=row,
-                column_to_scope=column_to_scope,
-                scope=properties_scope,
-                domain=domain_lookup[file_type]["domain"],
-                dtypes=property_dtypes,
-            )
-
-        # Create the sub-holding-keys for this row
+        # If there is a sub_holding_keys attribute and it has a dict type this means the sub_holding_keys
+        # need to be populated with property values
         if (
                 "sub_holding_keys" in open_api_types.keys()
                 and ("Mapping" in open_api_types["sub_holding_keys"] or "dict(" in open_api_types["sub_holding_keys"])
         ):
-            sub_holding_keys_row = cocoon.properties.create_property_values(
-                row=row,
-                column_to_scope={},
-                scope=sub_holding_keys_scope,
+            sub_holding_key_dtypes = data_frame.loc[:, sub_holding_keys].dtypes
+        # If not and they are provided as full keys
+        elif len(sub_holding_keys) > 0:
+            sub_holding_keys_row = cocoon.properties._infer_full_property_keys(
+                partial_keys=sub_holding_keys,
+                properties_scope=sub_holding_keys_scope,
                 domain="Transaction",
-                dtypes=sub_holding_key_dtypes,
             )
-
-        # Create identifiers for this row if applicable
-        if instrument_identifier_mapping is None or not bool(
-                instrument_identifier_mapping
-        ):
-            identifiers = None
+        # If no keys
         else:
-            identifiers = cocoon.instruments.create_identifiers(
-                index=index,
-                row=row,
-                file_type=file_type,
-                instrument_identifier_mapping=instrument_identifier_mapping,
-                unique_identifiers=unique_identifiers,
-                full_key_format=kwargs["full_key_format"],
-            )
+            sub_holding_keys_row = None
+
+        unique_identifiers = kwargs["unique_identifiers"]
 
-        # Construct the from the mapping, properties and identifiers the single request object and add it to the list
-        single_requests.append(
-            cocoon.utilities.populate_model(
-                model_object_name=domain_lookup[file_type]["top_level_model"],
-                required_mapping=mapping_required,
-                optional_mapping=mapping_optional,
-                row=row,
-                properties=properties,
-                identifiers=identifiers,
-                sub_holding_keys=sub_holding_keys_row,
+        # Iterate over the DataFrame creating the single requests
+        single_requests = []
+        for index, row in data_frame.iterrows():
+
+            # Create the property values for this row
+            if domain_lookup[file_type]["domain"] is None:
+                properties = None
+            else:
+                column_to_scope = {
+                    column.get("target", column.get("source")): column.get(
+                        "scope", properties_scope
+                    )
+                    for column in property_columns
+                }
+
+                properties = cocoon.properties.create_property_values(
+                    row=row,
+                    column_to_scope=column_to_scope,
+                    scope=properties_scope,
+                    domain=domain_lookup[file_type]["domain"],
+                    dtypes=property_dtypes,
+                )
+
+            # Create the sub-holding-keys for this row
+            if (
+                    "sub_holding_keys" in open_api_types.keys()
+                    and ("Mapping" in open_api_types["sub_holding_keys"] or "dict(" in open_api_types["sub_holding_keys"])
+            ):
+                sub_holding_keys_row = cocoon.properties.create_property_values(
+                    row=row,
+                    column_to_scope={},
+                    scope=sub_holding_keys_scope,
+                    domain="Transaction",
+                    dtypes=sub_holding_key_dtypes,
+                )
+
+            # Create identifiers for this row if applicable
+            if instrument_identifier_mapping is None or not bool(
+                    instrument_identifier_mapping
+            ):
+                identifiers = None
+            else:
+                identifiers = cocoon.instruments.create_identifiers(
+                    index=index,
+                    row=row,
+                    file_type=file_type,
+                    instrument_identifier_mapping=instrument_identifier_mapping,
+                    unique_identifiers=unique_identifiers,
+                    full_key_format=kwargs["full_key_format"],
+                )
+
+            # Construct the from the mapping, properties and identifiers the single request object and add it to the list
+            single_requests.append(
+                cocoon.utilities.populate_model(
+                    model_object_name=domain_lookup[file_type]["top_level_model"],
+                    required_mapping=mapping_required,
+                    optional_mapping=mapping_optional,
+                    row=row,
+                    properties=properties,
+                    identifiers=identifiers,
+                    sub_holding_keys=sub_holding_keys_row,
+                )
             )
-        )
 
     return single_requests
 
@@ -852,118 +1030,161 @@ async def _construct_batches(
         Contains the success responses and the errors (where an API exception has been raised)
     """
 
-    # Get the different behaviours required for different entities e.g quotes can be batched without worrying about portfolios
-    batching_no_portfolios = [
-        file_type
-        for file_type, settings in domain_lookup.items()
-        if not settings["portfolio_specific"]
-    ]
-    batching_with_portfolios = [
-        file_type
-        for file_type, settings in domain_lookup.items()
-        if settings["portfolio_specific"]
-    ]
-    sync_batches = []
-    async_batches = []
-
-    if file_type in batching_no_portfolios:
-
-        # Everything can be sent up asynchronously, prepare batches based on batch size alone
-        async_batches = [
-            data_frame.iloc[i: i + batch_size]
-            for i in range(0, len(data_frame), batch_size)
+    spans = kwargs.get("spans") or SpanRecorder()
+    with spans.span("batch_planning", file_type=file_type, rows=len(data_frame)) as batch_planning:
+        # Get the different behaviours required for different entities e.g quotes can be batched without worrying about portfolios
+        batching_no_portfolios = [
+            file_type
+            for file_type, settings in domain_lookup.items()
+            if not settings["portfolio_specific"]
         ]
-
-        # Nest the async batches inside a single synchronous batch
-        sync_batches = [
-            {
-                "async_batches": async_batches,
-                "codes": [None] * len(async_batches),
-                "effective_at": [None] * len(async_batches),
-            }
+        batching_with_portfolios = [
+            file_type
+            for file_type, settings in domain_lookup.items()
+            if settings["portfolio_specific"]
         ]
+        sync_batches = []
+        async_batches = []
 
-    elif file_type in batching_with_portfolios:
-
-        if "effective_at" in domain_lookup[file_type]["required_call_attributes"]:
-
-            # Get unique effective dates
-            unique_effective_dates = list(
-                data_frame[mapping_required["effective_at"]].unique()
-            )
+        if file_type in batching_no_portfolios:
 
-            # Create a group for each effective date as they can not be batched asynchronously
-            effective_at_groups = [
-                data_frame.loc[
-                    data_frame[mapping_required["effective_at"]] == effective_at
-                    ]
-                for effective_at in unique_effective_dates
+            # Everything can be sent up asynchronously, prepare batches based on batch size alone
+            async_batches = [
+                data_frame.iloc[i: i + batch_size]
+                for i in range(0, len(data_frame), batch_size)
             ]
 
-            # Create a synchronous batch for each effective date
+            # Nest the async batches inside a single synchronous batch
             sync_batches = [
                 {
-                    # Different portfolio codes can be batched asynchronously inside the synchronous batch
-                    "async_batches": [
-                        effective_at_group.loc[
-                            data_frame[mapping_required["code"]] == code
-                            ]
-                        for code in list(
-                            effective_at_group[mapping_required["code"]].unique()
-                        )
-                    ],
-                    "codes": list(
-                        effective_at_group[mapping_required["code"]].unique()
-                    ),
-                    "effective_at": [
-                                        list(
-                                            effective_at_group[
-                                                mapping_required["effective_at"]
-                                            ].unique()
-                                        )[0]
-                                    ]
-                                    * len(list(effective_at_group[mapping_required["code"]].unique())),
+                    "async_batches": async_batches,
+                    "codes": [None] * len(async_batches),
+                    "effective_at": [None] * len(async_batches),
                 }
-                for effective_at_group in effective_at_groups
             ]
 
-        else:
-
-            unique_portfolios = list(data_frame[mapping_required["code"]].unique())
+        elif file_type in batching_with_portfolios:
 
-            # Different portfolio codes can be batched asynchronously
-            async_batches = [
-                data_frame.loc[data_frame[mapping_required["code"]] == code]
-                for code in unique_portfolios
-            ]
+            if "effective_at" in domain_lookup[file_type]["required_call_attributes"]:
 
-            # Inside the synchronous batch split the values for each portfolio into appropriate batch sizes
-            sync_batches = [
-                {
-                    "async_batches": [
-                        async_batch.iloc[i: i + batch_size]
-                        for async_batch in async_batches
-                    ],
-                    "codes": [str(code) for code in unique_portfolios],
-                    "effective_at": [None] * len(async_batches),
-                }
-                for i in range(
-                    0,
-                    max([len(async_batch) for async_batch in async_batches]),
-                    batch_size,
+                # Get unique effective dates
+                unique_effective_dates = list(
+                    data_frame[mapping_required["effective_at"]].unique()
                 )
-            ]
 
-    logging.debug("Created sync batches: ")
-    logging.debug(
-        f"Number of batches: {len(sync_batches)}, "
-        + f"Number of items in batches: {sum([len(sync_batch['async_batches']) for sync_batch in sync_batches])}"
-    )
+                # Create a group for each effective date as they can not be batched asynchronously
+                effective_at_groups = [
+                    data_frame.loc[
+                        data_frame[mapping_required["effective_at"]] == effective_at
+                        ]
+                    for effective_at in unique_effective_dates
+                ]
+
+                # Create a synchronous batch for each effective date
+                sync_batches = [
+                    {
+                        # Different portfolio codes can be batched asynchronously inside the synchronous batch
+                        "async_batches": [
+                            effective_at_group.loc[
+                                data_frame[mapping_required["code"]] == code
+                                ]
+                            for code in list(
+                                effective_at_group[mapping_required["code"]].unique()
+                            )
+                        ],
+                        "codes": list(
+                            effective_at_group[mapping_required["code"]].unique()
+                        ),
+                        "effective_at": [
+                                            list(
+                                                effective_at_group[
+                                                    mapping_required["effective_at"]
+                                                ].unique()
+                                            )[0]
+                                        ]
+                                        * len(list(effective_at_group[mapping_required["code"]].unique())),
+                    }
+                    for effective_at_group in effective_at_groups
+                ]
+
+            else:
+
+                unique_portfolios = list(data_frame[mapping_required["code"]].unique())
+
+                # Different portfolio codes can be batched asynchronously
+                async_batches = [
+                    data_frame.loc[data_frame[mapping_required["code"]] == code]
+                    for code in unique_portfolios
+                ]
+
+                # Inside the synchronous batch split the values for each portfolio into appropriate batch sizes
+                sync_batches = [
+                    {
+                        "async_batches": [
+                            async_batch.iloc[i: i + batch_size]
+                            for async_batch in async_batches
+                        ],
+                        "codes": [str(code) for code in unique_portfolios],
+                        "effective_at": [None] * len(async_batches),
+                    }
+                    for i in range(
+                        0,
+                        max([len(async_batch) for async_batch in async_batches]),
+                        batch_size,
+                    )
+                ]
+
+        # For portfolios list those which already exist in the scope once rather than getting each one individually
+        if file_type in ("portfolio", "reference_portfolio"):
+            kwargs["existing_portfolios"] = await _list_portfolios_for_scope(
+                api_factory, kwargs["scope"], thread_pool=kwargs.get("thread_pool")
+            )
+
+        batch_planning.set(
+            sync_batches=len(sync_batches),
+            async_batches=sum(len(sync_batch["async_batches"]) for sync_batch in sync_batches),
+        )
+
+    # Only summarise the batches when they will be logged
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("Created sync batches: ")
+        logging.debug(
+            f"Number of batches: {len(sync_batches)}, "
+            + f"Number of items in batches: {sum([len(sync_batch['async_batches']) for sync_batch in sync_batches])}"
+        )
+
+    # Schedule adding any sub-holding keys to the portfolios so that it overlaps with model conversion, the number of
+    # portfolios requested at once is bounded in the same way as for the unmatched items
+    sub_holding_keys_patched = None
+    if kwargs.get("portfolio_sub_holding_keys") is not None:
+        portfolio_codes = extract_unique_portfolio_codes(sync_batches)
+        sub_holding_keys_span = spans.start("sub_holding_keys", portfolios=len(portfolio_codes))
+        sub_holding_keys_patched = asyncio.ensure_future(
+            gather_with_concurrency(
+                kwargs.get("max_concurrency", 5),
+                [
+                    functools.partial(
+                        _patch_portfolio_sub_holding_keys,
+                        api_factory,
+                        kwargs["scope"],
+                        code,
+                        kwargs["portfolio_sub_holding_keys"],
+                        thread_pool=kwargs.get("thread_pool"),
+                    )
+                    for code in portfolio_codes
+                ],
+            )
+        )
+        sub_holding_keys_patched.add_done_callback(
+            lambda future: spans.finish(sub_holding_keys_span, None if future.cancelled() else future.exception())
+        )
 
     # Asynchronously load the data into LUSID
-    responses = [
-        await asyncio.gather(
-            *[
+    responses = []
+    try:
+        for sync_batch in sync_batches:
+            # Converting the batches to models happens as the list is built, before any of the loads are started
+            load_batches = [
                 _load_data(
                     api_factory=api_factory,
                     single_requests=_convert_batch_to_models(
@@ -990,11 +1211,24 @@ async def _construct_batches(
                     sync_batch["effective_at"],
                 )
                 if not async_batch.empty
-            ],
-            return_exceptions=True,
-        )
-        for sync_batch in sync_batches
-    ]
+            ]
+
+            # The portfolios must have their sub-holding keys before any transactions are loaded into them
+            if sub_holding_keys_patched is not None:
+                await sub_holding_keys_patched
+
+            with spans.span("sync_batch", file_type=file_type, batches=len(load_batches)):
+                responses.append(await asyncio.gather(*load_batches, return_exceptions=True))
+    except Exception:
+        # Let the sub-holding keys finish rather than leaving them running, the load's own error is raised
+        if sub_holding_keys_patched is not None:
+            await asyncio.gather(sub_holding_keys_patched, return_exceptions=True)
+        raise
+
+    # Await the sub-holding keys even when there were no batches to load so that their errors are raised
+    if sub_holding_keys_patched is not None:
+        await sub_holding_keys_patched
+
     logging.debug("Flattening responses")
     responses_flattened = [
         response for responses_sub in responses for response in responses_sub
@@ -1013,21 +1247,34 @@ async def _construct_batches(
         "success": [r for r in responses_flattened if not isinstance(r, Exception)],
     }
 
+    # Report which of the portfolios already existed and which were created by this load
+    if "existing_portfolios" in kwargs:
+        returned_response["existing"] = [
+            r for r in returned_response["success"] if r.id.code in kwargs["existing_portfolios"]
+        ]
+        returned_response["created"] = [
+            r for r in returned_response["success"] if r.id.code not in kwargs["existing_portfolios"]
+        ]
+
     # For successful transactions or holdings file types, optionally return unmatched identifiers with the responses
     if check_for_unmatched_items(
             flag=return_unmatched_items,
             file_type=file_type,
     ):
         logging.debug("returning unmatched identifiers with the responses")
-        returned_response["unmatched_items"] = unmatched_items(
-            api_factory=api_factory,
-            scope=kwargs.get("scope", None),
-            data_frame=data_frame,
-            mapping_required=mapping_required,
-            file_type=file_type,
-            returned_response=returned_response,
-            sync_batches=sync_batches,
-        )
+        with spans.span("unmatched_items", file_type=file_type) as span:
+            returned_response["unmatched_items"] = await _unmatched_items_async(
+                api_factory=api_factory,
+                scope=kwargs.get("scope", None),
+                data_frame=data_frame,
+                mapping_required=mapping_required,
+                file_type=file_type,
+                returned_response=returned_response,
+                sync_batches=sync_batches,
+                max_concurrency=kwargs.get("max_concurrency", 5),
+                thread_pool=kwargs.get("thread_pool"),
+            )
+            span.set(items=len(returned_response["unmatched_items"]))
 
     return returned_response
 
@@ -1065,6 +1312,8 @@ def unmatched_items(
         file_type: str,
         returned_response: dict,
         sync_batches: list | None = None,
+        max_concurrency: int = 5,
+        thread_pool: concurrent.futures.ThreadPoolExecutor | None = None,
 ):
     """
     This method orchestrates the identification of holdings or transactions objects that were successfully uploaded
@@ -1089,6 +1338,10 @@ def unmatched_items(
         The response from laod_from_data_frame
     sync_batches : list
         A list of the batches used to upload the data into LUSID.
+    max_concurrency : int
+        The maximum number of portfolios to check concurrently
+    thread_pool : concurrent.futures.ThreadPoolExecutor
+        The thread pool to run the requests to LUSID in
 
     Returns
     -------
@@ -1096,35 +1349,79 @@ def unmatched_items(
         A list of objects to be appended to the ultimate response for load_from_data_frame.
     """
 
+    loop = cocoon.async_tools.start_event_loop_new_thread()
+    try:
+        return asyncio.run_coroutine_threadsafe(
+            _unmatched_items_async(
+                api_factory=api_factory,
+                scope=scope,
+                data_frame=data_frame,
+                mapping_required=mapping_required,
+                file_type=file_type,
+                returned_response=returned_response,
+                sync_batches=sync_batches,
+                max_concurrency=max_concurrency,
+                thread_pool=thread_pool,
+            ),
+            loop,
+        ).result()
+    finally:
+        cocoon.async_tools.stop_event_loop_new_thread(loop)
+
+
+async def _unmatched_items_async(
+        api_factory: SyncApiClientFactory,
+        scope: str,
+        data_frame: pd.DataFrame,
+        mapping_required: dict,
+        file_type: str,
+        returned_response: dict,
+        sync_batches: list | None = None,
+        max_concurrency: int = 5,
+        thread_pool: concurrent.futures.ThreadPoolExecutor | None = None,
+):
+    """
+    The awaitable version of unmatched_items, used by load_from_data_frame which is already running in an event loop
+    """
+
     if len(returned_response["errors"]) > 0:
         return ["Please resolve all upload errors to check for unmatched items."]
 
     if file_type == "transaction":
-        return _unmatched_transactions(
+        return await _unmatched_transactions(
             api_factory=api_factory,
             scope=scope,
             data_frame=data_frame,
             mapping_required=mapping_required,
             sync_batches=sync_batches,
+            max_concurrency=max_concurrency,
+            thread_pool=thread_pool,
         )
     elif file_type == "holding":
-        return _unmatched_holdings(
+        return await _unmatched_holdings(
             api_factory=api_factory,
             scope=scope,
             sync_batches=sync_batches,
+            max_concurrency=max_concurrency,
+            thread_pool=thread_pool,
         )
 
 
-def _unmatched_transactions(
+async def _unmatched_transactions(
         api_factory: SyncApiClientFactory,
         scope: str,
         data_frame: pd.DataFrame,
         mapping_required: dict,
         sync_batches: list | None = None,
+        max_concurrency: int = 5,
+        **kwargs,
 ):
     """
     This method identifies which instruments were not resolved with a transaction upload using load_from_data_frame.
 
+    The portfolios are checked concurrently and each page of unmatched transactions is filtered against the
+    transaction ids in the upload as it arrives.
+
     Parameters
     ----------
     api_factory : SyncApiClientFactory api_factory
@@ -1135,66 +1432,72 @@ def _unmatched_transactions(
         The DataFrame containing the data
     sync_batches : list
         A list of the batches used to upload the data into LUSID.
+    max_concurrency : int
+        The maximum number of portfolios to check concurrently
+    kwargs
+        thread_pool - The thread pool to run the requests to LUSID in
 
     Returns
     -------
     responses: list
         A list of transaction objects to be appended to the ultimate response for load_from_data_frame.
     """
-    # Create empty list to hold transaction ids and instruments
-    unmatched_transactions = []
 
     if sync_batches is None:
-        return unmatched_transactions
+        return []
 
     # Extract a list of portfolio codes from the sync_batches
     portfolio_codes = extract_unique_portfolio_codes(sync_batches)
 
-    # For each portfolio, request the unmatched transactions from LUSID and append to the instantiated list
-    for portfolio_code in portfolio_codes:
-        portfolio_transactions = data_frame.loc[
-            data_frame[mapping_required["code"]] == portfolio_code
-            ]
-        from_transaction_date = min(
-            portfolio_transactions[mapping_required["transaction_date"]].apply(
-                lambda x: str(DateOrCutLabel(x))
-            )
-        )
-        to_transactions_date = max(
-            portfolio_transactions[mapping_required["transaction_date"]].apply(
-                lambda x: str(DateOrCutLabel(x))
-            )
-        )
+    # The portfolio codes of the batches are strings, so the codes in the DataFrame are grouped as strings too
+    codes = data_frame[mapping_required["code"]].astype(str)
+
+    # Convert each distinct transaction date once and find the date range of the upload for every portfolio
+    transaction_dates = data_frame[mapping_required["transaction_date"]]
+    transaction_dates = transaction_dates.map(
+        {date: str(DateOrCutLabel(date)) for date in transaction_dates.unique()}
+    )
+    date_ranges = transaction_dates.groupby(codes).agg(["min", "max"])
+
+    # Only transactions which were part of this upload to the same portfolio are returned
+    transaction_ids = dict(tuple(data_frame[[mapping_required["transaction_id"]]].groupby(codes)))
 
-        unmatched_transactions.extend(
-            return_unmatched_transactions(
+    # For each portfolio, request the unmatched transactions from LUSID
+    unmatched_transactions = await gather_with_concurrency(
+        max_concurrency,
+        [
+            functools.partial(
+                _return_filtered_unmatched_transactions,
                 api_factory=api_factory,
                 scope=scope,
                 code=portfolio_code,
-                from_transaction_date=from_transaction_date,
-                to_transaction_date=to_transactions_date,
+                from_transaction_date=date_ranges.loc[portfolio_code, "min"],
+                to_transaction_date=date_ranges.loc[portfolio_code, "max"],
+                data_frame=transaction_ids[portfolio_code],
+                mapping_required=mapping_required,
+                **kwargs,
             )
-        )
-
-    # With the upload dataframe, filter out any transactions from the list that were not part of this upload and return
-    return filter_unmatched_transactions(
-        data_frame=data_frame,
-        mapping_required=mapping_required,
-        unmatched_transactions=unmatched_transactions,
+            for portfolio_code in portfolio_codes
+        ],
     )
 
+    return [
+        transaction
+        for portfolio_transactions in unmatched_transactions
+        for transaction in portfolio_transactions
+    ]
 
-def return_unmatched_transactions(
+
+def _iterate_unmatched_transaction_pages(
         api_factory: SyncApiClientFactory,
         scope: str,
         code: str,
         from_transaction_date: str,
         to_transaction_date: str,
+        as_at=None,
 ):
     """
-    Call the get transactions api and only return those transactions with unresolved identifiers.
-
-    Multiple pages of responses for the get_transactions api call are handled.
+    Call the get transactions api and yield each page of transactions with unresolved identifiers as it is returned.
 
     Parameters
     ----------
@@ -1204,18 +1507,23 @@ def return_unmatched_transactions(
         The scope of the resource to load the data into
     code : str
         The code of the portfolio containing the transactions we want to return
+    from_transaction_date : str
+        The lower bound effective datetime or cut label (inclusive) from which to retrieve transactions
+    to_transaction_date : str
+        The upper bound effective datetime or cut label (inclusive) from which to retrieve transactions
+    as_at : datetime
+        The as at datetime at which to retrieve the transactions, defaults to latest
 
     Returns
     -------
-    A list of transaction objects with the structure.
+    Iterator[list]
+        The transaction objects on each page
     """
     transactions_api = api_factory.build(lusid.TransactionPortfoliosApi)
-    done = False
     next_page = None
-    unmatched_transactions = []
 
     # We need to handle the possibility of paginated results
-    while not done:
+    while True:
 
         # There must be a filter included so only transactions with unmatched instruments are returned
         kwargs: dict[str, Any] = {
@@ -1226,17 +1534,121 @@ def return_unmatched_transactions(
             "filter": "instrumentUid eq'LUID_ZZZZZZZZ'",
         }
 
+        if as_at is not None:
+            kwargs["as_at"] = as_at
+
         if next_page is not None:
             kwargs["page"] = next_page
 
         response = transactions_api.get_transactions(**kwargs)
 
-        unmatched_transactions.extend([response for response in response.values])
+        yield response.values
 
         next_page = response.next_page
-        done = response.next_page is None
+        if next_page is None:
+            return
+
+
+def return_unmatched_transactions(
+        api_factory: SyncApiClientFactory,
+        scope: str,
+        code: str,
+        from_transaction_date: str,
+        to_transaction_date: str,
+        as_at=None,
+):
+    """
+    Call the get transactions api and only return those transactions with unresolved identifiers.
+
+    Multiple pages of responses for the get_transactions api call are handled.
+
+    Parameters
+    ----------
+    api_factory : SyncApiClientFactory api_factory
+        The api factory to use
+    scope : str
+        The scope of the resource to load the data into
+    code : str
+        The code of the portfolio containing the transactions we want to return
+    from_transaction_date : str
+        The lower bound effective datetime or cut label (inclusive) from which to retrieve transactions
+    to_transaction_date : str
+        The upper bound effective datetime or cut label (inclusive) from which to retrieve transactions
+    as_at : datetime
+        The as at datetime at which to retrieve the transactions, defaults to latest. Pinning the as at allows the
+        pages to be served from a ReadCache
+
+    Returns
+    -------
+    A list of transaction objects with the structure.
+    """
+    return [
+        transaction
+        for page in _iterate_unmatched_transaction_pages(
+            api_factory=api_factory,
+            scope=scope,
+            code=code,
+            from_transaction_date=from_transaction_date,
+            to_transaction_date=to_transaction_date,
+            as_at=as_at,
+        )
+        for transaction in page
+    ]
 
-    return unmatched_transactions
+
+@run_in_executor
+def _return_filtered_unmatched_transactions(
+        api_factory: SyncApiClientFactory,
+        scope: str,
+        code: str,
+        from_transaction_date: str,
+        to_transaction_date: str,
+        data_frame: pd.DataFrame,
+        mapping_required: dict,
+        **kwargs,
+):
+    """
+    Return the transactions with unresolved identifiers for a portfolio which are part of the current upload. Each
+    page is filtered as it arrives so that only the relevant transactions are held in memory.
+
+    Parameters
+    ----------
+    api_factory : SyncApiClientFactory api_factory
+        The api factory to use
+    scope : str
+        The scope of the resource to load the data into
+    code : str
+        The code of the portfolio containing the transactions we want to return
+    from_transaction_date : str
+        The lower bound effective datetime or cut label (inclusive) from which to retrieve transactions
+    to_transaction_date : str
+        The upper bound effective datetime or cut label (inclusive) from which to retrieve transactions
+    data_frame : pd.DataFrame
+        The rows of the upload for this portfolio
+    mapping_required : dict
+        The required mapping from load_from_data_frame that helps identify the transaction_id column in the DataFrame
+    kwargs
+        thread_pool - The thread pool to run this function in
+
+    Returns
+    -------
+    A filtered list of transaction objects.
+    """
+    return filter_unmatched_transactions(
+        data_frame=data_frame,
+        mapping_required=mapping_required,
+        unmatched_transactions=(
+            transaction
+            for page in _iterate_unmatched_transaction_pages(
+                api_factory=api_factory,
+                scope=scope,
+                code=code,
+                from_transaction_date=from_transaction_date,
+                to_transaction_date=to_transaction_date,
+            )
+            for transaction in page
+        ),
+    )
 
 
 def filter_unmatched_transactions(
@@ -1254,8 +1666,9 @@ def filter_unmatched_transactions(
         The DataFrame containing the data
     mapping_required : dict
         The required mapping from load_from_data_frame that helps identify the transaction_id column in the DataFrame
-    unmatched_transactions : list
-         A list of transaction objects.
+    unmatched_transactions : Iterable
+         The transaction objects, which can be streamed from each page of a response so that only the transactions
+         which are kept are held in memory
 
     Returns
     -------
@@ -1274,10 +1687,12 @@ def filter_unmatched_transactions(
     return filtered_unmatched_transactions
 
 
-def _unmatched_holdings(
+async def _unmatched_holdings(
         api_factory: SyncApiClientFactory,
         scope: str,
         sync_batches: list | None = None,
+        max_concurrency: int = 5,
+        **kwargs,
 ):
     """
     This method identifies which instruments were not resolved with a holdings upload using load_from_data_frame.
@@ -1290,31 +1705,74 @@ def _unmatched_holdings(
         The scope of the resource to load the data into
     sync_batches : list
         A list of the batches used to upload the data into LUSID
+    max_concurrency : int
+        The maximum number of holdings adjustments to check concurrently
+    kwargs
+        thread_pool - The thread pool to run the requests to LUSID in
 
     Returns
     -------
     responses: list
         A list of holding objects to be appended to the ultimate response for load_from_data_frame.
     """
-    # Create empty list to hold holdings that have not been resolved
-    unmatched_holdings = []
-    if sync_batches is  None:
-        return unmatched_holdings
+    if sync_batches is None:
+        return []
 
     # Extract a list of tuples of portfolio codes and effective at times from sync_batches
     code_tuples = extract_unique_portfolio_codes_effective_at_tuples(sync_batches)
 
-    # For each holding adjustment in the upload, check whether any contained unresolved instruments and append to list
-    for code_tuple in code_tuples:
-        unmatched_holdings.extend(
-            return_unmatched_holdings(
+    # For each holding adjustment in the upload, check whether any contained unresolved instruments
+    unmatched_holdings = await gather_with_concurrency(
+        max_concurrency,
+        [
+            functools.partial(
+                _return_unmatched_holdings_in_executor,
                 api_factory=api_factory,
                 scope=scope,
                 code_tuple=code_tuple,
+                **kwargs,
             )
-        )
+            for code_tuple in code_tuples
+        ],
+    )
+
+    return [
+        holding
+        for adjustment_holdings in unmatched_holdings
+        for holding in adjustment_holdings
+    ]
 
-    return unmatched_holdings
+
+@run_in_executor
+def _return_unmatched_holdings_in_executor(
+        api_factory: SyncApiClientFactory,
+        scope: str,
+        code_tuple: Tuple[str, str],
+        **kwargs,
+):
+    """
+    An awaitable version of return_unmatched_holdings which runs in the provided thread pool.
+
+    Parameters
+    ----------
+    api_factory : SyncApiClientFactory api_factory
+        The api factory to use
+    scope : str
+        The scope of the resource to load the data into
+    code_tuple : (str, str)
+        A tuple of format (portfolio_code, effective_at)
+    kwargs
+        thread_pool - The thread pool to run this function in
+
+    Returns
+    -------
+    A list of holding objects.
+    """
+    return return_unmatched_holdings(
+        api_factory=api_factory,
+        scope=scope,
+        code_tuple=code_tuple,
+    )
 
 
 def return_unmatched_holdings(
@@ -1388,6 +1846,9 @@ def load_from_data_frame(
         sub_holding_keys_scope: str | None = None,
         return_unmatched_items: bool = False,
         instrument_scope: str | None = None,
+        span_sink=None,
+        profiler=None,
+        call_stats=None,
 ):
     """
 
@@ -1434,11 +1895,22 @@ def load_from_data_frame(
         transactions or holdings
     instrument_scope : str
         The scope to upsert to when upseting instrument
+    span_sink
+        Receives a span timing each phase of the load e.g. validation, model conversion and upload, with the rows,
+        batches and bytes involved. Any object with an emit(span) method can be used, such as the LoggingSpanSink,
+        JsonLinesSpanSink, InMemorySpanSink or OpenTelemetrySpanSink from cocoon.spans
+    profiler : LoadProfiler | None
+        Profiles this load, writing a CPU profile and memory snapshots for each of its phases to a directory e.g.
+        LoadProfiler("profiles") from cocoon.profiling
+    call_stats : CallStats | None
+        Records the endpoint, status, latency, payload sizes and retries of every LUSID call made by this load e.g.
+        CallStats() from lpt.stats
 
     Returns
     -------
     responses: dict
-        The responses from loading the data into LUSID
+        The responses from loading the data into LUSID. For portfolios and reference portfolios the successful
+        responses are also split into the "existing" portfolios and those "created" by the load
 
     Examples
     --------
@@ -1551,127 +2023,189 @@ def load_from_data_frame(
 
     """
 
-    # A mapping between the file type and relevant attributes e.g. domain, top_level_model etc.
-    domain_lookup = cocoon.utilities.load_json_file("config/domain_settings.json")
-
-    # Convert the file type to lower case & singular as well as checking it is of the allowed value
-    file_type = cast(str, (
-        Validator(file_type, "file_type")
-        .make_singular()
-        .make_lower()
-        .check_allowed_value(list(domain_lookup.keys()))
-        .value
-    ))
-
-    # Ensures that it is a single index dataframe
-    Validator(data_frame.index, "data_frame_index").check_is_not_instance(pd.MultiIndex)
-
-    # Set defaults aligned with the data type of each argument, this allows for users to provide None
-    identifier_mapping = cast(dict, (
-        Validator(identifier_mapping, "identifier_mapping")
-        .set_default_value_if_none(default={})
-        .discard_dict_keys_none_value()
-        .value
-    ))
-
-    properties_scope = cast(str, (
-        Validator(properties_scope, "properties_scope")
-        .set_default_value_if_none(default=scope)
-        .value
-    ))
-
-    sub_holding_keys_scope = cast(str, (
-        Validator(sub_holding_keys_scope, "sub_holding_keys_scope")
-        .set_default_value_if_none(default=properties_scope)
-        .value
-    ))
-
-    instrument_scope = cast(str, (
-        Validator(instrument_scope, "instrument_scope")
-        .set_default_value_if_none(default="default")
-        .value
-    ))
-
-    property_columns = cast(list, (
-        Validator(property_columns, "property_columns")
-        .set_default_value_if_none(default=[])
-        .value
-    ))
-
-    property_columns = [
-        {"source": column, "target": column} if isinstance(column, str) else column
-        for column in property_columns
-    ]
+    # Time each phase of the load, this does nothing if there is no sink or profiler
+    spans = SpanRecorder(span_sink, profiler)
+
+    if call_stats is not None:
+        api_factory = call_stats.api_factory(api_factory)
 
-    Validator(
-        property_columns, "property_columns"
-    ).check_entries_are_strings_or_dict_containing_key("source")
-
-    sub_holding_keys = cast(list, (
-        Validator(sub_holding_keys, "sub_holding_keys")
-        .set_default_value_if_none(default=[])
-        .value
-    ))
-
-    batch_size = cast(int, (
-        Validator(batch_size, "batch_size")
-        .set_default_value_if_none(domain_lookup[file_type]["default_batch_size"])
-        .override_value(
-            not domain_lookup[file_type]["batch_allowed"],
-            domain_lookup[file_type]["default_batch_size"],
+    # The profiler is stopped and its profiles written even if the load fails
+    with profiler if profiler is not None else contextlib.nullcontext():
+        return _load_from_data_frame(
+            api_factory=api_factory,
+            scope=scope,
+            data_frame=data_frame,
+            mapping_required=mapping_required,
+            mapping_optional=mapping_optional,
+            file_type=file_type,
+            identifier_mapping=identifier_mapping,
+            property_columns=property_columns,
+            properties_scope=properties_scope,
+            batch_size=batch_size,
+            remove_white_space=remove_white_space,
+            instrument_name_enrichment=instrument_name_enrichment,
+            transactions_commit_mode=transactions_commit_mode,
+            sub_holding_keys=sub_holding_keys,
+            holdings_adjustment_only=holdings_adjustment_only,
+            thread_pool_max_workers=thread_pool_max_workers,
+            sub_holding_keys_scope=sub_holding_keys_scope,
+            return_unmatched_items=return_unmatched_items,
+            instrument_scope=instrument_scope,
+            spans=spans,
         )
-        .value
-    ))
-
-    # Discard mappings where the provided value is None
-    mapping_required = cast(dict, (
-        Validator(mapping_required, "mapping_required")
-        .discard_dict_keys_none_value()
-        .value
-    ))
-
-    mapping_optional = cast(dict, (
-        Validator(mapping_optional, "mapping_optional")
-        .discard_dict_keys_none_value()
-        .value
-    ))
-
-    required_call_attributes = domain_lookup[file_type]["required_call_attributes"]
-    if "scope" in required_call_attributes:
-        required_call_attributes.remove("scope")
-
-    # Check that all required parameters exist
-    Validator(
-        required_call_attributes, "required_attributes_for_call"
-    ).check_subset_of_list(list(mapping_required.keys()), "required_mapping")
-
-    # Verify that all the required attributes for this top level model exist in the provided required mapping
-    cocoon.utilities.verify_all_required_attributes_mapped(
-        mapping=mapping_required,
-        model_object_name=domain_lookup[file_type]["top_level_model"],
-        exempt_attributes=["identifiers", "properties", "instrument_identifiers"],
-    )
+
+
+def _load_from_data_frame(
+        api_factory: SyncApiClientFactory,
+        scope: str,
+        data_frame: pd.DataFrame,
+        mapping_required: dict,
+        mapping_optional: dict,
+        file_type: str,
+        identifier_mapping: dict | None,
+        property_columns: list | None,
+        properties_scope: str | None,
+        batch_size: int | None,
+        remove_white_space: bool,
+        instrument_name_enrichment: bool,
+        transactions_commit_mode: str | None,
+        sub_holding_keys: list | None,
+        holdings_adjustment_only: bool,
+        thread_pool_max_workers: int,
+        sub_holding_keys_scope: str | None,
+        return_unmatched_items: bool,
+        instrument_scope: str | None,
+        spans: SpanRecorder,
+):
+    """
+    Loads the DataFrame into LUSID, see load_from_data_frame for the parameters
+    """
+
+    with spans.span("validation", rows=len(data_frame)) as validation:
+        # A mapping between the file type and relevant attributes e.g. domain, top_level_model etc.
+        domain_lookup = cocoon.utilities.load_json_file("config/domain_settings.json")
+
+        # Convert the file type to lower case & singular as well as checking it is of the allowed value
+        file_type = cast(str, (
+            Validator(file_type, "file_type")
+            .make_singular()
+            .make_lower()
+            .check_allowed_value(list(domain_lookup.keys()))
+            .value
+        ))
+
+        # Ensures that it is a single index dataframe
+        Validator(data_frame.index, "data_frame_index").check_is_not_instance(pd.MultiIndex)
+
+        # Set defaults aligned with the data type of each argument, this allows for users to provide None
+        identifier_mapping = cast(dict, (
+            Validator(identifier_mapping, "identifier_mapping")
+            .set_default_value_if_none(default={})
+            .discard_dict_keys_none_value()
+            .value
+        ))
+
+        properties_scope = cast(str, (
+            Validator(properties_scope, "properties_scope")
+            .set_default_value_if_none(default=scope)
+            .value
+        ))
+
+        sub_holding_keys_scope = cast(str, (
+            Validator(sub_holding_keys_scope, "sub_holding_keys_scope")
+            .set_default_value_if_none(default=properties_scope)
+            .value
+        ))
+
+        instrument_scope = cast(str, (
+            Validator(instrument_scope, "instrument_scope")
+            .set_default_value_if_none(default="default")
+            .value
+        ))
+
+        property_columns = cast(list, (
+            Validator(property_columns, "property_columns")
+            .set_default_value_if_none(default=[])
+            .value
+        ))
+
+        property_columns = [
+            {"source": column, "target": column} if isinstance(column, str) else column
+            for column in property_columns
+        ]
+
+        Validator(
+            property_columns, "property_columns"
+        ).check_entries_are_strings_or_dict_containing_key("source")
+
+        sub_holding_keys = cast(list, (
+            Validator(sub_holding_keys, "sub_holding_keys")
+            .set_default_value_if_none(default=[])
+            .value
+        ))
+
+        batch_size = cast(int, (
+            Validator(batch_size, "batch_size")
+            .set_default_value_if_none(domain_lookup[file_type]["default_batch_size"])
+            .override_value(
+                not domain_lookup[file_type]["batch_allowed"],
+                domain_lookup[file_type]["default_batch_size"],
+            )
+            .value
+        ))
+
+        # Discard mappings where the provided value is None
+        mapping_required = cast(dict, (
+            Validator(mapping_required, "mapping_required")
+            .discard_dict_keys_none_value()
+            .value
+        ))
+
+        mapping_optional = cast(dict, (
+            Validator(mapping_optional, "mapping_optional")
+            .discard_dict_keys_none_value()
+            .value
+        ))
+
+        required_call_attributes = domain_lookup[file_type]["required_call_attributes"]
+        if "scope" in required_call_attributes:
+            required_call_attributes.remove("scope")
+
+        # Check that all required parameters exist
+        Validator(
+            required_call_attributes, "required_attributes_for_call"
+        ).check_subset_of_list(list(mapping_required.keys()), "required_mapping")
+
+        # Verify that all the required attributes for this top level model exist in the provided required mapping
+        cocoon.utilities.verify_all_required_attributes_mapped(
+            mapping=mapping_required,
+            model_object_name=domain_lookup[file_type]["top_level_model"],
+            exempt_attributes=["identifiers", "properties", "instrument_identifiers"],
+        )
+        validation.set(file_type=file_type)
 
     # Create the thread pool to use with the async_tools.run_in_executor decorator to make sync functions awaitable
     thread_pool = ThreadPool(thread_pool_max_workers).thread_pool
 
     if instrument_name_enrichment:
-        loop = cocoon.async_tools.start_event_loop_new_thread()
-
-        data_frame, mapping_required = asyncio.run_coroutine_threadsafe(
-            cocoon.instruments.enrich_instruments(
-                api_factory=api_factory,
-                data_frame=data_frame,
-                instrument_identifier_mapping=identifier_mapping,
-                mapping_required=mapping_required,
-                constant_prefix="$",
-                **{"thread_pool": thread_pool},
-            ),
-            loop,
-        ).result()
-
-        # Stop the additional event loop
-        cocoon.async_tools.stop_event_loop_new_thread(loop)
+        with spans.span("instrument_enrichment", rows=len(data_frame)):
+            loop = cocoon.async_tools.start_event_loop_new_thread()
+
+            try:
+                data_frame, mapping_required = asyncio.run_coroutine_threadsafe(
+                    cocoon.instruments.enrich_instruments(
+                        api_factory=api_factory,
+                        data_frame=data_frame,
+                        instrument_identifier_mapping=identifier_mapping,
+                        mapping_required=mapping_required,
+                        constant_prefix="$",
+                        **{"thread_pool": thread_pool},
+                    ),
+                    loop,
+                ).result()
+            finally:
+                # Stop the additional event loop
+                cocoon.async_tools.stop_event_loop_new_thread(loop)
 
     """
     Unnest and populate defaults where a mapping is provided with column and/or default fields in a nested dictionary
@@ -1686,148 +2220,138 @@ def load_from_data_frame(
     rather than simply
     {'name': 'instrument_name'}
     """
-    (
-        data_frame,
-        mapping_required,
-    ) = cocoon.utilities.handle_nested_default_and_column_mapping(
-        data_frame=data_frame, mapping=mapping_required, constant_prefix="$"
-    )
-    (
-        data_frame,
-        mapping_optional,
-    ) = cocoon.utilities.handle_nested_default_and_column_mapping(
-        data_frame=data_frame, mapping=mapping_optional, constant_prefix="$"
-    )
+    with spans.span("nested_mapping", rows=len(data_frame)):
+        (
+            data_frame,
+            mapping_required,
+        ) = cocoon.utilities.handle_nested_default_and_column_mapping(
+            data_frame=data_frame, mapping=mapping_required, constant_prefix="$"
+        )
+        (
+            data_frame,
+            mapping_optional,
+        ) = cocoon.utilities.handle_nested_default_and_column_mapping(
+            data_frame=data_frame, mapping=mapping_optional, constant_prefix="$"
+        )
 
     # Get all the DataFrame columns as well as those that contain at least one null value
-    data_frame_columns = list(data_frame.columns.values)
-    nan_columns = [
-        column for column in data_frame_columns if bool(data_frame[column].isna().any())
-    ]
+    with spans.span("column_validation", columns=len(data_frame.columns)):
+        data_frame_columns = list(data_frame.columns.values)
+        nan_columns = [
+            column for column in data_frame_columns if bool(data_frame[column].isna().any())
+        ]
 
-    # Validate that none of the provided columns are missing or invalid
-    Validator(
-        mapping_required, "mapping_required"
-    ).get_dict_values().filter_list_using_first_character("$").check_subset_of_list(
-        data_frame_columns, "DataFrame Columns"
-    ).check_no_intersection_with_list(
-        nan_columns, "Columns with Missing Values"
-    )
+        # Validate that none of the provided columns are missing or invalid
+        Validator(
+            mapping_required, "mapping_required"
+        ).get_dict_values().filter_list_using_first_character("$").check_subset_of_list(
+            data_frame_columns, "DataFrame Columns"
+        ).check_no_intersection_with_list(
+            nan_columns, "Columns with Missing Values"
+        )
 
-    Validator(
-        mapping_optional, "mapping_optional"
-    ).get_dict_values().filter_list_using_first_character("$").check_subset_of_list(
-        data_frame_columns, "DataFrame Columns"
-    )
+        Validator(
+            mapping_optional, "mapping_optional"
+        ).get_dict_values().filter_list_using_first_character("$").check_subset_of_list(
+            data_frame_columns, "DataFrame Columns"
+        )
 
-    Validator(
-        identifier_mapping, "identifier_mapping"
-    ).get_dict_values().filter_list_using_first_character("$").check_subset_of_list(
-        data_frame_columns, "DataFrame Columns"
-    )
+        Validator(
+            identifier_mapping, "identifier_mapping"
+        ).get_dict_values().filter_list_using_first_character("$").check_subset_of_list(
+            data_frame_columns, "DataFrame Columns"
+        )
 
-    source_columns = [column["source"] for column in property_columns]
-    Validator(source_columns, "property_columns").check_subset_of_list(
-        data_frame_columns, "DataFrame Columns"
-    )
+        source_columns = [column["source"] for column in property_columns]
+        Validator(source_columns, "property_columns").check_subset_of_list(
+            data_frame_columns, "DataFrame Columns"
+        )
 
     # Converts higher level data types such as dictionaries and lists to strings
-    data_frame = data_frame.applymap(cocoon.utilities.convert_cell_value_to_string)
+    with spans.span("normalization", rows=len(data_frame), columns=len(data_frame.columns)):
+        data_frame = data_frame.applymap(cocoon.utilities.convert_cell_value_to_string)
 
-    if remove_white_space:
-        column_list = [source_columns]
-        for col in [mapping_optional, mapping_required, identifier_mapping]:
-            column_list.append(list(col.values()))
+        if remove_white_space:
+            column_list = [source_columns]
+            for col in [mapping_optional, mapping_required, identifier_mapping]:
+                column_list.append(list(col.values()))
 
-        column_list = list(set([item for sublist in column_list for item in sublist]))
-        data_frame = strip_whitespace(data_frame, column_list)
+            column_list = list(set([item for sublist in column_list for item in sublist]))
+            data_frame = strip_whitespace(data_frame, column_list)
 
-    # Get the types of the attributes on the top level model for this request
-    
-    open_api_types = get_attributes_and_types(getattr(
-        lusid_models, domain_lookup[file_type]["top_level_model"]
-    ))
-
-    # If there is a sub_holding_keys attribute and it has a dict type this means the sub_holding_keys
-    # need to have a property definition and be populated with values from the provided dataframe columns
-    if (
-            "sub_holding_keys" in open_api_types.keys()
-            and ("Mapping[" in open_api_types["sub_holding_keys"] or "dict(" in open_api_types["sub_holding_keys"])
-    ):
-        Validator(sub_holding_keys, "sub_holding_key_columns").check_subset_of_list(
-            data_frame_columns, "DataFrame Columns"
-        )
+    with spans.span("property_definitions", property_columns=len(property_columns)):
+        # Get the types of the attributes on the top level model for this request
+        open_api_types = get_attributes_and_types(getattr(
+            lusid_models, domain_lookup[file_type]["top_level_model"]
+        ))
 
-        # Check for and create missing property definitions for the sub-holding-keys
-        data_frame = cocoon.properties.create_missing_property_definitions_from_file(
-            api_factory=api_factory,
-            properties_scope=sub_holding_keys_scope,
-            domain="Transaction",
-            data_frame=data_frame,
-            property_columns=[{"source": key} for key in sub_holding_keys],
-        )
+        # If there is a sub_holding_keys attribute and it has a dict type this means the sub_holding_keys
+        # need to have a property definition and be populated with values from the provided dataframe columns
+        if (
+                "sub_holding_keys" in open_api_types.keys()
+                and ("Mapping[" in open_api_types["sub_holding_keys"] or "dict(" in open_api_types["sub_holding_keys"])
+        ):
+            Validator(sub_holding_keys, "sub_holding_key_columns").check_subset_of_list(
+                data_frame_columns, "DataFrame Columns"
+            )
 
-    # Check for and create missing property definitions for the properties
-    if domain_lookup[file_type]["domain"] is not None:
-        data_frame = cocoon.properties.create_missing_property_definitions_from_file(
-            api_factory=api_factory,
-            properties_scope=properties_scope,
-            domain=domain_lookup[file_type]["domain"],
-            data_frame=data_frame,
-            property_columns=property_columns,
-        )
+            # Check for and create missing property definitions for the sub-holding-keys
+            data_frame = cocoon.properties.create_missing_property_definitions_from_file(
+                api_factory=api_factory,
+                properties_scope=sub_holding_keys_scope,
+                domain="Transaction",
+                data_frame=data_frame,
+                property_columns=[{"source": key} for key in sub_holding_keys],
+            )
 
-    # If the transaction contains subholding keys which aren't defined in the portfolio. We first create the
-    # properties that don't already exist, then we make the properties sub-holding keys in the portfolios.
-    if (
-            file_type in ("transaction", "transactions_commit_mode")
-            and sub_holding_keys is not None
-            and sub_holding_keys != []
-    ):
-        # if the SHK key is written in {domain}/{scope}/{code} form we extract the code since when we add it to
-        # the properties there will be issues due to different formats. Also, there are issues with the
-        # create_missing_property_definitions_from_file function as it extracts data from columns using the
-        # sub-holding keys.
-        sub_holding_keys_codes = [
-            key if "/" not in key else key.split("/")[2] for key in sub_holding_keys
-        ]
+        # Check for and create missing property definitions for the properties
+        if domain_lookup[file_type]["domain"] is not None:
+            data_frame = cocoon.properties.create_missing_property_definitions_from_file(
+                api_factory=api_factory,
+                properties_scope=properties_scope,
+                domain=domain_lookup[file_type]["domain"],
+                data_frame=data_frame,
+                property_columns=property_columns,
+            )
 
-        # Check for and create missing property definitions for the sub-holding-keys
-        data_frame = cocoon.properties.create_missing_property_definitions_from_file(
-            api_factory=api_factory,
-            properties_scope=properties_scope,
-            domain="Transaction",
-            data_frame=data_frame,
-            property_columns=[{"source": key} for key in sub_holding_keys_codes],
-        )
+        portfolio_sub_holding_keys = None
 
-        transaction_portfolio_api = api_factory.build(
-            lusid.TransactionPortfoliosApi
-        )
+        # If the transaction contains subholding keys which aren't defined in the portfolio. We first create the
+        # properties that don't already exist, then we make the properties sub-holding keys in the portfolios.
+        if (
+                file_type in ("transaction", "transactions_commit_mode")
+                and sub_holding_keys is not None
+                and sub_holding_keys != []
+        ):
+            # if the SHK key is written in {domain}/{scope}/{code} form we extract the code since when we add it to
+            # the properties there will be issues due to different formats. Also, there are issues with the
+            # create_missing_property_definitions_from_file function as it extracts data from columns using the
+            # sub-holding keys.
+            sub_holding_keys_codes = [
+                key if "/" not in key else key.split("/")[2] for key in sub_holding_keys
+            ]
 
-        # Add subholding keys to the portfolios we are going to apply the transactions to
-        for code in set(data_frame[mapping_required["code"]]):
-            transaction_portfolio_api.patch_portfolio_details(
-                scope,
-                code,
-                cast(Any, [
-                    {
-                        "value": cocoon.properties._infer_full_property_keys(
-                            partial_keys=sub_holding_keys,
-                            properties_scope=properties_scope,
-                            domain="Transaction",
-                        ),
-                        "path": "/subHoldingKeys",
-                        "op": "add",
-                    }
-                ]),
+            # Check for and create missing property definitions for the sub-holding-keys
+            data_frame = cocoon.properties.create_missing_property_definitions_from_file(
+                api_factory=api_factory,
+                properties_scope=properties_scope,
+                domain="Transaction",
+                data_frame=data_frame,
+                property_columns=[{"source": key} for key in sub_holding_keys_codes],
             )
 
-        # Add sub-holding keys to the properties, so it is created for each transaction.
-        property_columns += [
-            {"source": sub_holding_key, "target": sub_holding_key}
-            for sub_holding_key in sub_holding_keys_codes
-        ]
+            # The sub-holding keys are added to the portfolios while the transactions are converted into models
+            portfolio_sub_holding_keys = cocoon.properties._infer_full_property_keys(
+                partial_keys=sub_holding_keys,
+                properties_scope=properties_scope,
+                domain="Transaction",
+            )
+
+            # Add sub-holding keys to the properties, so it is created for each transaction.
+            property_columns += [
+                {"source": sub_holding_key, "target": sub_holding_key}
+                for sub_holding_key in sub_holding_keys_codes
+            ]
 
     # Start a new event loop in a new thread, this is required to run inside a Jupyter notebook
     loop = cocoon.async_tools.start_event_loop_new_thread()
@@ -1845,7 +2369,10 @@ def load_from_data_frame(
         "transactions_commit_mode": transactions_commit_mode,
         "holdings_adjustment_only": holdings_adjustment_only,
         "thread_pool": thread_pool,
+        "max_concurrency": thread_pool_max_workers,
         "instrument_scope": instrument_scope,
+        "portfolio_sub_holding_keys": portfolio_sub_holding_keys,
+        "spans": spans,
     }
 
     # Get the responses from LUSID
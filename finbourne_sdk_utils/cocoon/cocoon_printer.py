@@ -2,7 +2,7 @@ import pandas as pd
 import numpy as np
 from finbourne_sdk_utils.cocoon import checkargs
 from finbourne.sdk.exceptions import ApiException
-from flatten_json import flatten
+from finbourne_sdk_utils.pandas_utils.lusid_pandas import models_to_data_frame
 
 
 class CocoonPrinter:
@@ -190,9 +190,7 @@ def get_non_href_response(response: dict, file_type: str, data_entity_details=Fa
     ]
 
     def extract_value_details_from_success_request(data_entity_dict):
-        return pd.DataFrame(
-            flatten(value[1].to_dict(), ".") for value in data_entity_dict
-        )
+        return models_to_data_frame(value[1] for value in data_entity_dict)
 
     def extract_key_details_from_success_request(data_entity_dict):
         return pd.DataFrame(value[0] for value in data_entity_dict)
@@ -0,0 +1,290 @@
+import collections
+import logging
+import marshal
+import os
+import re
+import sys
+import threading
+import tracemalloc
+from typing import Dict, List, Tuple
+
+
+# The innermost frames of threads which are waiting for work rather than doing it e.g. an idle worker or event loop
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+Function = Tuple[str, int, str]
+
+
+class LoadProfiler:
+    """
+    Profiles a single load, writing a CPU profile and memory snapshots for each of its phases to a directory.
+
+    The CPU profile is sampled from every thread the load uses, including the event loop and thread pool threads,
+    with each sample attributed to the whole load and to each phase in progress when it was taken. Each phase is
+    written as cpu_<phase>.pstats, which can be read with pstats or snakeviz, or as cpu_<phase>.collapsed, the
+    collapsed stack format read by flamegraph.pl and speedscope. In the pstats files call counts are sample counts.
+
+    The memory snapshots are taken with tracemalloc at the start and end of the load and the first time each phase
+    completes. They are written as memory_<n>_<phase>.tracemalloc, which can be read with tracemalloc.Snapshot.load,
+    along with a memory.txt summary of the traced memory and the largest allocations made since the previous snapshot.
+
+    The profiler is passed to a load e.g. load_from_data_frame(..., profiler=LoadProfiler("profiles")), or used as a
+    context manager around a block of work.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        cpu: bool = True,
+        memory: bool = True,
+        output_format: str = "pstats",
+        interval: float = 0.005,
+        include_idle: bool = False,
+        memory_frames: int = 1,
+    ):
+        """
+        Parameters
+        ----------
+        directory : str
+            The directory to write the profiles to, created if it does not exist
+        cpu : bool
+            Whether to sample a CPU profile
+        memory : bool
+            Whether to take tracemalloc snapshots, this slows down the load considerably
+        output_format : str
+            The format of the CPU profiles, either "pstats" or "collapsed"
+        interval : float
+            The number of seconds between samples
+        include_idle : bool
+            Whether to keep samples of threads waiting for work, which turns the CPU profile into a wall clock profile
+        memory_frames : int
+            The number of frames tracemalloc keeps for each allocation
+        """
+        if output_format not in ("pstats", "collapsed"):
+            raise ValueError(f"The output_format must be either 'pstats' or 'collapsed', not '{output_format}'")
+
+        self.directory = directory
+        self.cpu = cpu
+        self.memory = memory
+        self.output_format = output_format
+        self.interval = interval
+        self.include_idle = include_idle
+        self.memory_frames = memory_frames
+        self.files: List[str] = []
+
+        self._lock = threading.Lock()
+        self._open_phases: Dict[int, str] = {}
+        self._samples: Dict[str, collections.Counter] = collections.defaultdict(collections.Counter)
+        self._thread_names: Dict[int, str] = {}
+        self._excluded_threads: set = set()
+        self._sampler = None
+        self._stopped = threading.Event()
+        self._snapshotted: set = set()
+        self._snapshots: List[Tuple[str, tracemalloc.Snapshot, int, int]] = []
+        self._started_tracemalloc = False
+        self.running = False
+
+    def __enter__(self) -> "LoadProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """
+        Starts profiling, any threads already running other than the calling thread are left out of the CPU profile
+        """
+        if self.running:
+            return
+        self.running = True
+        os.makedirs(self.directory, exist_ok=True)
+
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.memory_frames)
+                self._started_tracemalloc = True
+            self._snapshot("start")
+
+        if self.cpu:
+            self._excluded_threads = {thread.ident for thread in threading.enumerate()} - {threading.get_ident()}
+            self._stopped.clear()
+            self._sampler = threading.Thread(target=self._sample, name="LoadProfiler", daemon=True)
+            self._sampler.start()
+
+    def stop(self) -> List[str]:
+        """
+        Stops profiling and writes the profiles to the directory
+
+        Returns
+        -------
+        List[str]
+            The paths of the files written
+        """
+        if not self.running:
+            return self.files
+        self.running = False
+
+        if self._sampler is not None:
+            self._stopped.set()
+            self._sampler.join()
+            self._sampler = None
+            self._write_cpu_profiles()
+
+        if self.memory:
+            self._snapshot("end")
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+            self._write_memory_summary()
+
+        logging.info(f"Wrote {len(self.files)} profile files to {self.directory}")
+        return self.files
+
+    def phase_started(self, span) -> None:
+        """
+        Called by a SpanRecorder when a phase starts, samples taken until it finishes are attributed to it
+        """
+        with self._lock:
+            self._open_phases[span.span_id] = span.name
+
+    def phase_finished(self, span) -> None:
+        """
+        Called by a SpanRecorder when a phase finishes, the first time each phase finishes memory is snapshotted
+        """
+        with self._lock:
+            self._open_phases.pop(span.span_id, None)
+            first = span.name not in self._snapshotted
+            self._snapshotted.add(span.name)
+
+        if self.memory and self.running and first:
+            self._snapshot(span.name)
+
+    def _sample(self) -> None:
+        sampler = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                phases = ["load", *set(self._open_phases.values())]
+
+            for ident, frame in frames.items():
+                if ident == sampler or ident in self._excluded_threads:
+                    continue
+                if not self.include_idle and _is_idle(frame):
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+
+                # Time spent in the profiler itself e.g. taking memory snapshots is left out
+                if any(filename == __file__ for filename, _, _ in stack):
+                    continue
+                stack.reverse()
+
+                key = (self._thread_name(ident), tuple(stack))
+                for phase in phases:
+                    self._samples[phase][key] += 1
+
+    def _thread_name(self, ident: int) -> str:
+        if ident not in self._thread_names:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            # Threads in the same pool are merged e.g. ThreadPoolExecutor-0_1 and ThreadPoolExecutor-0_2
+            self._thread_names[ident] = re.sub(r"_\d+$", "", names.get(ident, str(ident)))
+        return self._thread_names[ident]
+
+    def _write_cpu_profiles(self) -> None:
+        for phase, samples in self._samples.items():
+            path = os.path.join(self.directory, f"cpu_{phase}.{self.output_format}")
+            if self.output_format == "collapsed":
+                _write_collapsed(path, samples)
+            else:
+                _write_pstats(path, samples, self.interval)
+            self.files.append(path)
+
+    def _snapshot(self, name: str) -> None:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            ]
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        with self._lock:
+            index = len(self._snapshots)
+            self._snapshots.append((name, snapshot, current, peak))
+        path = os.path.join(self.directory, f"memory_{index:02d}_{name}.tracemalloc")
+        snapshot.dump(path)
+        self.files.append(path)
+
+    def _write_memory_summary(self, top: int = 10) -> None:
+        path = os.path.join(self.directory, "memory.txt")
+        with open(path, "w") as f:
+            previous = None
+            for name, snapshot, current, peak in self._snapshots:
+                f.write(f"{name}: current {current / 1e6:.2f} MB, peak since previous snapshot {peak / 1e6:.2f} MB\n")
+                if previous is not None:
+                    for statistic in snapshot.compare_to(previous, "lineno")[:top]:
+                        f.write(f"    {statistic}\n")
+                previous = snapshot
+        self.files.append(path)
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES
+
+
+def _label(function: Function) -> str:
+    filename, line, name = function
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def _write_collapsed(path: str, samples: collections.Counter) -> None:
+    # One line per distinct stack, from the thread down to the innermost frame, followed by its number of samples
+    lines = collections.Counter()
+    for (thread, stack), count in samples.items():
+        lines[";".join([thread, *(_label(function) for function in stack)])] += count
+
+    with open(path, "w") as f:
+        for line, count in sorted(lines.items()):
+            f.write(f"{line} {count}\n")
+
+
+def _write_pstats(path: str, samples: collections.Counter, interval: float) -> None:
+    # Build the dictionary written by cProfile.Profile.dump_stats, mapping each function to its
+    # (primitive calls, calls, own time, cumulative time, callers) with the times estimated from the samples
+    stats: Dict[Function, list] = {}
+    for (_, stack), count in samples.items():
+        seconds = count * interval
+        seen = set()
+        for depth, function in enumerate(stack):
+            entry = stats.setdefault(function, [0, 0, 0.0, 0.0, {}])
+            leaf = depth == len(stack) - 1
+
+            # Recursive functions are only counted once per sample so that their cumulative time is not inflated
+            if function not in seen:
+                seen.add(function)
+                entry[0] += count
+                entry[1] += count
+                entry[3] += seconds
+            if leaf:
+                entry[2] += seconds
+
+            if depth > 0:
+                caller = stack[depth - 1]
+                calls, primitive, own, cumulative = entry[4].get(caller, (0, 0, 0.0, 0.0))
+                entry[4][caller] = (calls + count, primitive + count, own + (seconds if leaf else 0.0), cumulative + seconds)
+
+    with open(path, "wb") as f:
+        marshal.dump({function: tuple(entry) for function, entry in stats.items()}, f)
@@ -1,12 +1,23 @@
 import pandas as pd
 from finbourne_sdk_utils.cocoon.cocoon import load_from_data_frame
 from finbourne_sdk_utils.cocoon.utilities import load_json_file
+import functools
 import logging
 from pathlib import Path
 
 logger = logging.getLogger()
 
-default_mappings = dict(load_json_file("config/seed_sample_data.json"))
+
+@functools.lru_cache(maxsize=None)
+def _default_mappings() -> dict:
+    # The default mappings are read the first time they are needed rather than when the module is imported
+    return dict(load_json_file("config/seed_sample_data.json"))
+
+
+def __getattr__(name):
+    if name == "default_mappings":
+        return _default_mappings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def seed_data(
@@ -15,7 +26,7 @@ def seed_data(
     scope: str,
     transaction_file: str | Path | pd.DataFrame,
     file_type: str,
-    mappings: dict = default_mappings,
+    mappings: dict | None = None,
     sub_holding_keys=[],
 ):
     """
@@ -34,8 +45,9 @@ def seed_data(
         The absolute or relative path to source file of transaction data or a pandas DataFrame
     file_type : str
         the file extension (e.g. "csv" for "test_transaction.csv".
-    mappings : dict
-        a file containing mapping of DataFrame headers to LUSID headers.
+    mappings : dict | None
+        a file containing mapping of DataFrame headers to LUSID headers, defaults to those in
+        config/seed_sample_data.json
     sub_holding_keys : list
         a list of sub-holding keys for grouping.
 
@@ -46,6 +58,9 @@ def seed_data(
 
     """
 
+    if mappings is None:
+        mappings = _default_mappings()
+
     if file_type == "DataFrame" and isinstance(transaction_file, pd.DataFrame):
         data_frame = transaction_file
 
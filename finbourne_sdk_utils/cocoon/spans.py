@@ -0,0 +1,271 @@
+import contextlib
+import contextvars
+import itertools
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+
+_span_ids = itertools.count(1)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("cocoon_current_span", default=None)
+
+
+class Span:
+    """
+    A timed phase of work. The attributes describe the work done in the phase e.g. the number of rows, batches or bytes
+    """
+
+    __slots__ = ("name", "span_id", "parent_id", "start", "begin", "duration", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: int | None = None, **attributes):
+        self.name = name
+        self.span_id = next(_span_ids)
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.begin = time.perf_counter()
+        self.duration = None
+        self.attributes: Dict[str, Any] = attributes
+        self.error = None
+
+    def set(self, **attributes) -> "Span":
+        """
+        Adds attributes to the span
+
+        Parameters
+        ----------
+        attributes
+            The attributes to add, replacing any existing attributes with the same name
+
+        Returns
+        -------
+        Span
+            The span
+        """
+        self.attributes.update(attributes)
+        return self
+
+    def to_dict(self) -> dict:
+        """
+        Returns the span as a JSON serialisable dictionary
+
+        Returns
+        -------
+        dict
+            The name, ids, start time (seconds since the epoch), duration (seconds), error and attributes of the span
+        """
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class LoggingSpanSink:
+    """
+    Writes each completed span to a logger
+    """
+
+    def __init__(self, logger: logging.Logger | None = None, level: int = logging.INFO):
+        self.logger = logger or logging.getLogger("finbourne_sdk_utils.spans")
+        self.level = level
+
+    def emit(self, span: Span) -> None:
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(
+                self.level,
+                "%s took %.3fs %s",
+                span.name,
+                span.duration,
+                " ".join(f"{key}={value}" for key, value in span.attributes.items()),
+            )
+
+
+class JsonLinesSpanSink:
+    """
+    Writes each completed span as a line of JSON to a file path or an open file
+    """
+
+    def __init__(self, file):
+        self.lock = threading.Lock()
+        self.owned = isinstance(file, str)
+        self.file = open(file, "a") if self.owned else file
+
+    def emit(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+
+    def close(self) -> None:
+        if self.owned:
+            self.file.close()
+
+
+class InMemorySpanSink:
+    """
+    Keeps each completed span in a list, useful for tests and for summarising a load once it has completed
+    """
+
+    def __init__(self):
+        self.spans = []
+
+    def emit(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        Summarises the spans by name
+
+        Returns
+        -------
+        Dict[str, dict]
+            The count and total duration of the spans with each name, along with the total of each numeric attribute
+        """
+        summary: Dict[str, dict] = {}
+        for span in self.spans:
+            totals = summary.setdefault(span.name, {"count": 0, "duration": 0.0})
+            totals["count"] += 1
+            totals["duration"] += span.duration or 0.0
+            for key, value in span.attributes.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    totals[key] = totals.get(key, 0) + value
+        return summary
+
+
+class OpenTelemetrySpanSink:
+    """
+    Forwards each completed span to an OpenTelemetry style tracer, anything with a start_span(name, start_time,
+    attributes) method returning a span with an end(end_time) method. The spans are created once complete so they are
+    not nested under one another in the tracer, the span and parent ids are included as attributes instead
+    """
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    def emit(self, span: Span) -> None:
+        attributes = {
+            key: value if isinstance(value, (str, bool, int, float)) else str(value)
+            for key, value in span.attributes.items()
+        }
+        attributes["cocoon.span_id"] = span.span_id
+        if span.parent_id is not None:
+            attributes["cocoon.parent_id"] = span.parent_id
+        if span.error is not None:
+            attributes["error"] = span.error
+
+        start_ns = int(span.start * 1e9)
+        otel_span = self.tracer.start_span(span.name, start_time=start_ns, attributes=attributes)
+        otel_span.end(end_time=start_ns + int((span.duration or 0.0) * 1e9))
+
+
+class _NullSpan:
+    """
+    Stands in for a span when there is no sink so that attributes can always be set
+    """
+
+    def set(self, **attributes) -> "_NullSpan":
+        return self
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class SpanRecorder:
+    """
+    Times phases of work as spans and passes each completed span to a sink. Spans opened inside another span, including
+    inside asyncio tasks started within it, record it as their parent. A profiler, such as the LoadProfiler from
+    cocoon.profiling, is told as each span starts and finishes. A recorder without a sink or profiler does no work
+    """
+
+    def __init__(self, sink=None, profiler=None):
+        self.sink = sink
+        self.profiler = profiler
+
+    @property
+    def enabled(self) -> bool:
+        return self.sink is not None or self.profiler is not None
+
+    def start(self, name: str, **attributes):
+        """
+        Starts a span without making it the parent of the spans which follow, for work which overlaps other work
+        e.g. requests left running in a thread pool. The span must be passed to finish once the work is complete
+
+        Parameters
+        ----------
+        name : str
+            The name of the phase
+        attributes
+            Attributes to start the span with
+
+        Returns
+        -------
+        Span | _NullSpan
+            The span
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        parent = _current_span.get()
+        span = Span(name, parent_id=None if parent is None else parent.span_id, **attributes)
+        if self.profiler is not None:
+            self.profiler.phase_started(span)
+        return span
+
+    def finish(self, span, error: BaseException | None = None) -> None:
+        """
+        Completes a span returned by start and passes it to the sink
+
+        Parameters
+        ----------
+        span : Span | _NullSpan
+            The span to complete
+        error : BaseException | None
+            The exception which ended the work, if any
+        """
+        if not self.enabled or not isinstance(span, Span):
+            return
+        span.duration = time.perf_counter() - span.begin
+        if error is not None:
+            span.error = type(error).__name__
+        if self.profiler is not None:
+            self.profiler.phase_finished(span)
+        if self.sink is not None:
+            self.sink.emit(span)
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Times the body of the with statement as a span
+
+        Parameters
+        ----------
+        name : str
+            The name of the phase e.g. validation, upload
+        attributes
+            Attributes to start the span with, more can be added with Span.set
+
+        Returns
+        -------
+        Span | _NullSpan
+            The span
+        """
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+
+        span = self.start(name, **attributes)
+        token = _current_span.set(span)
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current_span.reset(token)
+            self.finish(span, error)
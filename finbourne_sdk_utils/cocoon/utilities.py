@@ -1,5 +1,6 @@
 import argparse
 import copy
+import io
 import os
 import uuid
 import re
@@ -959,19 +960,24 @@ def load_json_file(file_path: str | Path) -> dict:
 
 
 @checkargs
-def load_data_to_df_and_detect_delimiter(args: dict) -> pd.DataFrame:
+def load_data_to_df_and_detect_delimiter(args: dict) -> pd.DataFrame | typing.Iterator[pd.DataFrame]:
     """
     This function loads data from given file path and converts it into a pandas DataFrame
 
+    The data is parsed with the C engine by default. Any footer is excluded by finding where it starts with a scan of
+    the end of the file and only reading up to there, the python engine is only used if this is not possible.
+
     Parameters
     ----------
     args : dict
-        Arguments parsed in from command line, containing args["file_path"]
+        Arguments parsed in from command line, containing args["file_path"]. Optionally containing args["engine"],
+        the pandas engine to parse the data with ("c" or "pyarrow") and args["chunksize"], the number of rows to
+        return in each chunk
 
     Returns
     -------
     pd.DataFrame : pd.dataframe
-        DataFrame containing data
+        DataFrame containing data, or an iterator of DataFrames if a chunksize is provided
     """
     if not os.path.exists(args["file_path"]):
         raise OSError(f"file path {args['file_path']} does not exist")
@@ -998,15 +1004,140 @@ def load_data_to_df_and_detect_delimiter(args: dict) -> pd.DataFrame:
                 )
                 raise ValueError(err)
 
-    with open(args["file_path"], "r") as read_file:
-        # read data from lines specified at command line by num_header and num_footer
-        return pd.read_csv(
-            args["file_path"],
-            delimiter=args["delimiter"],
-            header=args["num_header"],
-            skipfooter=args["num_footer"],
-            engine="python",
-        )
+    engine = args.get("engine") or "c"
+    chunksize = args.get("chunksize")
+    num_footer = args.get("num_footer") or 0
+
+    read_file = open(args["file_path"], "rb")
+    data = read_file
+
+    # Rather than have the python engine skip the footer, only read the file up to where the footer starts
+    if num_footer > 0:
+        footer_offset = _find_footer_offset(read_file, num_footer)
+        read_file.seek(0)
+        if footer_offset is None:
+            engine = "python"
+        else:
+            data = io.BufferedReader(_ByteRangeReader(read_file, footer_offset))
+
+    read_csv_kwargs = {
+        "delimiter": args["delimiter"],
+        "header": args["num_header"],
+        "chunksize": chunksize,
+    }
+
+    try:
+        if engine == "python":
+            result = pd.read_csv(
+                read_file, skipfooter=num_footer, engine="python", **read_csv_kwargs
+            )
+        else:
+            try:
+                result = pd.read_csv(data, engine=engine, **read_csv_kwargs)
+            except (ValueError, ImportError, pd.errors.ParserError) as e:
+                # e.g. a delimiter or option the engine does not support, or pyarrow not being installed
+                logging.warning(
+                    f"Unable to parse {args['file_path']} with the {engine} engine, using python engine: {e}"
+                )
+                read_file.seek(0)
+                result = pd.read_csv(
+                    read_file, skipfooter=num_footer, engine="python", **read_csv_kwargs
+                )
+    except Exception:
+        read_file.close()
+        raise
+
+    if chunksize is None:
+        read_file.close()
+        return result
+
+    # The file needs to remain open while the chunks are read, so it is closed once they have all been read
+    return _close_after_chunks(result, read_file)
+
+
+def _close_after_chunks(chunks, read_file: typing.BinaryIO) -> typing.Iterator[pd.DataFrame]:
+    """
+    Yields the chunks read from a file and closes the reader and the file once they have all been read, or the
+    iteration is abandoned and the generator is closed
+
+    Parameters
+    ----------
+    chunks : pd.io.parsers.TextFileReader
+        The reader returned by pd.read_csv with a chunksize
+    read_file : typing.BinaryIO
+        The file the chunks are read from
+
+    Returns
+    -------
+    typing.Iterator[pd.DataFrame]
+        The chunks of the file
+    """
+    try:
+        yield from chunks
+    finally:
+        chunks.close()
+        read_file.close()
+
+
+def _find_footer_offset(read_file: typing.BinaryIO, num_footer: int, block_size: int = 65536) -> int | None:
+    """
+    Finds the byte offset at which the footer of a file starts by scanning backwards from the end of the file
+
+    Parameters
+    ----------
+    read_file : typing.BinaryIO
+        The file opened in binary mode
+    num_footer : int
+        The number of lines in the footer
+    block_size : int
+        The number of bytes to read from the end of the file at a time
+
+    Returns
+    -------
+    int | None
+        The offset of the first byte of the footer, or None if the file has no more lines than the footer
+    """
+
+    file_size = read_file.seek(0, os.SEEK_END)
+    tail_size = 0
+
+    while True:
+        tail_size = min(file_size, tail_size + block_size)
+        read_file.seek(file_size - tail_size)
+        tail = read_file.read(tail_size)
+
+        # The line terminator of the last line does not start another line
+        end = len(tail) - 1 if tail.endswith(b"\n") else len(tail)
+
+        for _ in range(num_footer):
+            end = tail.rfind(b"\n", 0, end)
+            if end == -1:
+                break
+
+        if end != -1:
+            return file_size - tail_size + end + 1
+
+        if tail_size == file_size:
+            return None
+
+
+class _ByteRangeReader(io.RawIOBase):
+    """
+    A readable stream over a binary file which stops at a given offset
+    """
+
+    def __init__(self, raw: typing.BinaryIO, end: int):
+        self._raw = raw
+        self._end = end
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        remaining = self._end - self._raw.tell()
+        if remaining <= 0:
+            return 0
+        return self._raw.readinto(memoryview(buffer)[:remaining])  # type: ignore[attr-defined]
 
 
 def get_delimiter(sample_string: str):
@@ -1148,6 +1279,28 @@ def parse_args(args: list[str] | None = None):
     return vars(ap.parse_args(args=args)), ap
 
 
+def _describe_rows(rows: pd.Index, limit: int = 5) -> str:
+    """
+    Describes rows for a log message by their number and the first few of their indices, rather than listing every
+    index of a large DataFrame
+
+    Parameters
+    ----------
+    rows : pd.Index
+        The indices of the rows
+    limit : int
+        The number of indices to include
+
+    Returns
+    -------
+    str
+        e.g. "rows [3, 7]" or "1200 rows, the first at [3, 7, 8, 10, 11]"
+    """
+    if len(rows) <= limit:
+        return f"rows {list(rows)}"
+    return f"{len(rows)} rows, the first at {list(rows[:limit])}"
+
+
 def scale_quote_of_type(
     df: pd.DataFrame, mapping: dict, file_type: str = "quotes"
 ) -> tuple[pd.DataFrame, dict]:
@@ -1158,6 +1311,9 @@ def scale_quote_of_type(
     a scale factor specified in the mapping, if they can be identified using another field. An example usage of this
     is processing of a quotes file containing a mixture of equities prices as GBP and GBp.
 
+    Several types can be scaled at once by providing "scale_factors", a dictionary of scale factors keyed by the type
+    code e.g. {"GBp": 0.01, "ZAc": 0.01, "ILA": 0.01}, in place of or as well as "type_code" and "scale_factor".
+
     Parameters
     ----------
     df : pd.DataFrame
@@ -1175,34 +1331,38 @@ def scale_quote_of_type(
         mapping updated with "metric_value.value" updated to be "__adjusted_quotes"
     """
 
-    price_col = mapping[file_type]["quote_scalar"]["price"]
-    type_col = mapping[file_type]["quote_scalar"]["type"]
-    type_code = mapping[file_type]["quote_scalar"]["type_code"]
-    scale_factor = mapping[file_type]["quote_scalar"]["scale_factor"]
+    quote_scalar = mapping[file_type]["quote_scalar"]
+    price_col = quote_scalar["price"]
+    type_col = quote_scalar["type"]
+
+    # Collect the scale factor to use for each type code
+    scale_factors = dict(quote_scalar.get("scale_factors", {}))
+    if "type_code" in quote_scalar:
+        scale_factors[quote_scalar["type_code"]] = quote_scalar["scale_factor"]
 
     for col in [price_col, type_col]:
         if col not in df.columns:
             logging.error(f"column {col} does not exist in quotes DataFrame.")
             raise KeyError(f"column {col} does not exist in quotes DataFrame.")
 
-    df["__adjusted_quote"] = None
+    prices = df[price_col].to_numpy(dtype=float)
+    # Rows without a matching type code have no scale factor (NaN) and keep their price
+    factors = df[type_col].map(scale_factors).to_numpy(dtype=float)
 
-    for index, row in df.iterrows():
-        if np.isnan(row[price_col]) and row[type_col] == type_code:
-            logging.warning(
-                f"Could not adjust price at row {index} because it contains no price value"
-            )
-            continue
-        elif np.isnan(row[price_col]):
-            continue
+    missing_price = np.isnan(prices)
+    to_scale = ~np.isnan(factors)
 
-        __adjusted_quote = (
-            row[price_col] * scale_factor
-            if row[type_col] == type_code
-            else row[price_col]
+    unadjusted = missing_price & to_scale
+    if unadjusted.any():
+        logging.warning(
+            f"Could not adjust price at {_describe_rows(df.index[unadjusted])} because they contain no price value"
         )
 
-        df.at[index, "__adjusted_quote"] = __adjusted_quote
+    adjusted_quote = np.where(to_scale, prices * factors, prices).astype(object)
+    adjusted_quote[missing_price] = None
+    df["__adjusted_quote"] = adjusted_quote
+
+    if not missing_price.all():
         mapping[file_type]["required"]["metric_value.value"] = "__adjusted_quote"
     return df, mapping
 
@@ -1235,27 +1395,71 @@ def identify_cash_items(
     """
 
     cash_flag_specification = mappings["cash_flag"]
+    cash_identifiers = cash_flag_specification["cash_identifiers"]
+    implicit_column = cash_flag_specification.get("implicit")
+
     if not remove_cash_items:
-        dataframe["__currency_identifier_for_LUSID"] = None
         mappings[file_type]["identifier_mapping"][
             "Currency"
         ] = "__currency_identifier_for_LUSID"
 
-    rm_index = []
-    for index, row in dataframe.iterrows():
-        for column in cash_flag_specification["cash_identifiers"].keys():
-            if row[column] in cash_flag_specification["cash_identifiers"][column]:
-                if remove_cash_items:
-                    rm_index.append(index)
-                else:
-                    dataframe.at[
-                        index, "__currency_identifier_for_LUSID"
-                    ] = populate_currency_identifier_for_LUSID(
-                        row, column, cash_flag_specification
-                    )
-                break
+    is_cash = np.zeros(len(dataframe), dtype=bool)
+    currency_codes = np.full(len(dataframe), None, dtype=object)
+
+    for column, identifiers in cash_identifiers.items():
+        # A row is identified by the first column it matches on, so ignore rows already identified
+        matches = dataframe[column].isin(list(identifiers)).to_numpy() & ~is_cash
+        is_cash |= matches
+
+        if remove_cash_items or not matches.any():
+            continue
+
+        if isinstance(identifiers, dict):
+            logging.debug("Getting currency codes from explicit definition in mapping")
+            column_currency_codes = dataframe.loc[matches, column].map(identifiers)
+            if implicit_column is not None:
+                # Fall back to the implicit currency column where no explicit currency code is defined
+                column_currency_codes = column_currency_codes.where(
+                    column_currency_codes.astype(bool), dataframe.loc[matches, implicit_column]
+                )
+
+        elif isinstance(identifiers, list):
+            if implicit_column is None:
+                err = (
+                    "No cash identifiers were specified as a list, without any explicit currency codes and no "
+                    "'implicit' field containing the name of a column containing currency codes exists. Please "
+                    "reformat cash_flag inside mapping file correctly"
+                )
+                raise ValueError(err)
+            logging.info(
+                "No currency codes explicitly specified, attempting to get implicitly from currency code "
+                "column"
+            )
+            column_currency_codes = dataframe.loc[matches, implicit_column]
+
+        else:
+            logging.error(
+                f"cash_flag not configured correctly. 'cash_identifiers' must be dictionary (explicit) or list "
+                f"(for implicit), but  got {type(identifiers)}"
+            )
+            raise ValueError(
+                f"cash_flag not configured correctly. 'cash_identifiers' must be dictionary (explicit) or "
+                f"list (for implicit), but  got {type(identifiers)}"
+            )
+
+        currency_codes[matches] = column_currency_codes.to_numpy()
+
     if remove_cash_items:
-        dataframe = dataframe.drop(rm_index)
+        return dataframe.loc[~is_cash], mappings
+
+    # Report the cash items for which no currency code could be found
+    unclassified = is_cash & (pd.isna(currency_codes) | (currency_codes == ""))
+    if unclassified.any():
+        logging.warning(
+            f"Could not find a currency code for the cash items at {_describe_rows(dataframe.index[unclassified])}"
+        )
+
+    dataframe["__currency_identifier_for_LUSID"] = currency_codes
 
     return dataframe, mappings
 
@@ -1491,6 +1695,9 @@ def default_fx_forward_model(
     """
     Function that takes 2 rows representing a single forward and merge them into a single transaction
 
+    Legs which can not be paired are excluded and logged as a warning with the reason and the transaction ids, use
+    pair_transaction_legs to also get these back.
+
     Parameters
     ----------
     df : pd.DataFrame
@@ -1524,33 +1731,156 @@ def default_fx_forward_model(
             f"Input transactions have no fx transaction types {fx_code} in column transaction type{t_type}"
         )
 
-    fwds_df = pd.DataFrame(df[df[t_type] == fx_code])
+    fwds_txn_df, orphan_legs_df, mapping_cash_txn = pair_transaction_legs(
+        df, {fx_code: (func_transaction_units, func_total_consideration)}, mapping
+    )
+
+    # Log the legs which have been excluded by why they could not be paired, with the first few of their ids
+    if not orphan_legs_df.empty:
+        t_id = mapping["transactions"]["required"]["transaction_id"]
+        for reason, orphans in orphan_legs_df.groupby("__orphan_reason"):
+            logging.warning(
+                f"{len(orphans)} {reason} legs of transactions of type {fx_code} could not be paired and have been "
+                f"excluded, including those of the transactions {orphans[t_id].unique()[:5].tolist()}"
+            )
+
+    return fwds_txn_df, mapping_cash_txn
+
 
-    transaction_units_df = fwds_df[func_transaction_units]
-    total_consideration_df = fwds_df[func_total_consideration]
+def pair_transaction_legs(
+    transactions: pd.DataFrame | typing.Iterable[pd.DataFrame],
+    leg_rules: dict,
+    mapping: dict,
+    transaction_units_suffix: str = "_txn",
+    total_consideration_suffix: str = "_tc",
+) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """
+    Pairs the legs of multi-leg transactions e.g. FX forwards, FX swaps and FX spots, merging each pair of legs which
+    share a transaction id and type into a single transaction
+
+    The transactions can be provided as a single DataFrame or as an iterable of DataFrames e.g. the chunks from
+    pd.read_csv(..., chunksize=...), in which case the legs still waiting for their pair and the keys of the
+    transactions already paired are held between chunks. The keys of the paired transactions are not bounded, they
+    grow with the number of transactions paired although they are far smaller than the legs themselves.
+
+    The legs of each transaction are taken in the order they arrive. The first transaction units leg is paired with
+    the first total consideration leg and any further leg of the transaction is a duplicate, so the result is the
+    same however the transactions are split into chunks.
 
+    Parameters
+    ----------
+    transactions : pd.DataFrame | typing.Iterable[pd.DataFrame]
+        DataFrame or chunks of a DataFrame containing transactions data
+    leg_rules : dict
+        The transaction types to pair, each with a tuple of two functions. The first evaluates to true where a row
+        is the leg containing the transaction units and the second where a row is the leg containing the total
+        consideration e.g. {"FwdFxBuy": (lambda x: x["leg"] == "by", lambda x: x["leg"] == "sl")}
+    mapping : dict
+        mapping for the transactions
+    transaction_units_suffix : str
+        Suffix appended to the transaction units leg fields
+    total_consideration_suffix : str
+        Suffix appended to the total consideration leg fields
+
+    Returns
+    -------
+    paired_df : pd.DataFrame
+        DataFrame containing each pair of legs merged into a single row
+    orphan_legs_df : pd.DataFrame
+        DataFrame containing the legs which could not be paired with the reason in the "__orphan_reason" column,
+        one of "unclassified", "duplicate" or "unpaired"
+    mapping_paired : dict
+        updated mapping dictionary for paired_df
+    """
+
+    t_type = mapping["transactions"]["required"]["type"]
     t_id = mapping["transactions"]["required"]["transaction_id"]
+    keys = [t_id, t_type]
+
+    if isinstance(transactions, pd.DataFrame):
+        transactions = [transactions]
 
-    transaction_units_suffix = "_txn"
-    total_consideration_suffix = "_tc"
     logging.info(
-        f"merging buy and sell legs of FX trades and suffixing with {[transaction_units_suffix, total_consideration_suffix]}"
+        f"merging legs of transactions of types {list(leg_rules.keys())} and suffixing with "
+        f"{[transaction_units_suffix, total_consideration_suffix]}"
     )
-    fwds_txn_df = pd.merge(
-        transaction_units_df,
-        total_consideration_df,
-        how="outer",
-        on=[t_id, t_type],
-        suffixes=(transaction_units_suffix, total_consideration_suffix),
+
+    paired = []
+    orphans = []
+    # The legs which are waiting for their pair and the keys of the transactions already paired, this is all
+    # that is carried between chunks
+    open_legs = None
+    completed_keys = set()
+
+    for chunk in transactions:
+        chunk = chunk.loc[chunk[t_type].isin(list(leg_rules.keys()))]
+
+        # Label each leg as the transaction units or the total consideration leg using the rules for its type
+        leg = np.full(len(chunk), None, dtype=object)
+        for transaction_code, (func_transaction_units, func_total_consideration) in leg_rules.items():
+            of_type = (chunk[t_type] == transaction_code).to_numpy()
+            if not of_type.any():
+                continue
+            is_total_consideration = of_type & np.asarray(func_total_consideration(chunk), dtype=bool)
+            is_transaction_units = of_type & np.asarray(func_transaction_units(chunk), dtype=bool)
+            leg[is_total_consideration] = "tc"
+            leg[is_transaction_units] = "txn"
+
+        legs = chunk.assign(__leg=leg)
+
+        unclassified = legs["__leg"].isna()
+        orphans.append(legs.loc[unclassified].assign(__orphan_reason="unclassified"))
+
+        legs = legs.loc[~unclassified]
+        if open_legs is not None:
+            legs = pd.concat([open_legs, legs])
+
+        # Only the first of each leg of a transaction is paired, any later leg is a duplicate including one which
+        # arrives after its transaction has already been paired. The open legs arrived first so are kept over
+        # those in this chunk
+        duplicated = legs.duplicated(keys + ["__leg"], keep="first").to_numpy()
+        if completed_keys:
+            leg_keys = pd.MultiIndex.from_frame(legs[keys])
+            duplicated |= np.fromiter((key in completed_keys for key in leg_keys), dtype=bool, count=len(leg_keys))
+        orphans.append(legs.loc[duplicated].assign(__orphan_reason="duplicate"))
+        legs = legs.loc[~duplicated]
+
+        is_transaction_units = (legs["__leg"] == "txn").to_numpy()
+        transaction_units_legs = legs.loc[is_transaction_units].drop(columns="__leg")
+        total_consideration_legs = legs.loc[~is_transaction_units].drop(columns="__leg")
+
+        # Join the legs using a hash join on the transaction id and type, the keys are unique on each side
+        paired.append(
+            pd.merge(
+                transaction_units_legs,
+                total_consideration_legs,
+                how="inner",
+                on=keys,
+                suffixes=(transaction_units_suffix, total_consideration_suffix),
+            )
+        )
+
+        # Legs still waiting for their pair are carried over to the next chunk
+        leg_keys = pd.MultiIndex.from_frame(legs[keys])
+        paired_keys = pd.MultiIndex.from_frame(paired[-1][keys])
+        open_legs = legs.loc[~leg_keys.isin(paired_keys)]
+        completed_keys.update(paired_keys)
+
+    if open_legs is not None:
+        orphans.append(open_legs.drop(columns="__leg").assign(__orphan_reason="unpaired"))
+
+    paired_df = pd.concat(paired, ignore_index=True) if paired else pd.DataFrame()
+    orphan_legs_df = (
+        pd.concat(orphans).drop(columns="__leg", errors="ignore") if orphans else pd.DataFrame()
     )
 
-    mapping_cash_txn = remap_after_merge(
+    mapping_paired = remap_after_merge(
         mapping,
         transaction_units_suffix=transaction_units_suffix,
         total_consideration_suffix=total_consideration_suffix,
     )
 
-    return fwds_txn_df, mapping_cash_txn
+    return paired_df, orphan_legs_df, mapping_paired
 
 
 def remap_after_merge(
@@ -1 +1,21 @@
-from finbourne_sdk_utils.extract.group_holdings import get_holdings_for_group as get_holdings_for_group
+from typing import TYPE_CHECKING
+
+from finbourne_sdk_utils._lazy import attach
+
+# The functions are imported from group_holdings when first used, see finbourne_sdk_utils._lazy
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submodules=["group_holdings"],
+    attributes={
+        "get_holdings_for_group": "finbourne_sdk_utils.extract.group_holdings",
+        "get_holdings_time_series_for_group": "finbourne_sdk_utils.extract.group_holdings",
+        "iter_holdings_for_group": "finbourne_sdk_utils.extract.group_holdings",
+        "stream_holdings_for_group": "finbourne_sdk_utils.extract.group_holdings",
+    },
+)
+
+if TYPE_CHECKING:
+    from finbourne_sdk_utils.extract.group_holdings import get_holdings_for_group as get_holdings_for_group
+    from finbourne_sdk_utils.extract.group_holdings import get_holdings_time_series_for_group as get_holdings_time_series_for_group
+    from finbourne_sdk_utils.extract.group_holdings import iter_holdings_for_group as iter_holdings_for_group
+    from finbourne_sdk_utils.extract.group_holdings import stream_holdings_for_group as stream_holdings_for_group
@@ -1,20 +1,70 @@
 from finbourne_sdk_utils.cocoon.async_tools import run_in_executor, ThreadPool
 import finbourne.sdk.services.lusid as lusid
 from finbourne.sdk.extensions import SyncApiClientFactory
+from finbourne.sdk.exceptions import ApiException
 import asyncio
-from functools import reduce
-from typing import Dict, List
+import contextlib
+import functools
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
 from finbourne_sdk_utils.cocoon.async_tools import (
+    gather_with_concurrency,
     start_event_loop_new_thread,
     stop_event_loop_new_thread,
 )
+from finbourne_sdk_utils.cocoon.spans import SpanRecorder
+
+
+def _holdings_to_data_frame(holdings: List[lusid.PortfolioHolding]) -> pd.DataFrame:
+    """
+    This function collects the fields of a list of PortfolioHolding that are used to join holdings into columns
+
+    Parameters
+    ----------
+    holdings : List[lusid.PortfolioHolding]
+        The holdings to collect
+
+    Returns
+    -------
+    pd.DataFrame
+        A DataFrame with a row per holding, the "position" column is the holding's index in the list
+    """
+
+    return pd.DataFrame(
+        {
+            "instrument_uid": [holding.instrument_uid for holding in holdings],
+            "holding_type": [holding.holding_type for holding in holdings],
+            "units": [holding.units for holding in holdings],
+            "settled_units": [holding.settled_units for holding in holdings],
+            "cost.amount": [holding.cost.amount for holding in holdings],
+            "cost.currency": [holding.cost.currency for holding in holdings],
+            "cost_portfolio_ccy.amount": [holding.cost_portfolio_ccy.amount for holding in holdings],
+            "cost_portfolio_ccy.currency": [holding.cost_portfolio_ccy.currency for holding in holdings],
+            "position": np.arange(len(holdings)),
+        }
+    )
+
+
+def _instrument_properties(holding: lusid.PortfolioHolding) -> Dict[str, lusid.ModelProperty]:
+    # Only instrument properties can be carried over to the joined holdings
+    return {
+        property_key: value
+        for property_key, value in (holding.properties or {}).items()
+        if value.key.split("/")[0] == "Instrument"
+    }
 
 
 def _join_holdings(
     holdings_to_join: Dict[str, List[lusid.PortfolioHolding]],
     group_by_portfolio: bool = False,
     dict_key="GroupHoldings",
-) -> Dict[str, List[lusid.PortfolioHolding]]:
+    as_data_frame: bool = False,
+) -> Dict[str, List[lusid.PortfolioHolding] | pd.DataFrame]:
     """
     This function joins the holdings together from multiple Portfolios into a single list of PortfolioHolding
 
@@ -37,77 +87,156 @@ def _join_holdings(
     dict_key : str
         The key to use for the merged holdings, usually the scope/code combination of the Portfolio Group
 
+    as_data_frame : bool
+        Whether to return each set of holdings as a DataFrame rather than a list of PortfolioHolding
+
     Returns
     -------
-    holdings_joined : Dict[str, List[lusid.PortfolioHolding]
+    holdings_joined : Dict[str, List[lusid.PortfolioHolding] | pd.DataFrame]
         The joined dictionary of a list of PortfolioHolding which either has a single key for the Portfolio
         Group or a key for each Portfolio in the group
     """
 
     # If each portfolio should remain separated
     if group_by_portfolio:
+        if as_data_frame:
+            return {
+                key: _holdings_data_frame(holdings, _holdings_to_data_frame(holdings))
+                for key, holdings in holdings_to_join.items()
+            }
         return holdings_to_join
 
-    # Flatten the holdings into a single list
+    # Flatten the holdings into a single list and collect their fields into columns
     all_holdings = [
         holding
         for holding_list in holdings_to_join.values()
         for holding in holding_list
     ]
-    # Initialise a dictionary to hold the positions against a key
-    all_holdings_keyed = {}
-    # Construct the keyed dictionary using the LUSID instrument id, holding type and currency as the unique key for each holding
-    [
-        all_holdings_keyed.setdefault(
-            f"{holding.instrument_uid}:{holding.holding_type}:{holding.cost.currency}",
-            [],
-        ).append(holding)
-        for holding in all_holdings
-    ]
+    holdings_df = _holdings_to_data_frame(all_holdings)
 
-    # Initialise a list to hold the joined holdings
-    joined_holdings = []
-
-    # Reduce the list of holdings against each key to a single holding
-    for key, value in all_holdings_keyed.items():
-        joined_holdings.append(
-            lusid.PortfolioHolding(
-                # Use the instrument_uid from the key
-                instrument_uid=key.split(":")[0],
-                # Use the holding type from the key
-                holding_type=key.split(":")[1],
-                # Add the metric fields together
-                units=reduce((lambda x, y: x + y), list(map(lambda x: x.units, value))),
-                settled_units=reduce(
-                    (lambda x, y: x + y), list(map(lambda x: x.settled_units, value))
-                ),
-                cost=lusid.CurrencyAndAmount(
-                    # Use the currency form the key
-                    currency=key.split(":")[2],
-                    amount=reduce(
-                        (lambda x, y: x + y), list(map(lambda x: x.cost.amount, value))
-                    ),
-                ),
-                cost_portfolio_ccy=lusid.CurrencyAndAmount(
-                    # Use the first currency, these holdings could be from different portfolios, so the validity of this is questionable
-                    currency=value[0].cost_portfolio_ccy.currency,
-                    amount=reduce(
-                        (lambda x, y: x + y),
-                        list(map(lambda x: x.cost_portfolio_ccy.amount, value)),
-                    ),
-                ),
-                # Takes the properties from the first value, only allows instrument properties
-                properties={
-                    property_key: value
-                    for property_key, value in value[0].properties.items()
-                    if value.key.split("/")[0] == "Instrument"
-                },
-            )
+    # Sum the metric fields of the holdings with the same LUSID instrument id, holding type and currency, keeping the
+    # first holding's portfolio currency and properties. These holdings could be from different portfolios, so the
+    # validity of the portfolio currency is questionable
+    joined = (
+        holdings_df.groupby(
+            ["instrument_uid", "holding_type", "cost.currency"], sort=False, dropna=False
         )
+        .agg(
+            {
+                "units": "sum",
+                "settled_units": "sum",
+                "cost.amount": "sum",
+                "cost_portfolio_ccy.amount": "sum",
+                "cost_portfolio_ccy.currency": "first",
+                "position": "first",
+            }
+        )
+        .reset_index()
+    )
+
+    if as_data_frame:
+        return {dict_key: _holdings_data_frame(all_holdings, joined)}
+
+    joined_holdings = _portfolio_holdings_from_joined(all_holdings, joined)
 
     return {dict_key: joined_holdings}
 
 
+def _portfolio_holdings_from_joined(
+    holdings: List[lusid.PortfolioHolding], holdings_df: pd.DataFrame
+) -> List[lusid.PortfolioHolding]:
+    """
+    This function builds a PortfolioHolding for each row of joined holdings, taking the instrument properties from the
+    holding at each row's position
+
+    Parameters
+    ----------
+    holdings : List[lusid.PortfolioHolding]
+        The holdings which the positions refer to
+    holdings_df : pd.DataFrame
+        The joined holdings
+
+    Returns
+    -------
+    List[lusid.PortfolioHolding]
+        The joined holdings
+    """
+
+    return [
+        lusid.PortfolioHolding(
+            instrument_uid=instrument_uid,
+            holding_type=holding_type,
+            units=units,
+            settled_units=settled_units,
+            cost=lusid.CurrencyAndAmount(currency=currency, amount=amount),
+            cost_portfolio_ccy=lusid.CurrencyAndAmount(
+                currency=portfolio_currency, amount=portfolio_amount
+            ),
+            properties=_instrument_properties(holdings[position]),
+        )
+        for (
+            instrument_uid,
+            holding_type,
+            currency,
+            units,
+            settled_units,
+            amount,
+            portfolio_amount,
+            portfolio_currency,
+            position,
+        ) in zip(
+            *(
+                holdings_df[column].tolist()
+                for column in [
+                    "instrument_uid",
+                    "holding_type",
+                    "cost.currency",
+                    "units",
+                    "settled_units",
+                    "cost.amount",
+                    "cost_portfolio_ccy.amount",
+                    "cost_portfolio_ccy.currency",
+                    "position",
+                ]
+            )
+        )
+    ]
+
+
+def _holdings_data_frame(holdings: List[lusid.PortfolioHolding], holdings_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    This function adds the instrument properties of the holdings at each row's position as "P:" prefixed columns
+
+    Parameters
+    ----------
+    holdings : List[lusid.PortfolioHolding]
+        The holdings which the positions refer to
+    holdings_df : pd.DataFrame
+        The holdings collected by _holdings_to_data_frame, possibly joined
+
+    Returns
+    -------
+    pd.DataFrame
+        The holdings without their positions and with a column for each instrument property
+    """
+
+    properties = [_instrument_properties(holdings[position]) for position in holdings_df["position"].tolist()]
+    property_keys = list(dict.fromkeys(key for holding_properties in properties for key in holding_properties))
+
+    def property_value(value):
+        if value is None:
+            return None
+        return value.label_value if value.label_value is not None else value.metric_value.value
+
+    holdings_df = holdings_df.drop(columns="position")
+    for key in property_keys:
+        holdings_df[f"P:{key}"] = [
+            property_value(holding_properties[key].value) if key in holding_properties else None
+            for holding_properties in properties
+        ]
+    return holdings_df
+
+
 @run_in_executor
 def _get_portfolio_group(
     api_factory: SyncApiClientFactory, scope: str, code: str, **kwargs
@@ -208,16 +337,249 @@ def _get_portfolio_holdings(
     return {f"{scope} : {code}": response.values}
 
 
-async def _get_holdings_for_group_recursive(
+@run_in_executor
+def _get_portfolio_group_expansion(
+    api_factory: SyncApiClientFactory, scope: str, code: str, **kwargs
+) -> lusid.ExpandedGroup:
+    """
+    This function gets a Portfolio Group from LUSID with all of its sub-groups expanded.
+
+    Parameters
+    ----------
+    api_factory : SyncApiClientFactory
+        The api factory to use
+    scope : str
+        The scope of the Portfolio Group
+    code : str
+        The code of the Portfolio Group, with the scope this uniquely identifiers the Portfolio Group
+
+    Returns
+    -------
+    response : lusid.ExpandedGroup
+        The expanded Portfolio Group
+
+    Other Parameters
+    ------
+    effective_at : datetime
+        The effective datetime at which to get the Portfolio Group
+    as_at : datetime
+        The as at datetime at which to get the Portfolio Group
+    thread_pool
+        The thread pool to run this function in
+    """
+
+    # Filter out the relevant keyword arguments as the LUSID API will raise an exception if given extras
+    lusid_keyword_arguments = {
+        key: value for key, value in kwargs.items() if key in ["effective_at", "as_at"]
+    }
+
+    # Call LUSID to get the expanded portfolio group
+    response = api_factory.build(lusid.PortfolioGroupsApi).get_portfolio_group_expansion(
+        scope=scope, code=code, **lusid_keyword_arguments
+    )
+
+    return response
+
+
+# A Portfolio Group tree keyed by the (scope, code) of each group, holding the group's Portfolios and sub-groups
+GroupTree = Dict[Tuple[str, str], Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]]
+
+# Group trees resolved at a past as_at and a fixed effective_at can not change, so they are kept for reuse by each
+# api factory
+_group_tree_cache: "weakref.WeakKeyDictionary[SyncApiClientFactory, OrderedDict[tuple, GroupTree]]" = (
+    weakref.WeakKeyDictionary()
+)
+_GROUP_TREE_CACHE_SIZE = 128
+
+# The status returned by LUSID when the expansion endpoint is not supported, any other error is raised as it is
+_EXPANSION_UNSUPPORTED_STATUS = 501
+
+
+def _is_pinned(effective_at, as_at) -> bool:
+    """
+    This function checks whether a Portfolio Group tree read at an effective_at and as_at can no longer change
+
+    Parameters
+    ----------
+    effective_at
+        The effective datetime at which the Portfolio Group is read, None for now
+    as_at
+        The as at datetime at which the Portfolio Group is read, None for now
+
+    Returns
+    -------
+    bool
+        Whether both times are set and the as_at is not in the future
+    """
+
+    if effective_at is None or as_at is None:
+        return False
+    as_at = pd.Timestamp(as_at)
+    if as_at.tzinfo is None:
+        as_at = as_at.tz_localize(timezone.utc)
+    return as_at <= pd.Timestamp.now(tz=timezone.utc)
+
+
+def _add_expanded_group(tree: GroupTree, expanded_group: lusid.ExpandedGroup) -> None:
+    """
+    This function adds an expanded Portfolio Group and all of its expanded sub-groups to a group tree
+
+    Parameters
+    ----------
+    tree : GroupTree
+        The group tree to add to
+    expanded_group : lusid.ExpandedGroup
+        The expanded Portfolio Group
+
+    Returns
+    -------
+    None
+    """
+
+    key = (expanded_group.id.scope, expanded_group.id.code)
+    if key in tree:
+        return
+    tree[key] = (
+        [(portfolio.id.scope, portfolio.id.code) for portfolio in (expanded_group.values or [])],
+        [(sub_group.id.scope, sub_group.id.code) for sub_group in (expanded_group.sub_groups or [])],
+    )
+    for sub_group in expanded_group.sub_groups or []:
+        _add_expanded_group(tree, sub_group)
+
+
+async def _resolve_group_tree(
+    api_factory: SyncApiClientFactory,
+    group_scope: str,
+    group_code: str,
+    max_concurrency: int = 5,
+    **kwargs,
+) -> GroupTree:
+    """
+    This function resolves the whole tree of a Portfolio Group before any holdings are requested. The tree is
+    fetched in a single expanded call where LUSID supports it, otherwise each level of sub-groups is fetched
+    concurrently. Trees resolved at a fixed effective_at and a past as_at are cached, as their contents can not change.
+
+    Parameters
+    ----------
+    api_factory : SyncApiClientFactory
+        The api factory to use
+    group_scope : str
+        The scope of the Portfolio Group
+    group_code : str
+        The code of the Portfolio Group
+    max_concurrency : int
+        The maximum number of Portfolio Groups to request at once
+
+    Returns
+    -------
+    tree : GroupTree
+        The Portfolios and sub-groups of each group in the tree
+
+    Other Parameters
+    ------
+    effective_at : datetime
+        The effective datetime at which to get the Portfolio Group
+    as_at : datetime
+        The as at datetime at which to get the Portfolio Group
+    thread_pool
+        The thread pool to run this function in
+    """
+
+    pinned = _is_pinned(kwargs.get("effective_at"), kwargs.get("as_at"))
+    cache = _group_tree_cache.setdefault(api_factory, OrderedDict())
+    cache_key = (group_scope, group_code, str(kwargs.get("effective_at")), str(kwargs.get("as_at")))
+    if pinned and cache_key in cache:
+        cache.move_to_end(cache_key)
+        return cache[cache_key]
+
+    tree: GroupTree = {}
+    try:
+        expanded_group = await _get_portfolio_group_expansion(  # type: ignore[misc]
+            api_factory, group_scope, group_code, **kwargs
+        )
+        _add_expanded_group(tree, expanded_group)
+    except ApiException as e:
+        if e.status != _EXPANSION_UNSUPPORTED_STATUS:
+            raise
+        # Fall back to discovering the tree a level at a time, each group is only requested once
+        tree = {}
+        level = [(group_scope, group_code)]
+        while len(level) > 0:
+            groups = await gather_with_concurrency(
+                max_concurrency,
+                [
+                    functools.partial(_get_portfolio_group, api_factory, scope, code, **kwargs)
+                    for scope, code in level
+                ],
+            )
+            next_level = []
+            for key, group in zip(level, groups):
+                sub_groups = [(sub_group.scope, sub_group.code) for sub_group in (group.sub_groups or [])]
+                tree[key] = (
+                    [(portfolio.scope, portfolio.code) for portfolio in (group.portfolios or [])],
+                    sub_groups,
+                )
+                next_level.extend(
+                    sub_group for sub_group in sub_groups if sub_group not in tree and sub_group not in next_level
+                )
+            level = next_level
+
+    if pinned:
+        cache[cache_key] = tree
+        if len(cache) > _GROUP_TREE_CACHE_SIZE:
+            cache.popitem(last=False)
+
+    return tree
+
+
+def _unique_portfolios(tree: GroupTree, root: Tuple[str, str]) -> List[Tuple[str, str]]:
+    """
+    This function lists each Portfolio reachable from the root of a group tree once. The Portfolios of the
+    sub-groups come before the group's own Portfolios, which is the order in which holdings have always been joined.
+
+    Parameters
+    ----------
+    tree : GroupTree
+        The group tree
+    root : Tuple[str, str]
+        The (scope, code) of the Portfolio Group at the root of the tree
+
+    Returns
+    -------
+    List[Tuple[str, str]]
+        The (scope, code) of each unique Portfolio
+    """
+
+    portfolios: Dict[Tuple[str, str], None] = {}
+    visited = set()
+
+    def visit(group):
+        if group in visited:
+            return
+        visited.add(group)
+        group_portfolios, sub_groups = tree[group]
+        for sub_group in sub_groups:
+            visit(sub_group)
+        for portfolio in group_portfolios:
+            portfolios.setdefault(portfolio, None)
+
+    visit(root)
+    return list(portfolios)
+
+
+async def _get_holdings_for_group(
     api_factory: SyncApiClientFactory,
     group_scope: str,
     group_code: str,
     group_by_portfolio=False,
+    as_data_frame: bool = False,
+    max_concurrency: int = 5,
+    spans: SpanRecorder | None = None,
     **kwargs,
-) -> Dict[str, List[lusid.PortfolioHolding]]:
+) -> Dict[str, List[lusid.PortfolioHolding] | pd.DataFrame]:
     """
-    This function recursively gets the holdings for a Portfolio Group in LUSID by making a request to get the holdings for
-    each sub-group and portofolio and then joining the results together above the API.
+    This function gets the holdings for a Portfolio Group in LUSID. The whole group tree is resolved first and the
+    holdings of each unique Portfolio in it are then requested exactly once, before being joined together above the API.
 
     Parameters
     ----------
@@ -229,10 +591,16 @@ async def _get_holdings_for_group_recursive(
         The code of the Portfolio Group
     group_by_portfolio : bool
         Whether or not to group the holdings by Portfolio, if False will merge all Holdings together based on Instrument
+    as_data_frame : bool
+        Whether to return the holdings as DataFrames rather than lists of PortfolioHolding
+    max_concurrency : int
+        The maximum number of requests to LUSID to have in flight at once
+    spans : SpanRecorder | None
+        Times each phase of the request, the group resolution, the holdings requests and the join
 
     Returns
     -------
-    Dict[str, List[lusid.PortfolioHolding]]
+    Dict[str, List[lusid.PortfolioHolding] | pd.DataFrame]
         The single set of holdings
 
     Other Parameters
@@ -251,86 +619,282 @@ async def _get_holdings_for_group_recursive(
         The thread pool to run this function in
     """
 
-    # Get the details for the Portfolio Group including its sub-group and Portfolio members
-    response = await _get_portfolio_group(  # type: ignore[misc]
-        api_factory, group_scope, group_code, **kwargs
+    spans = spans or SpanRecorder()
+
+    group_resolution = spans.start("group_resolution", group=f"{group_scope} : {group_code}")
+    tree = await _resolve_group_tree(
+        api_factory, group_scope, group_code, max_concurrency=max_concurrency, **kwargs
     )
-    portfolios = response.portfolios
-    sub_groups = response.sub_groups
+    portfolios = _unique_portfolios(tree, (group_scope, group_code))
+    spans.finish(group_resolution.set(portfolios=len(portfolios)))
 
-    # Get the holdings for each portfolio
-    portfolio_holdings = await asyncio.gather(
-        *[
-            _get_portfolio_holdings(  # type: ignore[arg-type]
-                api_factory=api_factory,
-                scope=portfolio.scope,
-                code=portfolio.code,
-                **kwargs,
+    # Get the holdings for each unique portfolio in the group
+    holdings_requests = spans.start("holdings_requests", portfolios=len(portfolios))
+    portfolio_holdings = await gather_with_concurrency(
+        max_concurrency,
+        [
+            functools.partial(
+                _get_portfolio_holdings, api_factory=api_factory, scope=scope, code=code, **kwargs
             )
-            for portfolio in (portfolios or [])
+            for scope, code in portfolios
         ],
-        return_exceptions=False,
     )
+    spans.finish(holdings_requests)
 
     # Turn the list of dictionaries into a single dictionary where the holdings are keyed by the Portfolio scope : code
     portfolio_holdings_keyed = {k: v for d in portfolio_holdings for k, v in d.items()}
 
     # Join the holdings across all portfolios together
-    joined_portfolio_holdings = _join_holdings(
-        portfolio_holdings_keyed,
-        group_by_portfolio,
-        dict_key=f"{group_scope} : {group_code}",
+    with spans.span("join", as_data_frame=as_data_frame):
+        return _join_holdings(
+            portfolio_holdings_keyed,
+            group_by_portfolio,
+            dict_key=f"{group_scope} : {group_code}",
+            as_data_frame=as_data_frame,
+        )
+
+
+async def iter_holdings_for_group(
+    api_factory: SyncApiClientFactory,
+    group_scope: str,
+    group_code: str,
+    max_concurrency: int = 5,
+    **kwargs,
+):
+    """
+    This function is an asynchronous iterator over the holdings of each unique Portfolio in a Portfolio Group. Each
+    Portfolio's holdings are yielded as soon as they arrive and the next Portfolio is only requested once a slot is
+    free, so at most max_concurrency Portfolios' holdings are held at once.
+
+    Parameters
+    ----------
+    api_factory : SyncApiClientFactory
+        The api factory to use
+    group_scope : str
+        The scope of the Portfolio Group
+    group_code : str
+        The code of the Portfolio Group
+    max_concurrency : int
+        The maximum number of requests to LUSID to have in flight at once
+
+    Returns
+    -------
+    AsyncIterator[Tuple[int, str, List[lusid.PortfolioHolding]]]
+        The index of the Portfolio in the group, which gives the order in which the holdings would be joined, the
+        Portfolio's scope : code and its holdings
+
+    Other Parameters
+    ------
+    effective_at : datetime
+        The effective datetime at which to get the Portfolio Group
+    as_at : datetime
+        The as at datetime at which to get the Portfolio Group
+    filter : str
+        The filter to use to filter the holdings
+    by_taxlots : bool
+        Whether or not to break the holdings down into individual tax lots
+    property_keys : list[str]
+        The list of property keys to decorate onto the holdings, must be from the Instrument domain
+    thread_pool
+        The thread pool to run this function in
+    """
+
+    tree = await _resolve_group_tree(
+        api_factory, group_scope, group_code, max_concurrency=max_concurrency, **kwargs
     )
+    portfolios = iter(enumerate(_unique_portfolios(tree, (group_scope, group_code))))
 
-    # If there aren't any sub-groups return these joined holdings
-    if len(sub_groups or []) == 0:
-        return joined_portfolio_holdings
-    # Otherwise get the joined holdings for the sub-groups
-    else:
-        sub_group_holdings = await asyncio.gather(
-            *[
-                _get_holdings_for_group_recursive(
-                    api_factory=api_factory,
-                    group_scope=sub_group.scope,
-                    group_code=sub_group.code,
-                    group_by_portfolio=group_by_portfolio,
-                    **kwargs,
-                )
-                for sub_group in (sub_groups or [])
-            ],
-            return_exceptions=False,
+    async def fetch(index, scope, code):
+        response = await _get_portfolio_holdings(  # type: ignore[misc]
+            api_factory=api_factory, scope=scope, code=code, **kwargs
         )
+        return index, response
 
-        # Turn the list of dictionaries into a single dictionary where the holdings are keyed by the Portfolio scope : code
-        sub_group_holdings_keyed = {
-            k: v for d in sub_group_holdings for k, v in d.items()
-        }
+    pending = set()
+    try:
+        while True:
+            # Top up the requests in flight
+            for index, (scope, code) in portfolios:
+                pending.add(asyncio.ensure_future(fetch(index, scope, code)))
+                if len(pending) >= max_concurrency:
+                    break
+            if len(pending) == 0:
+                return
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, response = task.result()
+                for portfolio, holdings in response.items():
+                    yield index, portfolio, holdings
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+class _HoldingsAggregator:
+    """
+    Joins holdings incrementally, one Portfolio at a time, in any order. The result is the same as joining all of
+    the holdings at once with _join_holdings, with the first holding for each key decided by the Portfolio's index
+    in the group rather than the order in which Portfolios arrive.
+    """
+
+    SUM_COLUMNS = ["units", "settled_units", "cost.amount", "cost_portfolio_ccy.amount"]
+    KEY_COLUMNS = ["instrument_uid", "holding_type", "cost.currency"]
+
+    def __init__(self):
+        self.totals = None
+        self.first_holdings = {}
 
-        # Join together the holdings across all the sub-groups
-        joined_sub_group_holdings = _join_holdings(
-            sub_group_holdings_keyed, group_by_portfolio, dict_key="SubGroupHoldings"
+    def add(self, index: int, holdings: List[lusid.PortfolioHolding]) -> None:
+        if len(holdings) == 0:
+            return
+
+        holdings_df = _holdings_to_data_frame(holdings)
+        # Order holdings by the Portfolio's index and then by their position in the Portfolio
+        holdings_df["order"] = (index << 32) + holdings_df["position"]
+        partial = holdings_df.groupby(self.KEY_COLUMNS, sort=False, dropna=False).agg(
+            {
+                **{column: "sum" for column in self.SUM_COLUMNS},
+                "cost_portfolio_ccy.currency": "first",
+                "order": "first",
+                "position": "first",
+            }
         )
 
-        # There shouldn't be any overlap between the keys in these two sets
-        if (
-            len(
-                set(joined_sub_group_holdings.keys()).intersection(
-                    set(joined_portfolio_holdings)
-                )
+        if self.totals is None:
+            first = partial
+            self.totals = partial.drop(columns="position")
+        else:
+            existing_order = self.totals["order"].reindex(partial.index)
+            first = partial[existing_order.isna() | (partial["order"] < existing_order)]
+            totals = self.totals.reindex(self.totals.index.union(partial.index, sort=False))
+            totals[self.SUM_COLUMNS] = totals[self.SUM_COLUMNS].add(
+                partial[self.SUM_COLUMNS].reindex(totals.index), fill_value=0
             )
-            > 0
-        ):
-            raise ValueError(
-                "There are duplicate Portfolios in the Portfolio Group. This is not currently supported. "
-                "Please ensure that there are no duplicates in your Porfolio Group via sub-groups and try again"
+            totals.loc[first.index, ["cost_portfolio_ccy.currency", "order"]] = first[
+                ["cost_portfolio_ccy.currency", "order"]
+            ]
+            self.totals = totals
+
+        # Only the first holding for each key is kept, for its properties
+        for key, position in zip(first.index, first["position"].tolist()):
+            self.first_holdings[key] = holdings[position]
+
+    def result(
+        self, dict_key: str, as_data_frame: bool = False
+    ) -> Dict[str, List[lusid.PortfolioHolding] | pd.DataFrame]:
+        if self.totals is None:
+            return _join_holdings({}, dict_key=dict_key, as_data_frame=as_data_frame)
+
+        # Restore the order in which the holdings would have been joined all at once
+        joined = self.totals.sort_values("order").drop(columns="order").reset_index()
+        holdings = [self.first_holdings[key] for key in zip(*(joined[c].tolist() for c in self.KEY_COLUMNS))]
+        joined["position"] = np.arange(len(joined))
+
+        if as_data_frame:
+            return {dict_key: _holdings_data_frame(holdings, joined)}
+        return {dict_key: _portfolio_holdings_from_joined(holdings, joined)}
+
+
+async def _get_holdings_time_series_for_group(
+    api_factory: SyncApiClientFactory,
+    group_scope: str,
+    group_code: str,
+    effective_dates: list,
+    max_concurrency: int = 5,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    This function gets the holdings of every Portfolio in a Portfolio Group at each of a list of effective dates. The
+    group tree is resolved once per date and the (Portfolio, date) requests for the whole grid share one
+    concurrency limit.
+
+    Parameters
+    ----------
+    api_factory : SyncApiClientFactory
+        The api factory to use
+    group_scope : str
+        The scope of the Portfolio Group
+    group_code : str
+        The code of the Portfolio Group
+    effective_dates : list
+        The effective dates at which to get the holdings
+    max_concurrency : int
+        The maximum number of requests to LUSID to have in flight at once
+
+    Returns
+    -------
+    pd.DataFrame
+        The holdings with a row per effective date, Portfolio and holding
+
+    Other Parameters
+    ------
+    as_at : datetime
+        The as at datetime at which to get the Portfolio Group and holdings
+    filter : str
+        The filter to use to filter the holdings
+    by_taxlots : bool
+        Whether or not to break the holdings down into individual tax lots
+    property_keys : list[str]
+        The list of property keys to decorate onto the holdings, must be from the Instrument domain
+    thread_pool
+        The thread pool to run this function in
+    """
+
+    # Resolve the group tree at each date, the membership of the group may change over time
+    trees = await gather_with_concurrency(
+        max_concurrency,
+        [
+            functools.partial(
+                _resolve_group_tree,
+                api_factory,
+                group_scope,
+                group_code,
+                max_concurrency=max_concurrency,
+                effective_at=effective_date,
+                **kwargs,
             )
+            for effective_date in effective_dates
+        ],
+    )
 
-        # Join and return the joined sub-group holdings with the joined portfolio holdings
-        return _join_holdings(
-            {**joined_sub_group_holdings, **joined_portfolio_holdings},
-            group_by_portfolio,
-            dict_key=f"{group_scope} : {group_code}",
-        )
+    grid = [
+        (effective_date, scope, code)
+        for effective_date, tree in zip(effective_dates, trees)
+        for scope, code in _unique_portfolios(tree, (group_scope, group_code))
+    ]
+
+    # Get the holdings for each portfolio at each date
+    portfolio_holdings = await gather_with_concurrency(
+        max_concurrency,
+        [
+            functools.partial(
+                _get_portfolio_holdings,
+                api_factory=api_factory,
+                scope=scope,
+                code=code,
+                effective_at=effective_date,
+                **kwargs,
+            )
+            for effective_date, scope, code in grid
+        ],
+    )
+
+    # Collect the holdings into a single long format DataFrame keyed by date and portfolio
+    all_holdings = []
+    effective_at_column = []
+    portfolio_column = []
+    for (effective_date, _, _), response in zip(grid, portfolio_holdings):
+        for portfolio, holdings in response.items():
+            all_holdings.extend(holdings)
+            effective_at_column.extend([effective_date] * len(holdings))
+            portfolio_column.extend([portfolio] * len(holdings))
+
+    holdings_df = _holdings_to_data_frame(all_holdings)
+    holdings_df.insert(0, "portfolio", portfolio_column)
+    holdings_df.insert(0, "effective_at", effective_at_column)
+
+    return _holdings_data_frame(all_holdings, holdings_df)
 
 
 def get_holdings_for_group(
@@ -339,8 +903,11 @@ def get_holdings_for_group(
     group_code: str,
     group_by_portfolio: bool = False,
     num_threads=5,
+    as_data_frame: bool = False,
+    max_concurrency: int | None = None,
+    profiler=None,
     **kwargs,
-) -> Dict[str, List[lusid.PortfolioHolding]]:
+) -> Dict[str, List[lusid.PortfolioHolding] | pd.DataFrame]:
     """
     This function gets the holdings for a Portfolio Group in LUSID.
 
@@ -356,10 +923,19 @@ def get_holdings_for_group(
         Whether or not to group the holdings by Portfolio, if False will merge all Holdings together based on Instrument
     num_threads : int
         The number of threads to use for asynchronous programming
+    as_data_frame : bool
+        Whether to return the holdings as DataFrames rather than lists of PortfolioHolding, with a "P:" prefixed
+        column for each instrument property
+    max_concurrency : int
+        The maximum number of requests to LUSID to have in flight at once, defaults to num_threads. Each Portfolio's
+        holdings are only requested once, even if it is in more than one sub-group
+    profiler : LoadProfiler | None
+        Profiles this request, writing a CPU profile and memory snapshots for each of its phases to a directory e.g.
+        LoadProfiler("profiles") from cocoon.profiling
 
     Returns
     -------
-    group_holdings : Dict[str, List[lusid.PortfolioHolding]]
+    group_holdings : Dict[str, List[lusid.PortfolioHolding] | pd.DataFrame]
         The single set of holdings either keyed by the Portfolio scope/code or the Portfolio Group scope/code
 
     Other Parameters
@@ -376,6 +952,88 @@ def get_holdings_for_group(
         The list of property keys to decorate onto the holdings, must be from the Instrument domain
     """
 
+    # The profiler is started first so that the thread pool and event loop threads are included in its profile
+    with profiler if profiler is not None else contextlib.nullcontext():
+        # Create a new thread pool to run the asynchronous tasks in
+        thread_pool = ThreadPool(num_threads).thread_pool
+        kwargs["thread_pool"] = thread_pool
+
+        # Start a new event loop in a new thread, this is required to run inside a Jupyter notebook
+        loop = start_event_loop_new_thread()
+
+        # Get the responses from LUSID
+        group_holdings = asyncio.run_coroutine_threadsafe(
+            _get_holdings_for_group(
+                api_factory=api_factory,
+                group_scope=group_scope,
+                group_code=group_code,
+                group_by_portfolio=group_by_portfolio,
+                as_data_frame=as_data_frame,
+                max_concurrency=max_concurrency or num_threads,
+                spans=SpanRecorder(profiler=profiler),
+                **kwargs,
+            ),
+            loop,
+        ).result()
+
+        # Stop the additional event loop
+        stop_event_loop_new_thread(loop)
+
+    return group_holdings
+
+
+def get_holdings_time_series_for_group(
+    api_factory: SyncApiClientFactory,
+    group_scope: str,
+    group_code: str,
+    effective_dates: list,
+    num_threads=5,
+    max_concurrency: int | None = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    This function gets the holdings of every Portfolio in a Portfolio Group in LUSID at each of a list of effective
+    dates, using one event loop and one thread pool for all of the dates.
+
+    Parameters
+    ----------
+    api_factory : SyncApiClientFactory
+        The api factory to use
+    group_scope : str
+        The scope of the Portfolio Group
+    group_code : str
+        The code of the Portfolio Group
+    effective_dates : list
+        The effective dates at which to get the holdings
+    num_threads : int
+        The number of threads to use for asynchronous programming
+    max_concurrency : int
+        The maximum number of requests to LUSID to have in flight at once, defaults to num_threads
+
+    Returns
+    -------
+    group_holdings : pd.DataFrame
+        The holdings in long format, with "effective_at" and "portfolio" columns followed by the fields of each holding
+        and a "P:" prefixed column for each instrument property. The holdings are not joined across Portfolios.
+
+    Other Parameters
+    ------
+    as_at : datetime
+        The as at datetime at which to get the holdings, defaults to now so that every date is read as at the same time
+    filter : str
+        The filter to use to filter the holdings
+    by_taxlots : bool
+        Whether or not to break the holdings down into individual tax lots
+    property_keys : list[str]
+        The list of property keys to decorate onto the holdings, must be from the Instrument domain
+    """
+
+    if "effective_at" in kwargs:
+        raise ValueError("Use effective_dates rather than effective_at to set the dates of the holdings")
+
+    # Read every date as at the same time, this also allows the group tree to be cached
+    kwargs.setdefault("as_at", datetime.now(timezone.utc))
+
     # Create a new thread pool to run the asynchronous tasks in
     thread_pool = ThreadPool(num_threads).thread_pool
     kwargs["thread_pool"] = thread_pool
@@ -385,11 +1043,12 @@ def get_holdings_for_group(
 
     # Get the responses from LUSID
     group_holdings = asyncio.run_coroutine_threadsafe(
-        _get_holdings_for_group_recursive(
+        _get_holdings_time_series_for_group(
             api_factory=api_factory,
             group_scope=group_scope,
             group_code=group_code,
-            group_by_portfolio=group_by_portfolio,
+            effective_dates=list(effective_dates),
+            max_concurrency=max_concurrency or num_threads,
             **kwargs,
         ),
         loop,
@@ -399,3 +1058,97 @@ def get_holdings_for_group(
     stop_event_loop_new_thread(loop)
 
     return group_holdings
+
+
+def stream_holdings_for_group(
+    api_factory: SyncApiClientFactory,
+    group_scope: str,
+    group_code: str,
+    callback=None,
+    group_by_portfolio: bool = False,
+    num_threads=5,
+    max_concurrency: int | None = None,
+    as_data_frame: bool = False,
+    **kwargs,
+) -> Dict[str, List[lusid.PortfolioHolding] | pd.DataFrame] | None:
+    """
+    This function gets the holdings for a Portfolio Group in LUSID one Portfolio at a time. Each Portfolio's holdings
+    are passed to the callback as soon as they arrive and, unless grouping by Portfolio, joined into running totals
+    before being released. Peak memory is bounded by the largest Portfolios in flight rather than the whole group,
+    which matters for large tax lot responses.
+
+    Parameters
+    ----------
+    api_factory : SyncApiClientFactory
+        The api factory to use
+    group_scope : str
+        The scope of the Portfolio Group
+    group_code : str
+        The code of the Portfolio Group
+    callback : Callable[[str, List[lusid.PortfolioHolding] | pd.DataFrame], None]
+        Called with the scope : code and the holdings of each Portfolio as they arrive. It is called from the thread
+        running the event loop, one Portfolio at a time, while the next Portfolios are being requested
+    group_by_portfolio : bool
+        Whether or not to group the holdings by Portfolio, if True the holdings are only passed to the callback,
+        if False they are also joined together based on Instrument
+    num_threads : int
+        The number of threads to use for asynchronous programming
+    max_concurrency : int
+        The maximum number of requests to LUSID to have in flight at once, defaults to num_threads
+    as_data_frame : bool
+        Whether to pass and return the holdings as DataFrames rather than lists of PortfolioHolding
+
+    Returns
+    -------
+    group_holdings : Dict[str, List[lusid.PortfolioHolding] | pd.DataFrame] | None
+        The holdings joined across the Portfolio Group, as returned by get_holdings_for_group, or None when grouping
+        by Portfolio
+
+    Other Parameters
+    ------
+    effective_at : datetime
+        The effective datetime at which to get the Portfolio Group
+    as_at : datetime
+        The as at datetime at which to get the Portfolio Group
+    filter : str
+        The filter to use to filter the holdings
+    by_taxlots : bool
+        Whether or not to break the holdings down into individual tax lots
+    property_keys : list[str]
+        The list of property keys to decorate onto the holdings, must be from the Instrument domain
+    """
+
+    if group_by_portfolio and callback is None:
+        raise ValueError("A callback is required to stream holdings grouped by Portfolio")
+
+    async def consume():
+        aggregator = None if group_by_portfolio else _HoldingsAggregator()
+        async for index, portfolio, holdings in iter_holdings_for_group(
+            api_factory, group_scope, group_code, max_concurrency=max_concurrency or num_threads, **kwargs
+        ):
+            if callback is not None:
+                callback(
+                    portfolio,
+                    _holdings_data_frame(holdings, _holdings_to_data_frame(holdings)) if as_data_frame else holdings,
+                )
+            if aggregator is not None:
+                aggregator.add(index, holdings)
+
+        if aggregator is None:
+            return None
+        return aggregator.result(f"{group_scope} : {group_code}", as_data_frame=as_data_frame)
+
+    # Create a new thread pool to run the asynchronous tasks in
+    thread_pool = ThreadPool(num_threads).thread_pool
+    kwargs["thread_pool"] = thread_pool
+
+    # Start a new event loop in a new thread, this is required to run inside a Jupyter notebook
+    loop = start_event_loop_new_thread()
+
+    try:
+        group_holdings = asyncio.run_coroutine_threadsafe(consume(), loop).result()
+    finally:
+        # Stop the additional event loop
+        stop_event_loop_new_thread(loop)
+
+    return group_holdings
@@ -1,2 +1,17 @@
-from finbourne_sdk_utils.jupyter_tools.stop_execution import StopExecution as StopExecution
-from finbourne_sdk_utils.jupyter_tools.hide_code_button import toggle_code as toggle_code
+from typing import TYPE_CHECKING
+
+from finbourne_sdk_utils._lazy import attach
+
+# IPython is only imported once one of the tools is used, see finbourne_sdk_utils._lazy
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submodules=["hide_code_button", "stop_execution"],
+    attributes={
+        "StopExecution": "finbourne_sdk_utils.jupyter_tools.stop_execution",
+        "toggle_code": "finbourne_sdk_utils.jupyter_tools.hide_code_button",
+    },
+)
+
+if TYPE_CHECKING:
+    from finbourne_sdk_utils.jupyter_tools.stop_execution import StopExecution as StopExecution
+    from finbourne_sdk_utils.jupyter_tools.hide_code_button import toggle_code as toggle_code
@@ -1,5 +1,4 @@
 import logging
-import coloredlogs
 
 
 class LusidLogger:
@@ -36,6 +35,9 @@ class LusidLogger:
             print(f"Logging to {logging_file}")
             logging.basicConfig(filename=logging_file)
 
+        # coloredlogs is only imported once a logger is created, to keep importing the package fast
+        import coloredlogs
+
         root_logger = logging.getLogger()
         root_logger.setLevel(set_logger_level[log_level])
         coloredlogs.install(level=set_logger_level[log_level], logger=root_logger)
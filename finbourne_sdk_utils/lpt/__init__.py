@@ -1,24 +1,80 @@
-from finbourne_sdk_utils.lpt.lpt import (  # noqa: F401
-    add_days,
-    chunk,
-    display_df,
-    display_error,
-    dump_stats,
-    from_date,
-    from_df,
-    is_path_supported_excel_with_sheet,
-    perpetual_upsert,
-    process_input,
-    read_csv,
-    read_input,
-    records_to_df,
-    Serialise,
-    standard_flow,
-    to_date,
-    to_df,
-    to_instrument_identifiers,
-    trim_df,
+from typing import TYPE_CHECKING
+
+from finbourne_sdk_utils._lazy import attach
+
+# The tools are imported when first used so that pandas and the LUSID SDK are only imported when needed,
+# see finbourne_sdk_utils._lazy
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submodules=["either", "lpt", "pager", "read_cache", "record", "stats"],
+    attributes={
+        **{
+            name: "finbourne_sdk_utils.lpt.lpt"
+            for name in [
+                "add_days",
+                "chunk",
+                "ColumnarWriter",
+                "display_df",
+                "display_error",
+                "dump_stats",
+                "from_date",
+                "from_df",
+                "is_path_supported_excel_with_sheet",
+                "perpetual_upsert",
+                "process_input",
+                "read_columnar",
+                "read_csv",
+                "read_input",
+                "read_inputs",
+                "records_to_df",
+                "Serialise",
+                "standard_flow",
+                "to_date",
+                "to_df",
+                "to_instrument_identifiers",
+                "trim_df",
+                "write_output",
+            ]
+        },
+        "Either": "finbourne_sdk_utils.lpt.either",
+        "page_all_results": "finbourne_sdk_utils.lpt.pager",
+        "stream_all_results": "finbourne_sdk_utils.lpt.pager",
+        "CachedApiFactory": "finbourne_sdk_utils.lpt.read_cache",
+        "ReadCache": "finbourne_sdk_utils.lpt.read_cache",
+        "Rec": "finbourne_sdk_utils.lpt.record",
+        "CallStats": "finbourne_sdk_utils.lpt.stats",
+        "StatsApiFactory": "finbourne_sdk_utils.lpt.stats",
+    },
 )
-from finbourne_sdk_utils.lpt.either import Either  # noqa: F401
-from finbourne_sdk_utils.lpt.pager import page_all_results  # noqa: F401
-from finbourne_sdk_utils.lpt.record import Rec  # noqa: F401
+
+if TYPE_CHECKING:
+    from finbourne_sdk_utils.lpt.lpt import (  # noqa: F401
+        add_days,
+        chunk,
+        ColumnarWriter,
+        display_df,
+        display_error,
+        dump_stats,
+        from_date,
+        from_df,
+        is_path_supported_excel_with_sheet,
+        perpetual_upsert,
+        process_input,
+        read_columnar,
+        read_csv,
+        read_input,
+        read_inputs,
+        records_to_df,
+        Serialise,
+        standard_flow,
+        to_date,
+        to_df,
+        to_instrument_identifiers,
+        trim_df,
+        write_output,
+    )
+    from finbourne_sdk_utils.lpt.either import Either  # noqa: F401
+    from finbourne_sdk_utils.lpt.pager import page_all_results, stream_all_results  # noqa: F401
+    from finbourne_sdk_utils.lpt.read_cache import CachedApiFactory, ReadCache  # noqa: F401
+    from finbourne_sdk_utils.lpt.record import Rec  # noqa: F401
+    from finbourne_sdk_utils.lpt.stats import CallStats, StatsApiFactory  # noqa: F401
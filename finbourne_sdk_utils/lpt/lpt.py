@@ -1,7 +1,16 @@
 from __future__ import annotations
 
+import bz2
+import contextlib
+import gzip
+import inspect
+import io
+import lzma
+import os
 import re
+import zipfile
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from functools import reduce
 from typing import Any, cast
 
@@ -18,54 +27,87 @@ def to_df(data, columns):
     if isinstance(data, Rec):
         data = data.content  # type: ignore[reportAttributeAccessIssue]
 
-    # Create record by accessing each column
-    def to_record(obj):
-        return {col: access(obj, col) for col in columns}
+    # Try standard representations
+    try:
+        iterator = iter(data)
+        if 'BaseModel.__iter' in str(iterator):
+            raise TypeError("BaseModel is not directly iterable")
+    except (TypeError, AttributeError):
+        iterator = iter(data.values)
 
-    def property_value(p):
-        return p.metric_value.value if p.label_value is None else p.label_value
+    objects = list(iterator)
 
-    # traverse dot notation to flatten sub-objects
-    def access(obj, col):
-        if col.startswith("P:"):
+    # Index each object's properties by key once, rather than scanning them for every property column
+    if any(col.startswith("P:") for col in columns):
+        indexes = [_property_index(o) for o in objects]
+    else:
+        indexes = [None] * len(objects)
+
+    return pd.DataFrame(
+        {
+            col: [accessor(o, index) for o, index in zip(objects, indexes)]
+            for col, accessor in ((col, _compile_accessor(col)) for col in columns)
+        },
+        columns=columns,
+    )
+
+
+def _property_value(p):
+    return p.metric_value.value if p.label_value is None else p.label_value
+
+
+# Map property keys to properties, keeping the first occurrence when the properties are a list
+def _property_index(obj):
+    try:
+        props = getattr(obj[1], "properties")
+    except (AttributeError, KeyError, IndexError, TypeError):
+        return None
+    if isinstance(props, list):
+        index = {}
+        for p in props:
+            index.setdefault(p.key, p)
+        return index
+    return props
+
+
+# Compile a column into a function of (object, property index) which traverses
+# dot notation to flatten sub-objects
+def _compile_accessor(col):
+    if col.startswith("P:"):
+        key = col[2:]
+
+        def property_accessor(obj, index):
             try:
-                props = getattr(obj[1], "properties")
-                if isinstance(props, list):
-                    return property_value(
-                        [p.value for p in props if p.key == col[2:]][0]
-                    )
-                return property_value(props[col[2:]].value)
+                return _property_value(index[key].value)
             except (AttributeError, KeyError, IndexError, TypeError):
                 return None
 
-        if col.startswith("SHK:"):
+        return property_accessor
+
+    if col.startswith("SHK:"):
+        key = col[4:]
+
+        def sub_holding_key_accessor(obj, index):
             try:
-                props = getattr(obj[1], "sub_holding_keys")
-                return property_value(props[col[4:]].value)
+                return _property_value(getattr(obj[1], "sub_holding_keys")[key].value)
             except (AttributeError, KeyError, IndexError, TypeError):
                 return None
 
-        for fld in col.split("."):
-            if fld.startswith("KEY:"):
-                obj = obj.get(fld[4:]) if obj else None
-            else:
-                obj = getattr(obj, fld) if obj else None
-        return obj
-
-    # Try standard representations
-    try:
-        iterator = iter(data)
-        if 'BaseModel.__iter' in str(iterator):
-            raise TypeError("BaseModel is not directly iterable")
-    except (TypeError, AttributeError):
-        iterator = iter(data.values)
+        return sub_holding_key_accessor
 
-    records = [to_record(o) for o in iterator]
+    path = [
+        (True, fld[4:]) if fld.startswith("KEY:") else (False, fld)
+        for fld in col.split(".")
+    ]
 
-    if len(records) == 0:
-        return pd.DataFrame({col: [] for col in columns})[columns]
+    def path_accessor(obj, index):
+        for is_key, name in path:
+            if not obj:
+                return None
+            obj = obj.get(name) if is_key else getattr(obj, name)
+        return obj
 
-    return pd.DataFrame.from_records(records)[columns]
+    return path_accessor
 
 
 # Utilities to convert YYYY-MM-DD strings to and from UTC dates.
@@ -81,8 +123,9 @@ def add_days(date, days):
     return to_date(date) + pd.Timedelta("{} days".format(days))  # type: ignore[reportOperatorIssue]
 
 
-# Display a dataframe with no cropping
-def display_df(df, decimals=2):
+# Display a dataframe with no cropping. Large frames are previewed by their
+# first and last rows, so only the preview is copied for formatting.
+def display_df(df, decimals=2, max_rows=1000):
     fmt = "{:,." + str(decimals) + "f}"
     pd.options.display.float_format = fmt.format
     pd.set_option("max_colwidth", None)
@@ -90,8 +133,20 @@ def display_df(df, decimals=2):
     try:
         if len(df) == 1 and len(df.columns) > 5:
             df = df.T
-        with pd.option_context("display.width", None, "display.max_rows", 1000):
-            print(df.fillna(""))
+        truncated = len(df) > max_rows
+        if truncated:
+            half = max_rows // 2
+            preview = pd.concat([df.iloc[: half + 1], df.iloc[-(half + 1) :]])
+        else:
+            preview = df
+        with pd.option_context(
+            "display.width", None,
+            "display.max_rows", max_rows,
+            "display.show_dimensions", False,
+        ):
+            print(preview.fillna(""))
+        if truncated:
+            print("\n[{} rows x {} columns]".format(len(df), len(df.columns)))
     except Exception:
         print(df)
 
@@ -126,52 +181,68 @@ def from_df(
         else:
             simple_columns.append(col)
 
-    def build_complex_type(row, col, fields):
-        d = {f: row["{}.{}".format(col, f)] for f in fields}
-        col_type = complex_types[record_type.openapi_types[col]]
-        return col_type(**d)
-
-    def build_properties(row):
-        ptype_tpl = type_re.findall(record_type.openapi_types["properties"])[0]
-
-        ptype = complex_types[ptype_tpl[2].strip()]
-
-        def prop_builder(property_key, value):
-            if isinstance(value, str):
-                return ptype(
-                    key=property_key,
-                    value=complex_types["PropertyValue"](label_value=value),
-                )
-            elif not pd.isna(value):
-                return ptype(
-                    key=property_key,
-                    value=complex_types["PropertyValue"](
-                        metric_value=complex_types["MetricValue"](value)
-                    ),
-                )
-            else:
-                return None
+    # Resolve everything which only depends on the record type once, rather than on every row
+    positions = {col: i for i, col in enumerate(df.columns)}
+    allowed = set(record_type.openapi_types.keys())
 
-        props = [
-            (col, prop_builder(col, row["P:{}".format(col)])) for col in properties
+    simple_plan = [(col, positions[col]) for col in simple_columns]
+    complex_plan = [
+        (
+            col,
+            complex_types[record_type.openapi_types[col]],
+            [(f, positions["{}.{}".format(col, f)]) for f in fields],
+        )
+        for col, fields in complex_columns.items()
+    ]
+
+    if "properties" in record_type.openapi_types and len(properties) > 0:
+        ptype = complex_types[
+            type_re.findall(record_type.openapi_types["properties"])[0][2].strip()
         ]
-        d = dict([p for p in props if p[1] is not None])
-        return d
+        property_value_type = complex_types["PropertyValue"]
+        metric_value_type = complex_types["MetricValue"]
+        property_plan = [(col, positions["P:{}".format(col)]) for col in properties]
+    else:
+        property_plan = []
+
+    def prop_builder(property_key, value):
+        if isinstance(value, str):
+            return ptype(
+                key=property_key,
+                value=property_value_type(label_value=value),
+            )
+        elif not pd.isna(value):
+            return ptype(
+                key=property_key,
+                value=property_value_type(metric_value=metric_value_type(value)),
+            )
+        else:
+            return None
+
+    # Many rows share an instrument, so only parse each uid once
+    identifiers = {}
 
-    def to_type(i, row):
-        fields = {col: row[col] for col in simple_columns}
+    def instrument_identifiers(uid):
+        if uid not in identifiers:
+            identifiers[uid] = to_instrument_identifiers(uid)
+        return dict(identifiers[uid])
+
+    def to_type(i, values):
+        fields = {col: values[pos] for col, pos in simple_plan}
         fields.update(
             {
-                col: build_complex_type(row, col, col_fields)
-                for col, col_fields in complex_columns.items()
+                col: col_type(**{f: values[pos] for f, pos in col_fields})
+                for col, col_type, col_fields in complex_plan
             }
         )
 
-        if "properties" in record_type.openapi_types and len(properties) > 0:
-            fields["properties"] = build_properties(row)
+        if property_plan:
+            props = ((col, prop_builder(col, values[pos])) for col, pos in property_plan)
+            fields["properties"] = {col: p for col, p in props if p is not None}
 
         if related is not None:
             if callable(related):
+                row = pd.Series(values, index=df.columns)
                 fields = cast(dict[str, Any], related(i, row, fields))
             else:
                 # Dict type
@@ -181,18 +252,20 @@ def from_df(
         # This should change to allow the full
         # instrument resolution logic to apply
         if "instrument_uid" in fields.keys():
-            fields["instrument_identifiers"] = to_instrument_identifiers(
+            fields["instrument_identifiers"] = instrument_identifiers(
                 fields["instrument_uid"]
             )
             del fields["instrument_uid"]
 
         # Remove any 'noise' from the dataframe
-        allowed = set(record_type.openapi_types.keys())
-        trimmed = dict([tpl for tpl in fields.items() if tpl[0] in allowed])
+        trimmed = {k: v for k, v in fields.items() if k in allowed}
 
         return record_type(**trimmed)
 
-    return [to_type(i, row) for (i, row) in df.iterrows()]
+    return [
+        to_type(i, values)
+        for i, values in zip(df.index, df.itertuples(index=False, name=None))
+    ]
 
 
 def to_instrument_identifiers(uid):
@@ -243,25 +316,33 @@ def trim_df(df, limit, **kwargs):
 
 
 # Template 'program'
-def standard_flow(parser, connector, executor, display_df=display_df):
+# When call_stats (a CallStats) is given, or the arguments name a call_stats
+# file, every SDK call made through the connection is recorded, with the
+# statistics written to the file if there is one. A compression argument is
+# used to write the output file, otherwise it is inferred from the extension
+def standard_flow(parser, connector, executor, display_df=display_df, call_stats=None):
     args = parser()
-    api = connector(args)
+    connection = connector(args)
+
+    stats_file = args.__dict__.get("call_stats", None)
+    if call_stats is None and stats_file is not None:
+        from .stats import CallStats
+
+        call_stats = CallStats()
+    api = connection if call_stats is None else call_stats.connect(connection)
 
     either = Either(executor(api, args))
 
     # called if the executor returns a success
     def success(df):
-        # Query type programs will return a dataframe
+        # Query type programs will return a dataframe, or an iterable of dataframes
         if df is not None:
             fn = args.__dict__.get("filename", None)
             if fn is not None:
-                if ".xls" in fn.lower():
-                    df.to_excel(fn, index=False)
-                elif fn.endswith(".pk"):
-                    df.to_pickle(fn)
-                else:
-                    df.to_csv(fn, index=False)
+                write_output(df, fn, args.__dict__.get("compression", None))
             else:
+                if not isinstance(df, pd.DataFrame):
+                    df = pd.concat(list(df), ignore_index=True, sort=False)
                 if "dfq" in args and args.dfq:
                     from . import dfq  # type: ignore[reportAttributeAccessIssue]
 
@@ -271,7 +352,9 @@ def standard_flow(parser, connector, executor, display_df=display_df):
 
     rv = either.match(left=display_error, right=success)
 
-    api.dump_stats()
+    connection.dump_stats()
+    if call_stats is not None and stats_file is not None:
+        call_stats.dump(stats_file)
 
     return rv
 
@@ -304,15 +387,46 @@ def read_csv(path, frame_type=None, **kwargs):
     return read_input(path, frame_type, **kwargs)
 
 
+# File extensions of the columnar formats read with pyarrow
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+
+
+# pyarrow is an optional dependency, installed with the pyarrow extra
+def _require_pyarrow(purpose):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is required to {}. Install it with 'pip install finbourne-sdk-utils[pyarrow]'".format(purpose)
+        ) from e
+
+
 # Read in a data-file and apply any backwards compatibility settings
+# Supports Excel, Parquet, Feather/Arrow IPC and CSV (including .gz/.zst compressed CSV). When mappings are
+# provided only the columns which will be kept are read.
 def read_input(path, frame_type=None, mappings=None, **kwargs):
     sheet = kwargs.get("sheet_name", 0)
     if is_path_supported_excel_with_sheet(path):
         path, sheet = path.rsplit(":", 1)
 
-    if ".xls" in path.lower():
+    projection = None
+    if mappings is not None:
+        wanted = set(mappings.keys()) | set(mappings.values())
+
+        def projection(column):
+            return column in wanted
+
+    lower_path = path.lower()
+    if ".xls" in lower_path:
+        if projection is not None:
+            kwargs.setdefault("usecols", projection)
         df = pd.read_excel(path, sheet_name=sheet, engine="openpyxl", **kwargs)
+    elif lower_path.endswith(PARQUET_EXTENSIONS + ARROW_EXTENSIONS):
+        df = read_columnar(path, projection, **kwargs)
     else:
+        if projection is not None:
+            kwargs.setdefault("usecols", projection)
         df = pd.read_csv(path, **kwargs)
 
     if mappings is not None:
@@ -322,6 +436,160 @@ def read_input(path, frame_type=None, mappings=None, **kwargs):
     return df
 
 
+# Read a Parquet or Feather/Arrow IPC file, only reading the columns accepted by the projection.
+# Arrow files are memory-mapped by default so that only the columns used are paged in. Other
+# keyword arguments are passed to the pyarrow reader or to Table.to_pandas where they accept
+# them, so that the CSV options read_input passes through, such as usecols, can be given too.
+def read_columnar(path, projection=None, dtype=None, memory_map=True, **kwargs):
+    _require_pyarrow("read Parquet or Arrow files")
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as parquet
+
+    usecols = kwargs.pop("usecols", None)
+    if projection is None and usecols is not None:
+        projection = usecols if callable(usecols) else set(usecols).__contains__
+
+    is_parquet = path.lower().endswith(PARQUET_EXTENSIONS)
+    if is_parquet:
+        names = parquet.read_schema(path).names
+    else:
+        try:
+            with pa.memory_map(path) as source:
+                names = ipc.open_file(source).schema.names
+        except pa.ArrowInvalid:
+            # Feather v1 files aren't Arrow IPC files, the columns are chosen once the table has been read
+            names = None
+    columns = None if projection is None or names is None else [c for c in names if projection(c)]
+
+    reader = parquet.read_table if is_parquet else feather.read_table
+    reader_parameters = inspect.signature(reader).parameters
+    pandas_parameters = inspect.signature(pa.Table.to_pandas).parameters
+
+    table = reader(
+        path,
+        columns=columns,
+        memory_map=memory_map,
+        **{k: v for k, v in kwargs.items() if k in reader_parameters},
+    )
+    if projection is not None and names is None:
+        table = table.select([c for c in table.column_names if projection(c)])
+
+    df = table.to_pandas(**{k: v for k, v in kwargs.items() if k in pandas_parameters})
+
+    # Match the CSV readers, converting values but leaving missing values as NaN
+    if dtype is str:
+        df = df.apply(lambda column: column.map(str, na_action="ignore"))
+    elif dtype is not None:
+        df = df.astype(dtype)
+
+    return df
+
+
+# Compression of CSV outputs by file extension, matching the extensions pandas infers
+CSV_COMPRESSION = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zip": "zip", ".zst": "zstd"}
+
+
+# Open a text file to write CSV to, compressed by the given method or else as inferred
+# from the file extension. Zip archives hold a single file named after the archive.
+@contextlib.contextmanager
+def _open_csv_output(filename, compression=None):
+    method = compression or CSV_COMPRESSION.get(os.path.splitext(filename.lower())[1])
+
+    if method is None:
+        with open(filename, "w", newline="") as f:
+            yield f
+    elif method in ("gzip", "bz2", "xz"):
+        opener = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}[method]
+        with opener(filename, "wt", newline="") as f:
+            yield f
+    elif method == "zip":
+        name = os.path.basename(filename)
+        if name.lower().endswith(".zip"):
+            name = name[:-4]
+        with zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as archive:
+            with io.TextIOWrapper(archive.open(name, "w"), newline="") as f:
+                yield f
+    elif method == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError(
+                "zstandard is required to write .zst files. Install it with 'pip install zstandard'"
+            ) from e
+        with zstandard.open(filename, "wt", newline="") as f:
+            yield f
+    else:
+        raise ValueError(f"Unsupported CSV compression '{method}', use one of {sorted(set(CSV_COMPRESSION.values()))}")
+
+
+# Write a dataframe, or an iterable of dataframes, to a file chosen by its extension.
+# Parquet, Feather/Arrow IPC and CSV (optionally .gz/.bz2/.xz/.zip/.zst compressed) are
+# written incrementally, one chunk at a time. Excel and pickle outputs are written in one go.
+def write_output(data, filename, compression=None):
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+    lower_name = filename.lower()
+
+    if ".xls" in lower_name or lower_name.endswith(".pk"):
+        df = data if isinstance(data, pd.DataFrame) else pd.concat(list(chunks), ignore_index=True, sort=False)
+        if ".xls" in lower_name:
+            df.to_excel(filename, index=False)
+        else:
+            df.to_pickle(filename)
+    elif lower_name.endswith(PARQUET_EXTENSIONS + ARROW_EXTENSIONS):
+        writer = None
+        try:
+            for df in chunks:
+                if writer is None:
+                    writer = ColumnarWriter(filename, df, compression)
+                else:
+                    writer.write(df)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        with _open_csv_output(filename, compression) as f:
+            columns = None
+            for df in chunks:
+                # Later chunks are written in the columns of the first, which make up the header
+                if columns is None:
+                    columns = list(df.columns)
+                    df.to_csv(f, index=False)
+                else:
+                    if list(df.columns) != columns:
+                        df = df.reindex(columns=columns)
+                    df.to_csv(f, index=False, header=False)
+
+
+# Write dataframes to a Parquet or Feather/Arrow IPC file. The schema is taken from the
+# first dataframe and later dataframes must share its columns and types.
+class ColumnarWriter:
+    def __init__(self, path, df, compression=None):
+        _require_pyarrow("write Parquet or Arrow files")
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+        import pyarrow.parquet as parquet
+
+        self.pa = pa
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        self.schema = table.schema
+
+        if path.lower().endswith(PARQUET_EXTENSIONS):
+            self.writer = parquet.ParquetWriter(path, self.schema, compression=compression or "snappy")
+        else:
+            options = ipc.IpcWriteOptions(compression=compression)
+            self.writer = ipc.new_file(path, self.schema, options=options)
+        self.writer.write_table(table)
+
+    def write(self, df):
+        df = df.reindex(columns=self.schema.names)
+        self.writer.write_table(self.pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        self.writer.close()
+
+
 # Check if a path is a supported excel file with a suffixed sheet
 def is_path_supported_excel_with_sheet(path):
     return re.match(r".*\.(xls|xlsx|xlsm|xlsb):", path)
@@ -354,12 +622,26 @@ def Serialise(api, body, bodyType):
     return api.api._serialize.body(body, bodyType)
 
 
-def process_input(aliases, api, args, fn):
-    df = pd.concat(
-        [read_input(input_file, dtype=str) for input_file in args.input],
+# Read the input files in parallel and combine them into a single DataFrame
+def read_inputs(paths, max_workers=None, **kwargs):
+    if len(paths) == 1:
+        frames = [read_input(paths[0], **kwargs)]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers or min(len(paths), os.cpu_count() or 1)) as pool:
+            frames = list(pool.map(lambda path: read_input(path, **kwargs), paths))
+
+    # The columns in the order they first appear, so each frame is aligned once rather than re-sorted
+    columns = list(dict.fromkeys(column for frame in frames for column in frame.columns))
+
+    return pd.concat(
+        [frame if list(frame.columns) == columns else frame.reindex(columns=columns) for frame in frames],
         ignore_index=True,
         sort=False,
     )
+
+
+def process_input(aliases, api, args, fn):
+    df = read_inputs(args.input, max_workers=getattr(args, "input_workers", None), dtype=str)
     if args.mappings:
         df.rename(
             columns=dict(
@@ -373,6 +655,7 @@ def process_input(aliases, api, args, fn):
     prop_keys = [col for col in df.columns.values if col.startswith("P:")]
     identifiers = [col for col in df.columns.values if col in args.identifiers]
     # Identifiers have to be unique
-    df = df.drop_duplicates(identifiers)
+    if len(identifiers) > 0:
+        df = df.drop_duplicates(identifiers)
 
     return fn(api, args, df, identifiers, prop_keys)
@@ -1,32 +1,112 @@
 import pandas as pd
 import re
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 
 from finbourne_sdk_utils.lpt.either import Either
+from finbourne_sdk_utils.lpt.lpt import ColumnarWriter, _require_pyarrow
 
 rexp = re.compile(r".*page=([^=']{10,}).*")
 
 
-def page_all_results(fetch_page, page_handler):
+# Extract the token for the next page from a result's NextPage link
+def next_page_token(result):
+    links = [link for link in result.content.links if link.relation == "NextPage"]
+
+    if len(links) > 0:
+        match = rexp.match(links[0].href)
+        if match:
+            return urllib.parse.unquote(match.group(1))
+    return None
+
+
+# Handle a page, returning the error raised by the handler as a Left
+def _handle_page(page_handler, result):
+    try:
+        return Either(right=page_handler(result))
+    except Exception as e:
+        return Either(left=e)
+
+
+# Yield an Either per page, holding either the handled page or the error
+# which ended the paging, whether from fetching the page or handling it.
+# With prefetch, the next page is requested while the current page is being
+# handled.
+def stream_all_results(fetch_page, page_handler, prefetch=True):
+    if not prefetch:
+        token = None
+        while True:
+            result = fetch_page(token)
+            if result.is_left():
+                yield result
+                return
+            token = next_page_token(result.right)
+            page = _handle_page(page_handler, result.right)
+            yield page
+            if token is None or page.is_left():
+                return
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        pending = executor.submit(fetch_page, None)
+        while True:
+            result = pending.result()
+            if result.is_left():
+                yield result
+                return
+            token = next_page_token(result.right)
+            if token is not None:
+                pending = executor.submit(fetch_page, token)
+            page = _handle_page(page_handler, result.right)
+            yield page
+            if token is None or page.is_left():
+                return
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Page through all of the results and combine the handled pages. If
+# spill_path and spill_rows are given, once more than spill_rows rows have
+# been received the pages are written to a Parquet (or Arrow) file at spill_path as
+# they arrive and the path is returned instead of a DataFrame. Pages must
+# share the columns and types of the first pages written.
+def page_all_results(
+    fetch_page, page_handler, prefetch=True, spill_path=None, spill_rows=None
+):
+    # Fail before fetching anything rather than once the pages are ready to spill
+    if spill_path is not None and spill_rows is not None:
+        _require_pyarrow("spill pages to a Parquet or Arrow file")
+
     results = []
+    rows = 0
+    writer = None
+
+    try:
+        for page in stream_all_results(fetch_page, page_handler, prefetch):
+            if page.is_left():
+                return page
+
+            # Pages which the handler returns nothing for are skipped
+            if page.right is None:
+                continue
 
-    def got_page(result):
-        results.append(page_handler(result))
+            if writer is not None:
+                writer.write(page.right)
+                continue
 
-        links = [link for link in result.content.links if link.relation == "NextPage"]
+            results.append(page.right)
+            rows += len(page.right)
 
-        if len(links) > 0:
-            match = rexp.match(links[0].href)
-            if match:
-                return urllib.parse.unquote(match.group(1))
-        return None
+            if spill_path is not None and spill_rows is not None and rows > spill_rows:
+                writer = ColumnarWriter(spill_path, pd.concat(results, ignore_index=True, sort=False))
+                results = []
+    finally:
+        if writer is not None:
+            writer.close()
 
-    page = Either(None)
-    while True:
-        page = fetch_page(page.right).bind(got_page)
-        if page.is_left():
-            return page
-        if page.right is None:
-            break
+    if writer is not None:
+        return spill_path
 
+    if len(results) == 0:
+        return pd.DataFrame()
     return pd.concat(results, ignore_index=True, sort=False)
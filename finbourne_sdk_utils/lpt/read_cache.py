@@ -0,0 +1,285 @@
+import datetime
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from finbourne.sdk.extensions import SyncApiClientFactory
+from pydantic import BaseModel
+
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+# Only reads at an as_at which has already passed are immutable, anything
+# later (or which can't be understood) is always sent to LUSID
+def _is_pinned(as_at):
+    if isinstance(as_at, str):
+        try:
+            as_at = datetime.datetime.fromisoformat(as_at.replace("Z", "+00:00"))
+        except ValueError:
+            return False
+    if not isinstance(as_at, datetime.datetime):
+        return False
+    if as_at.tzinfo is None:
+        as_at = as_at.replace(tzinfo=datetime.timezone.utc)
+    return as_at <= datetime.datetime.now(datetime.timezone.utc)
+
+
+# Time arguments which LUSID takes to be now when they are left out e.g.
+# effective_at, as_at and to_effective_at, unlike from_as_at which defaults
+# to the start of time
+def _defaults_to_now(name):
+    return name.endswith(("as_at", "effective_at")) and not name.startswith("from_")
+
+
+# A call is only immutable when it is made at a pinned as_at and every other
+# time argument which defaults to now is set, with as_ats in the past
+def _is_pinned_call(arguments, time_parameters):
+    if not _is_pinned(arguments.get("as_at")):
+        return False
+    for name in time_parameters:
+        value = arguments.get(name)
+        if value is None:
+            return False
+        if name.endswith("as_at") and not _is_pinned(value):
+            return False
+    return True
+
+
+# The base URL of the LUSID the api calls, so that a cache shared between
+# environments doesn't return one environment's responses to another
+def _api_host(api):
+    client = getattr(api, "sync_api_client", None) or getattr(api, "api_client", None)
+    return getattr(getattr(client, "configuration", None), "host", None)
+
+
+def _key_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+
+# Responses are stored as JSON rather than pickled, so that reading a cache
+# file can't run code. Models are dumped with the fields which were set and
+# validated again by their class, which must already have been imported.
+def _dumps(value):
+    if isinstance(value, BaseModel):
+        model_class = type(value)
+        value = {
+            "model": [model_class.__module__, model_class.__qualname__],
+            "value": value.model_dump(mode="json", by_alias=True, exclude_unset=True),
+        }
+    else:
+        value = {"value": value}
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(blob):
+    value = json.loads(blob)
+    if "model" not in value:
+        return value["value"]
+    module, name = value["model"]
+    model_class = getattr(sys.modules.get(module), name, None)
+    if not (isinstance(model_class, type) and issubclass(model_class, BaseModel)):
+        raise ValueError("{}.{} is not a model".format(module, name))
+    return model_class.model_validate(value["value"])
+
+
+# On-disk cache of LUSID reads made at a fixed as_at. Entries are keyed by
+# the base URL, endpoint and arguments, stored in SQLite and evicted least recently used
+# first once the cache grows past max_bytes.
+class ReadCache:
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        # The responses may be confidential so only the user can read the file
+        if not os.path.exists(path):
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+        os.chmod(path, 0o600)
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, endpoint TEXT, value BLOB, size INTEGER, accessed INTEGER)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self.connection.commit()
+        self.size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    @staticmethod
+    def key(endpoint, arguments, host=None):
+        text = json.dumps([host, endpoint, arguments], default=_key_value, sort_keys=True)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    # Return (True, value) for a cached entry, otherwise (False, None)
+    def get(self, key):
+        with self.lock:
+            row = self.connection.execute("SELECT value, size FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                try:
+                    value = _loads(row[0])
+                except (ValueError, KeyError, TypeError):
+                    # Entries which can't be read back, such as those of a model which isn't imported or written by
+                    # an earlier version, are treated as missing and replaced
+                    self.connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self.connection.commit()
+                    self.size -= row[1]
+                    row = None
+            if row is None:
+                self.misses += 1
+                return False, None
+            self.connection.execute(
+                "UPDATE entries SET accessed = ? WHERE key = ?", (time.time_ns(), key)
+            )
+            self.connection.commit()
+            self.hits += 1
+        return True, value
+
+    def put(self, key, endpoint, value):
+        try:
+            blob = _dumps(value)
+        except (TypeError, ValueError):
+            # Responses which can't be stored are simply not cached
+            return
+        if len(blob) > self.max_bytes:
+            return
+
+        with self.lock:
+            row = self.connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.size -= row[0]
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries (key, endpoint, value, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, endpoint, blob, len(blob), time.time_ns()),
+            )
+            self.size += len(blob)
+            self._evict()
+            self.connection.commit()
+
+    def _evict(self):
+        while self.size > self.max_bytes:
+            row = self.connection.execute(
+                "SELECT key, size FROM entries ORDER BY accessed LIMIT 1"
+            ).fetchone()
+            if row is None:
+                # The cache is empty, e.g. the file was cleared by another process
+                self.size = 0
+                break
+            key, size = row
+            self.connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.size -= size
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM entries")
+            self.connection.commit()
+            self.size = 0
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    # Wrap an SDK api object so that its reads at a fixed as_at are cached
+    def wrap(self, api):
+        return _CachedApi(api, self)
+
+    # Wrap an api factory so that every api it builds is cached, for use
+    # with the extract and cocoon functions
+    def api_factory(self, api_factory):
+        return CachedApiFactory(api_factory, self)
+
+
+# Proxy for an SDK api object which serves calls with an explicit as_at
+# from the cache
+class _CachedApi:
+    def __init__(self, api, cache):
+        self._api = api
+        self._cache = cache
+        self._name = type(api).__name__
+        self._host = _api_host(api)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._api, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        endpoint = "{}.{}".format(self._name, name)
+        try:
+            signature = inspect.signature(attribute)
+        except (TypeError, ValueError):
+            signature = None
+        time_parameters = [] if signature is None else [
+            parameter for parameter in signature.parameters if _defaults_to_now(parameter)
+        ]
+
+        # Name the positional arguments so that equivalent calls share an entry
+        def arguments(args, kwargs):
+            if signature is not None:
+                try:
+                    bound = signature.bind(*args, **kwargs).arguments
+                except TypeError:
+                    pass
+                else:
+                    # Keyword arguments collected by **kwargs are kept at the top level e.g. as_at
+                    named = {}
+                    for parameter, value in bound.items():
+                        if signature.parameters[parameter].kind is inspect.Parameter.VAR_KEYWORD:
+                            named.update(value)
+                        else:
+                            named[parameter] = value
+                    return named
+            return {"args": list(args), **kwargs}
+
+        @functools.wraps(attribute)
+        def cached(*args, **kwargs):
+            # The time arguments may be passed by keyword or by position
+            call_arguments = arguments(args, kwargs)
+            passed = [name for name in call_arguments if _defaults_to_now(name)]
+            if not _is_pinned_call(call_arguments, set(time_parameters) | set(passed)):
+                return attribute(*args, **kwargs)
+
+            key = self._cache.key(endpoint, call_arguments, self._host)
+            found, value = self._cache.get(key)
+            if found:
+                return value
+
+            # Errors are raised rather than cached
+            value = attribute(*args, **kwargs)
+            self._cache.put(key, endpoint, value)
+            return value
+
+        return cached
+
+
+class CachedApiFactory(SyncApiClientFactory):
+    """
+    Wraps an api factory so that reads made at a fixed as_at through the apis it builds are served from a ReadCache
+    """
+
+    def __init__(self, api_factory, cache):
+        # The wrapped factory holds the configuration, so the parent is not initialised
+        self.api_factory = api_factory
+        self.cache = cache
+
+    def build(self, api):  # type: ignore[override]
+        return self.cache.wrap(self.api_factory.build(api))
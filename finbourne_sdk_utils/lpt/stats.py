@@ -0,0 +1,383 @@
+import copy
+import functools
+import json
+import math
+import threading
+import time
+from collections import defaultdict
+
+import pandas as pd
+from finbourne.sdk.extensions import SyncApiClientFactory
+
+from .lpt import display_df
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+STATS_COLUMNS = [
+    "endpoint",
+    "calls",
+    "errors",
+    "retries",
+    "throughput",
+    "mean",
+    "p50",
+    "p95",
+    "p99",
+    "max",
+    "requestBytes",
+    "responseBytes",
+]
+
+
+# Streaming latency histogram. Latencies are counted in logarithmic buckets
+# so that quantiles can be estimated to within the given relative error
+# without keeping every sample.
+class LatencyHistogram:
+    def __init__(self, relative_error=0.01, minimum=1e-6):
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self.log_gamma = math.log(self.gamma)
+        self.minimum = minimum
+        self.buckets = defaultdict(int)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, latency):
+        index = math.ceil(math.log(max(latency, self.minimum) / self.minimum) / self.log_gamma)
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        # Nearest rank
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # Midpoint of the bucket, which bounds the relative error
+                value = self.minimum * 2 * self.gamma**index / (self.gamma + 1)
+                return min(value, self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+
+class _EndpointStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.statuses = defaultdict(int)
+        self.errors = 0
+        self.retries = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.first_start = None
+        self.last_end = None
+
+
+# Collect the endpoint, status, latency, payload sizes and retries of SDK
+# calls and summarise them per endpoint
+class CallStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = defaultdict(_EndpointStats)
+        # The recording copies of the api clients used by the wrapped apis
+        self._clients = {}
+
+    def record(
+        self,
+        endpoint,
+        status,
+        latency,
+        request_bytes=0,
+        response_bytes=0,
+        retries=0,
+        start=None,
+    ):
+        end = time.time()
+        start = end - latency if start is None else start
+        with self.lock:
+            stats = self.endpoints[endpoint]
+            stats.latency.add(latency)
+            stats.statuses[status] += 1
+            if not 200 <= status < 400:
+                stats.errors += 1
+            stats.retries += retries
+            stats.request_bytes += request_bytes
+            stats.response_bytes += response_bytes
+            stats.first_start = start if stats.first_start is None else min(stats.first_start, start)
+            stats.last_end = end if stats.last_end is None else max(stats.last_end, end)
+
+    # Wrap an SDK api object so that every call made through it is recorded
+    def wrap(self, api):
+        return _RecordedApi(_record_requests(api, self), self)
+
+    # A copy of an api client whose requests are recorded, made once per
+    # client and shared by the apis which use it
+    def _recorded_client(self, api_client):
+        with self.lock:
+            if id(api_client) not in self._clients:
+                self._clients[id(api_client)] = (api_client, _recorded_client(api_client))
+            return self._clients[id(api_client)][1]
+
+    # Wrap an api factory so that every api it builds is recorded, for use
+    # with the cocoon loaders
+    def api_factory(self, api_factory):
+        return StatsApiFactory(api_factory, self)
+
+    # Wrap the connection of an lpt program, which is either an api factory
+    # or an object with the api methods
+    def connect(self, connection):
+        if isinstance(connection, SyncApiClientFactory):
+            return self.api_factory(connection)
+        return self.wrap(connection)
+
+    def to_df(self):
+        rows = []
+        with self.lock:
+            for endpoint, stats in sorted(self.endpoints.items()):
+                elapsed = (stats.last_end or 0) - (stats.first_start or 0)
+                row = {
+                    "endpoint": endpoint,
+                    "calls": stats.latency.count,
+                    "errors": stats.errors,
+                    "retries": stats.retries,
+                    "throughput": stats.latency.count / elapsed if elapsed > 0 else None,
+                    "mean": stats.latency.mean(),
+                    "max": stats.latency.max,
+                    "requestBytes": stats.request_bytes,
+                    "responseBytes": stats.response_bytes,
+                }
+                for q in QUANTILES:
+                    row["p{}".format(int(q * 100))] = stats.latency.quantile(q)
+                rows.append(row)
+        return pd.DataFrame(rows, columns=STATS_COLUMNS)
+
+    def to_json(self):
+        df = self.to_df()
+        records = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+        with self.lock:
+            for record in records:
+                statuses = self.endpoints[record["endpoint"]].statuses
+                record["statuses"] = {str(k): v for k, v in sorted(statuses.items())}
+        return json.dumps(records, indent=2)
+
+    def to_prometheus(self, prefix="lusid_sdk"):
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append("# HELP {}_{} {}".format(prefix, name, help_text))
+            lines.append("# TYPE {}_{} {}".format(prefix, name, kind))
+
+        def sample(name, labels, value):
+            label_text = ",".join(
+                '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+                for k, v in labels.items()
+            )
+            lines.append("{}_{}{{{}}} {}".format(prefix, name, label_text, value))
+
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+
+            metric("request_duration_seconds", "summary", "Latency of SDK calls")
+            for endpoint, stats in endpoints:
+                for q in QUANTILES:
+                    sample(
+                        "request_duration_seconds",
+                        {"endpoint": endpoint, "quantile": q},
+                        stats.latency.quantile(q),
+                    )
+                sample("request_duration_seconds_sum", {"endpoint": endpoint}, stats.latency.total)
+                sample("request_duration_seconds_count", {"endpoint": endpoint}, stats.latency.count)
+
+            metric("requests_total", "counter", "SDK calls by endpoint and status")
+            for endpoint, stats in endpoints:
+                for status, count in sorted(stats.statuses.items()):
+                    sample("requests_total", {"endpoint": endpoint, "status": status}, count)
+
+            for name, attribute, help_text in (
+                ("retries_total", "retries", "Retried SDK calls"),
+                ("request_bytes_total", "request_bytes", "Bytes sent in SDK requests"),
+                ("response_bytes_total", "response_bytes", "Bytes received in SDK responses"),
+            ):
+                metric(name, "counter", help_text)
+                for endpoint, stats in endpoints:
+                    sample(name, {"endpoint": endpoint}, getattr(stats, attribute))
+
+        return "\n".join(lines) + "\n"
+
+    # Write the statistics out, choosing the format from the file extension
+    def dump(self, filename):
+        if filename == "-":
+            display_df(self.to_df())
+        elif filename.endswith(".json"):
+            with open(filename, "w") as f:
+                f.write(self.to_json())
+        elif filename.endswith((".prom", ".txt")):
+            with open(filename, "w") as f:
+                f.write(self.to_prometheus())
+        else:
+            self.to_df().to_csv(filename, index=False)
+
+
+def _payload_bytes(value):
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+# The HTTP requests made by the SDK call in progress on this thread
+_calls = threading.local()
+
+
+class _Call:
+    def __init__(self):
+        self.attempts = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+
+# Proxy for the REST client wrapped by the SDK's RetryingRestWrapper, which
+# sees every attempt of a call, so that the retries and the size of each
+# request and response can be recorded against the call in progress
+class _RecordedRestClient:
+    def __init__(self, rest_object):
+        self.rest_object = rest_object
+
+    def __getattr__(self, name):
+        return getattr(self.rest_object, name)
+
+    def request(self, *args, **kwargs):
+        call = getattr(_calls, "call", None)
+        if call is not None:
+            # The SDK passes method, url, query_params, headers and body in that order
+            body = kwargs["body"] if "body" in kwargs else (args[4] if len(args) > 4 else None)
+            call.attempts += 1
+            call.request_bytes += _payload_bytes(body)
+        try:
+            response = self.rest_object.request(*args, **kwargs)
+        except Exception as e:
+            if call is not None:
+                call.response_bytes += _payload_bytes(getattr(e, "body", None))
+            raise
+        if call is not None:
+            call.response_bytes += _payload_bytes(getattr(response, "data", None))
+        return response
+
+
+# Copy an api client with a recording proxy under its retrying REST client.
+# The copies share the connection pool of the original, which is left as it
+# was so that code using it elsewhere is not recorded
+def _recorded_client(api_client):
+    rest_client = copy.copy(api_client.rest_client)
+    rest_client.rest_object = _RecordedRestClient(rest_client.rest_object)
+    recorded = copy.copy(api_client)
+    recorded.rest_client = rest_client
+    return recorded
+
+
+# Return a copy of an SDK api object which makes its requests through a
+# recording copy of its api client, or the api itself if it has no client
+def _record_requests(api, stats):
+    for attribute in ("sync_api_client", "api_client"):
+        api_client = getattr(api, attribute, None)
+        if getattr(getattr(api_client, "rest_client", None), "rest_object", None) is not None:
+            api = copy.copy(api)
+            setattr(api, attribute, stats._recorded_client(api_client))
+            break
+    return api
+
+
+# Proxy for an SDK api object which records each method call
+class _RecordedApi:
+    def __init__(self, api, stats):
+        self._api = api
+        self._stats = stats
+        self._name = type(api).__name__
+
+    def __getattr__(self, name):
+        attribute = getattr(self._api, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        endpoint = "{}.{}".format(self._name, name)
+
+        @functools.wraps(attribute)
+        def recorded(*args, **kwargs):
+            outer = getattr(_calls, "call", None)
+            call = _calls.call = _Call()
+            start = time.time()
+            begin = time.perf_counter()
+            try:
+                result = attribute(*args, **kwargs)
+            except Exception as e:
+                self._stats.record(
+                    endpoint,
+                    getattr(e, "status", None) or 0,
+                    time.perf_counter() - begin,
+                    request_bytes=call.request_bytes,
+                    # Without a recorded request the size is taken from the error's body
+                    response_bytes=call.response_bytes if call.attempts else _payload_bytes(getattr(e, "body", None)),
+                    retries=max(call.attempts - 1, 0),
+                    start=start,
+                )
+                raise
+            finally:
+                _calls.call = outer
+            self._stats.record(
+                endpoint,
+                getattr(result, "status_code", None) or 200,
+                time.perf_counter() - begin,
+                request_bytes=call.request_bytes,
+                # Without a recorded request the size is taken from the raw data of the response
+                response_bytes=call.response_bytes if call.attempts else _payload_bytes(getattr(result, "raw_data", None)),
+                retries=max(call.attempts - 1, 0),
+                start=start,
+            )
+            return result
+
+        return recorded
+
+
+class StatsApiFactory(SyncApiClientFactory):
+    """
+    Wraps an api factory so that every call made through the apis it builds is recorded in a CallStats
+    """
+
+    def __init__(self, api_factory, stats):
+        # SyncApiClientFactory.__init__ loads a configuration and opens a new api client, instead the state it would
+        # set up is taken from the wrapped factory
+        self.api_factory = api_factory
+        self.stats = stats
+        self.configuration = getattr(api_factory, "configuration", None)
+
+    def __enter__(self):
+        self.api_factory.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self.api_factory.__exit__(exc_type, exc_value, traceback)
+
+    def build(self, api):  # type: ignore[override]
+        return self.stats.wrap(self.api_factory.build(api))
+
+    def get_api_client(self):
+        return self.api_factory.get_api_client()
+
+    def get_api_configuration(self):
+        return self.api_factory.get_api_configuration()
+
+    def __getattr__(self, name):
+        # e.g. get_api_client, or the dump_stats of an lpt connection
+        if name == "api_factory":
+            raise AttributeError(name)
+        return getattr(self.api_factory, name)
@@ -1 +1,17 @@
-from finbourne_sdk_utils.pandas_utils.lusid_pandas import lusid_response_to_data_frame as lusid_response_to_data_frame
+from typing import TYPE_CHECKING
+
+from finbourne_sdk_utils._lazy import attach
+
+# The functions are imported from lusid_pandas when first used, see finbourne_sdk_utils._lazy
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submodules=["lusid_pandas"],
+    attributes={
+        "lusid_response_to_data_frame": "finbourne_sdk_utils.pandas_utils.lusid_pandas",
+        "models_to_data_frame": "finbourne_sdk_utils.pandas_utils.lusid_pandas",
+    },
+)
+
+if TYPE_CHECKING:
+    from finbourne_sdk_utils.pandas_utils.lusid_pandas import lusid_response_to_data_frame as lusid_response_to_data_frame
+    from finbourne_sdk_utils.pandas_utils.lusid_pandas import models_to_data_frame as models_to_data_frame
@@ -1,10 +1,277 @@
+import functools
+import re
+from enum import Enum
+import numpy as np
 import pandas as pd
 from flatten_json import flatten
 import logging
 from typing import Any
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
 
 logger = logging.getLogger()
 
+_PRIMITIVES = (str, int, float, bool)
+
+
+class _ModelPlan:
+    """
+    The fields of a generated LUSID model in the order, and under the names, that its to_dict() method emits them.
+    The fields and their aliases come from the model's schema. The nullable fields, which to_dict() keeps when they
+    are explicitly set to None, are those it emits for an instance with every field set to None. The read only fields,
+    which to_dict() leaves out, are found by comparing its output with model_dump() the first time each field has a
+    value.
+    """
+
+    def __init__(self, model_class):
+        self.fields = [
+            (name, field.alias or name)
+            for name, field in model_class.model_fields.items()
+            if name != "additional_properties"
+        ]
+        self.additional_properties = "additional_properties" in model_class.model_fields
+
+        emitted = model_class.model_construct(**dict.fromkeys(model_class.model_fields)).to_dict()
+        self.nullable = [(name, alias) for name, alias in self.fields if alias in emitted]
+        self.unchecked = {name for name, _ in self.fields}
+        self.version = 0
+
+    def check(self, model):
+        # Compare the fields which have a value for the first time with the output of to_dict(), dropping any it
+        # leaves out. Empty lists and dictionaries are not compared as to_dict() leaves out some of them
+        attributes = model.__dict__
+        present = [name for name in self.unchecked if _has_value(attributes[name])]
+        emitted = model.to_dict()
+        dumped = model.model_dump(by_alias=True, exclude_none=True)
+        aliases = dict(self.fields)
+        excluded = {name for name in present if aliases[name] in dumped and aliases[name] not in emitted}
+        self.unchecked.difference_update(present)
+        self.fields = [(name, alias) for name, alias in self.fields if name not in excluded]
+        self.version += 1
+
+
+def _has_value(value):
+    return value is not None and not (isinstance(value, (list, dict)) and len(value) == 0)
+
+
+@functools.lru_cache(maxsize=None)
+def _model_plan(model_class):
+    try:
+        return _ModelPlan(model_class)
+    except Exception:
+        # The model doesn't behave like a generated LUSID model, so it is flattened from its dictionary instead
+        return None
+
+
+# The columns of properties and sub-holding keys, which are keyed by "domain/scope/code", that rename_properties drops
+# as metadata and that it renames to show the property's code and scope
+_PIVOTED = re.compile(r"^(properties|sub_holding_keys|subHoldingKeys)\.")
+_METADATA = re.compile(r"(key|metric_value|metricValue|effective_from|effectiveFrom)$")
+_VALUES = re.compile(r"(label_value|labelValue|value\.(metric_value|metricValue)\.value)$")
+
+
+def _pivot_column(column):
+    """
+    The name of a column once the properties and sub-holding keys are pivoted, None if the column is dropped
+
+    e.g. sub_holding_keys.Transaction/MultiAssetScope/PortionSubClass.value.label_value becomes
+    PortionSubClass(MultiAssetScope-SubHoldingKeys), the suffix is the title cased name of the field so the
+    subHoldingKeys alias gives a "Subholdingkeys" suffix
+    """
+    match = _PIVOTED.match(column)
+    if match is None:
+        return column
+    if _METADATA.search(column):
+        return None
+    if not _VALUES.search(column) or "/" not in column:
+        return column
+
+    # The property code is after the second "/" and the scope is between the first and second "/"
+    code = column[column.rfind("/") + 1 :]
+    code = code[: code.find(".")]
+    scope = column[column.find("/") + 1 : column.rfind("/")]
+    suffix = match.group(1).title().replace("_", "")
+    return f"{code}({scope}-{suffix})"
+
+
+class _ColumnarFlattener:
+    """
+    Flattens LUSID models straight into column arrays, giving the same columns as flattening each model's to_dict()
+    with a "." separator without building the intermediate dictionaries. When pivot is set the properties and
+    sub-holding keys are written straight to their renamed columns and their metadata is left out.
+    """
+
+    def __init__(self, pivot=False):
+        self.pivot = pivot
+        self.columns = {}
+        self.names = {}
+        self.outputs = {}
+        self.layouts = {}
+        self.row = 0
+
+    def name(self, prefix, key):
+        # Index the column names by their prefix and key so that the names of properties, sub-holding keys and
+        # list items are only built once
+        try:
+            return self.names[(prefix, key)]
+        except KeyError:
+            name = self.names[(prefix, key)] = key if prefix is None else f"{prefix}.{key}"
+            return name
+
+    def output(self, column):
+        # The column a value is written to, indexed so that each property and sub-holding key is only pivoted once
+        if not self.pivot:
+            return column
+        try:
+            return self.outputs[column]
+        except KeyError:
+            output = self.outputs[column] = _pivot_column(column)
+            return output
+
+    def layout(self, model_class, prefix):
+        # The plan of a model class with the column names for each of its fields under the given prefix, built again
+        # each time the plan is checked. False if the model is flattened from its dictionary instead
+        layout = self.layouts.get((model_class, prefix))
+        if layout is not None and (layout is False or layout[1] == layout[0].version):
+            return layout
+
+        plan = _model_plan(model_class)
+        if plan is None:
+            layout = False
+        else:
+            nullable = {name for name, _ in plan.nullable}
+            fields = []
+            for name, alias in plan.fields:
+                column = self.name(prefix, alias)
+                fields.append((name, column, self.output(column), name in nullable, name in plan.unchecked))
+            layout = (
+                plan,
+                plan.version,
+                fields,
+                [(name, self.name(prefix, alias)) for name, alias in plan.nullable],
+                # A field which to_dict() leaves out is still kept when it is explicitly set to None
+                len(nullable - {name for name, _ in plan.fields}) > 0,
+                plan.additional_properties,
+            )
+        self.layouts[(model_class, prefix)] = layout
+        return layout
+
+    def emit(self, column, value):
+        column = self.output(column)
+        if column is None:
+            return
+        try:
+            self.columns[column][self.row] = value
+        except KeyError:
+            self.columns[column] = {self.row: value}
+
+    def add(self, model):
+        self.flatten_model(model, None)
+        self.row += 1
+
+    def flatten_model(self, model, prefix):
+        layout = self.layout(type(model), prefix)
+        if layout is False:
+            for key, value in flatten(model.to_dict(), ".").items():
+                self.emit(self.name(prefix, key), value)
+            return
+
+        plan, _, fields, nullable, unset, additional_properties = layout
+        attributes = model.__dict__
+        columns = self.columns
+        row = self.row
+        for name, column, output, is_nullable, unchecked in fields:
+            value = attributes[name]
+            if value is None:
+                unset = unset or is_nullable
+            elif unchecked and _has_value(value):
+                # The first value of the field, once the plan is checked the model is flattened again with its new
+                # layout, writing the same values over any already written
+                plan.check(model)
+                return self.flatten_model(model, prefix)
+            elif type(value) in _PRIMITIVES:
+                if output is None:
+                    continue
+                try:
+                    columns[output][row] = value
+                except KeyError:
+                    columns[output] = {row: value}
+            else:
+                self.flatten_value(value, column)
+
+        if additional_properties and model.additional_properties:
+            for key, value in model.additional_properties.items():
+                self.flatten_value(to_jsonable_python(value), self.name(prefix, key))
+
+        if unset:
+            fields_set = model.model_fields_set
+            for name, column in nullable:
+                if attributes[name] is None and name in fields_set:
+                    self.emit(column, None)
+
+    def flatten_value(self, value, column):
+        # Enums are checked first as the string enums of the models are also instances of str
+        if isinstance(value, Enum):
+            self.emit(column, value.value)
+        elif isinstance(value, _PRIMITIVES):
+            self.emit(column, value)
+        elif isinstance(value, BaseModel):
+            self.flatten_model(value, column)
+        elif isinstance(value, dict):
+            if len(value) == 0:
+                self.emit(column, {})
+            for key, item in value.items():
+                if item is not None:
+                    self.flatten_value(item, self.name(column, key))
+        elif isinstance(value, (list, tuple)):
+            if len(value) == 0:
+                self.emit(column, [])
+            for index, item in enumerate(value):
+                self.flatten_value(item, self.name(column, str(index)))
+        else:
+            self.emit(column, to_jsonable_python(value))
+
+    def to_data_frame(self):
+        data = {}
+        for column, values in self.columns.items():
+            if len(values) == self.row:
+                data[column] = list(values.values())
+            else:
+                filled = [np.nan] * self.row
+                for row, value in values.items():
+                    filled[row] = value
+                data[column] = filled
+        return pd.DataFrame(data, index=pd.RangeIndex(self.row))
+
+
+def models_to_data_frame(models, rename_properties: bool = False) -> pd.DataFrame:
+    """
+    Flattens LUSID models into a DataFrame with one row per model and a column for each nested field, using "." to
+    separate the levels of nesting. This gives the same DataFrame as flattening the to_dict() of each model.
+
+    Parameters
+    ----------
+    models : iterable
+        The LUSID models to flatten
+    rename_properties : bool
+        Whether to pivot the properties and sub-holding keys, leaving out their metadata columns and naming each of
+        their value columns after the property's code and scope e.g. "Name(default-Properties)"
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+
+    flattener = _ColumnarFlattener(pivot=rename_properties)
+    for model in models:
+        if isinstance(model, BaseModel):
+            flattener.add(model)
+        else:
+            for key, value in flatten(model.to_dict(), ".").items():
+                flattener.emit(key, value)
+            flattener.row += 1
+    return flattener.to_data_frame()
+
 
 def lusid_response_to_data_frame(
     lusid_response: Any, rename_properties: bool = False, column_name_mapping: dict | None = None
@@ -52,17 +319,13 @@ def lusid_response_to_data_frame(
         if not hasattr(first_item_type, "to_dict"):
             raise TypeError("All object items in list must have a to_dict() method")
 
-        response_df = pd.DataFrame(
-            flatten(value.to_dict(), ".") for value in lusid_response
-        )
+        response_df = models_to_data_frame(lusid_response, rename_properties)
 
     # Check if lusid_response has a values attribute with data type of list
 
     elif hasattr(lusid_response, "values") and isinstance(getattr(lusid_response, "values"), list):
 
-        response_df = pd.DataFrame(
-            flatten(value.to_dict(), ".") for value in getattr(lusid_response, "values")
-        )
+        response_df = models_to_data_frame(getattr(lusid_response, "values"), rename_properties)
 
     # Check if response object has to_dict() method
 
@@ -81,47 +344,6 @@ def lusid_response_to_data_frame(
                         the to_dict() method"""
         )
 
-    if rename_properties:
-
-        # Collect columns to drop - these are meta-data columns for properties and sub-holding keys
-        columns_to_drop = list(
-            response_df.filter(
-                regex="(^sub_holding_keys|^properties).*(key$|metric_value$|effective_from$)"
-            ).columns
-        )
-
-        response_df.drop(columns_to_drop, axis=1, inplace=True)
-
-        # Rename the properties and sub-holding keys column to show the property "code" only
-        # Recall the format is "domain/scope/code"
-
-        rename_dict = {}
-
-        columns_to_rename = response_df.filter(
-            regex="(^sub_holding_keys|^properties).*(label_value$|value.metric_value.value$)"
-        ).columns
-
-        for column in columns_to_rename:
-
-            # find the property code substring
-            # The property code should always be displayed after the second "/"
-            # Example: sub_holding_keys.Transaction/MultiAssetScope/PortionSubClass.value.label_value
-            property_code = str(column[(column.rfind("/") + 1) :])[
-                : column[(column.rfind("/") + 1) :].find(".")
-            ]
-
-            # find the property scope substring
-            scope_string = column[(column.find("/") + 1) : (column.rfind("/"))]
-
-            # find the property or SHK suffix
-            p_or_shk = column[: column.find(".")].title().replace("_", "")
-
-            rename_dict[column] = (
-                property_code + "(" + scope_string + "-" + p_or_shk + ")"
-            )
-
-        response_df.rename(columns=rename_dict, inplace=True)
-
     if column_name_mapping:
 
         response_df.rename(columns=column_name_mapping, inplace=True)
@@ -0,0 +1,165 @@
+"""
+Benchmarks of the time taken to import finbourne_sdk_utils, for the short lived processes which pay it on every run.
+
+Each statement is run in a fresh interpreter with python -X importtime and the import time it adds to the interpreter's
+own startup is reported, along with the number of modules imported and whether the heavy dependencies were among them
+e.g.
+
+    python -m tests.benchmarks.bench_import --repeat 5 --output results.json
+
+Passing --baseline with the output of an earlier run fails if any statement has become slower than the tolerance allows.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+import pandas as pd
+
+STATEMENTS = [
+    "import finbourne_sdk_utils",
+    "from finbourne_sdk_utils.logger import LusidLogger",
+    "from finbourne_sdk_utils.lpt import to_df",
+    "from finbourne_sdk_utils.pandas_utils import lusid_response_to_data_frame",
+    "from finbourne_sdk_utils.extract import get_holdings_for_group",
+    "from finbourne_sdk_utils.cocoon import load_from_data_frame",
+    "from finbourne_sdk_utils.jupyter_tools import StopExecution",
+]
+
+# The dependencies which dominate the import time when they are imported
+HEAVY_MODULES = ["finbourne.sdk.services.lusid", "pandas", "IPython", "coloredlogs"]
+
+
+def parse_importtime(output: str) -> list:
+    """
+    Parses the output of python -X importtime
+
+    Parameters
+    ----------
+    output : str
+        The output written to stderr
+
+    Returns
+    -------
+    list[tuple[str, int, int]]
+        The name of each module imported, in order, with its nesting depth and cumulative import time in microseconds
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), depth, int(cumulative)))
+    return imports
+
+
+def _importtime(statement: str) -> list:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def measure(statement: str, repeat: int = 5) -> dict:
+    """
+    Measures the import time a statement adds to the startup of a fresh interpreter
+
+    Parameters
+    ----------
+    statement : str
+        The statement to run e.g. "import finbourne_sdk_utils"
+    repeat : int
+        The number of interpreters to run the statement in, the median time is reported
+
+    Returns
+    -------
+    dict
+        The median import time in milliseconds, the number of modules imported and which heavy modules were imported
+    """
+    totals = []
+    for _ in range(max(1, repeat)):
+        # The modules imported by the interpreter at startup, such as site, are measured by running an empty statement
+        startup = {name for name, _, _ in _importtime("pass")}
+        imports = [(name, depth, cumulative) for name, depth, cumulative in _importtime(statement) if name not in startup]
+        totals.append(sum(cumulative for _, depth, cumulative in imports if depth == 0))
+
+    names = {name for name, _, _ in imports}
+    result = {
+        "statement": statement,
+        "import_ms": statistics.median(totals) / 1000,
+        "modules": len(names),
+    }
+    for module in HEAVY_MODULES:
+        result[module] = module in names
+    return result
+
+
+def compare_to_baseline(results: pd.DataFrame, baseline: pd.DataFrame, tolerance: float) -> pd.DataFrame:
+    """
+    Compares the import time of each statement against a baseline
+
+    Parameters
+    ----------
+    results : pd.DataFrame
+        The results of this run
+    baseline : pd.DataFrame
+        The results of an earlier run
+    tolerance : float
+        The fraction by which the import time may grow before it is counted as a regression
+
+    Returns
+    -------
+    pd.DataFrame
+        The statements which have regressed, with their baseline and current import times
+    """
+    merged = results.merge(baseline, on="statement", suffixes=("", "_baseline"))
+    merged["change"] = merged["import_ms"] / merged["import_ms_baseline"] - 1
+    regressed = merged[merged["change"] > tolerance]
+    return regressed[["statement", "import_ms_baseline", "import_ms", "change"]].reset_index(drop=True)
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark the time taken to import finbourne_sdk_utils")
+    parser.add_argument("--statements", nargs="+", default=STATEMENTS, help="the import statements to time")
+    parser.add_argument("--repeat", type=int, default=5, help="the number of interpreters to run each statement in")
+    parser.add_argument("--output", help="write the results to a .json or .csv file")
+    parser.add_argument("--baseline", help="the .json results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="the allowed growth in import time")
+    return parser.parse_args(args)
+
+
+def main(args=None) -> int:
+    args = parse_args(args)
+
+    results = [measure(statement, args.repeat) for statement in args.statements]
+
+    df = pd.DataFrame(results)
+    with pd.option_context("display.max_columns", None, "display.width", 200, "display.max_colwidth", 80):
+        print(df.round(1).to_string(index=False))
+
+    if args.output is not None:
+        if args.output.endswith(".csv"):
+            df.to_csv(args.output, index=False)
+        else:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressed = compare_to_baseline(df, pd.DataFrame(json.load(f)), args.tolerance)
+        if len(regressed) > 0:
+            print("\nRegressions against the baseline:")
+            print(regressed.to_string(index=False))
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
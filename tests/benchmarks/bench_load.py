@@ -0,0 +1,244 @@
+"""
+End to end benchmarks of load_from_data_frame against a simulated LUSID.
+
+Each file type in domain_settings.json is loaded from a synthetic DataFrame into a SimulatedApiFactory and the rows per
+second, peak resident memory and time spent in each phase of the load are reported e.g.
+
+    python -m tests.benchmarks.bench_load --rows 10000 --latency 0.05 --jitter 0.02 --output results.json
+
+Passing --baseline with the output of an earlier run fails if any file type has become slower than the tolerance allows.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+from finbourne_sdk_utils.cocoon.cocoon import load_from_data_frame
+from finbourne_sdk_utils.cocoon.spans import InMemorySpanSink
+from tests.benchmarks.load_scenarios import build_scenario, file_types
+from tests.benchmarks.simulated_api_factory import SimulatedApiFactory
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+PHASES = [
+    "validation",
+    "nested_mapping",
+    "column_validation",
+    "normalization",
+    "property_definitions",
+    "batch_planning",
+    "sub_holding_keys",
+    "model_conversion",
+    "upload",
+    "sync_batch",
+    "unmatched_items",
+]
+
+
+def peak_rss_mb() -> float | None:
+    """
+    Returns the peak resident memory of this process in megabytes, or None where it can not be measured
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_benchmark(
+    file_type: str,
+    rows: int = 1000,
+    portfolios: int = 10,
+    dates: int = 5,
+    property_width: int = 5,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    threads: int = 5,
+    batch_size: int | None = None,
+    repeat: int = 1,
+    seed: int = 0,
+) -> dict:
+    """
+    Loads a synthetic DataFrame of the file type into a simulated LUSID and measures the load
+
+    Parameters
+    ----------
+    file_type : str
+        The file type to load
+    rows : int
+        The number of rows to load
+    portfolios : int
+        The number of portfolios the rows are spread across
+    dates : int
+        The number of effective dates the rows are spread across
+    property_width : int
+        The number of property columns
+    latency : float
+        The mean latency of each simulated call in seconds
+    jitter : float
+        The maximum random variation in the latency of each call in seconds
+    error_rate : float
+        The fraction of simulated writes which fail
+    threads : int
+        The number of threads load_from_data_frame may use
+    batch_size : int | None
+        The batch size to load with, defaults to that of the file type
+    repeat : int
+        The number of times to run the load, the fastest run is reported along with the median
+    seed : int
+        The seed for the synthetic data and the simulated latency and errors
+
+    Returns
+    -------
+    dict
+        The measurements of the load
+    """
+    scenario = build_scenario(
+        file_type, rows=rows, portfolios=portfolios, dates=dates, property_width=property_width, seed=seed
+    )
+
+    runs = []
+    for _ in range(max(1, repeat)):
+        api_factory = SimulatedApiFactory(latency=latency, jitter=jitter, error_rate=error_rate, seed=seed)
+        sink = InMemorySpanSink()
+
+        start = time.perf_counter()
+        responses = load_from_data_frame(
+            api_factory=api_factory,
+            scope="benchmark",
+            batch_size=batch_size,
+            thread_pool_max_workers=threads,
+            span_sink=sink,
+            **scenario,
+        )
+        seconds = time.perf_counter() - start
+
+        runs.append((seconds, responses[f"{file_type}s"], api_factory, sink.summary()))
+
+    seconds, response, api_factory, summary = min(runs, key=lambda run: run[0])
+
+    result = {
+        "file_type": file_type,
+        "rows": rows,
+        "seconds": seconds,
+        "median_seconds": statistics.median(run[0] for run in runs),
+        "rows_per_sec": rows / seconds if seconds > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "calls": sum(api_factory.calls.values()),
+        "errors": len(response["errors"]),
+    }
+    for phase in PHASES:
+        result[f"{phase}_s"] = summary.get(phase, {}).get("duration", 0.0)
+
+    return result
+
+
+def _run_isolated(kwargs):
+    # Each file type runs in a fresh process so that its peak memory is not hidden by an earlier load
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return executor.submit(run_benchmark, **kwargs).result()
+
+
+def compare_to_baseline(results: pd.DataFrame, baseline: pd.DataFrame, tolerance: float) -> pd.DataFrame:
+    """
+    Compares the rows per second of each file type against a baseline
+
+    Parameters
+    ----------
+    results : pd.DataFrame
+        The results of this run
+    baseline : pd.DataFrame
+        The results of an earlier run
+    tolerance : float
+        The fraction by which the rows per second may fall before it is counted as a regression
+
+    Returns
+    -------
+    pd.DataFrame
+        The file types which have regressed, with their baseline and current rows per second
+    """
+    merged = results.merge(baseline, on="file_type", suffixes=("", "_baseline"))
+    merged["change"] = merged["rows_per_sec"] / merged["rows_per_sec_baseline"] - 1
+    regressed = merged[merged["change"] < -tolerance]
+    return regressed[["file_type", "rows_per_sec_baseline", "rows_per_sec", "change"]].reset_index(drop=True)
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark load_from_data_frame against a simulated LUSID")
+    parser.add_argument("--file-types", nargs="+", default=file_types(), help="the file types to load")
+    parser.add_argument("--rows", type=int, default=10000, help="the number of rows to load")
+    parser.add_argument("--portfolios", type=int, default=10, help="the number of portfolios")
+    parser.add_argument("--dates", type=int, default=5, help="the number of effective dates")
+    parser.add_argument("--property-width", type=int, default=5, help="the number of property columns")
+    parser.add_argument("--latency", type=float, default=0.0, help="the latency of each call in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="the random variation in latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="the fraction of writes which fail")
+    parser.add_argument("--threads", type=int, default=5, help="the number of threads to load with")
+    parser.add_argument("--batch-size", type=int, default=None, help="the batch size to load with")
+    parser.add_argument("--repeat", type=int, default=3, help="the number of runs of each load")
+    parser.add_argument("--seed", type=int, default=0, help="the random seed")
+    parser.add_argument("--in-process", action="store_true", help="run every load in this process")
+    parser.add_argument("--output", help="write the results to a .json or .csv file")
+    parser.add_argument("--baseline", help="the .json results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="the allowed fall in rows per second")
+    return parser.parse_args(args)
+
+
+def main(args=None) -> int:
+    args = parse_args(args)
+
+    results = []
+    for file_type in args.file_types:
+        kwargs = dict(
+            file_type=file_type,
+            rows=args.rows,
+            portfolios=args.portfolios,
+            dates=args.dates,
+            property_width=args.property_width,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            threads=args.threads,
+            batch_size=args.batch_size,
+            repeat=args.repeat,
+            seed=args.seed,
+        )
+        results.append(run_benchmark(**kwargs) if args.in_process else _run_isolated(kwargs))
+
+    df = pd.DataFrame(results)
+    with pd.option_context("display.max_columns", None, "display.width", 200):
+        print(df.round(4).set_index("file_type").T.astype(object))
+
+    if args.output is not None:
+        if args.output.endswith(".csv"):
+            df.to_csv(args.output, index=False)
+        else:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressed = compare_to_baseline(df, pd.DataFrame(json.load(f)), args.tolerance)
+        if len(regressed) > 0:
+            print("\nRegressions against the baseline:")
+            print(regressed.to_string(index=False))
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
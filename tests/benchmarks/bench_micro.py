@@ -0,0 +1,378 @@
+"""
+Micro benchmarks of the per row helpers used when loading and extracting data.
+
+Each case times a batch of realistic inputs. So that the stored baseline can be compared across machines the times are
+also recorded relative to a fixed pure Python calibration workload, and it is the relative times which are checked e.g.
+
+    python -m tests.benchmarks.bench_micro
+    python -m tests.benchmarks.bench_micro --update-baseline
+
+A case which is more than --tolerance slower than the baseline is measured again, up to --retries times, and the run
+fails, listing the cases, if any are still slower.
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytz
+from finbourne.sdk.services.lusid.models import (
+    CurrencyAndAmount,
+    ModelProperty,
+    PortfolioHolding,
+    PropertyValue,
+)
+
+from finbourne_sdk_utils import lpt
+from finbourne_sdk_utils.cocoon import instruments, properties, utilities
+from finbourne_sdk_utils.cocoon.dateorcutlabel import DateOrCutLabel
+
+BASELINE = Path(__file__).parent.joinpath("baselines", "micro.json")
+
+
+def _calibration():
+    # A fixed workload of the kind of work the helpers do, string handling and dictionary lookups in pure Python
+    words = {f"key{i}": str(i) for i in range(200)}
+    return sum(len(words[f"key{i % 200}"].upper()) for i in range(2000))
+
+
+def _make_code_lusid_friendly():
+    codes = ["S&P Rating", "moodys_rating", "Prime Broker (Primary)", "Client Internal ID #2", "currency"] * 20
+    return lambda: [utilities.make_code_lusid_friendly(code) for code in codes]
+
+
+def _date_or_cut_label():
+    values = [
+        "2020-01-01",
+        "2020-01-01T10:30:00Z",
+        "2020-01-01T10:30:00.123456+01:00",
+        "2020-01-01N1200",
+        datetime(2020, 1, 1, 10, 30, tzinfo=pytz.UTC),
+        pd.Timestamp("2020-01-01T10:30:00"),
+        np.datetime64("2020-01-01T10:30:00"),
+    ] * 10
+    return lambda: [str(DateOrCutLabel(value)) for value in values]
+
+
+def _camel_case_to_pep_8():
+    names = ["instrumentIdentifiers", "totalConsideration", "transactionPrice", "subHoldingKeys", "units"] * 20
+    return lambda: [utilities.camel_case_to_pep_8(name) for name in names]
+
+
+def _expand_dictionary():
+    mapping = {
+        "quote_id.effective_at": "date",
+        "quote_id.quote_series_id.provider": "$Client",
+        "quote_id.quote_series_id.instrument_id": "figi",
+        "quote_id.quote_series_id.instrument_id_type": "$Figi",
+        "quote_id.quote_series_id.quote_type": "$Price",
+        "quote_id.quote_series_id.var_field": "$Mid",
+        "metric_value.value": "price",
+        "metric_value.unit": "$GBP",
+    }
+    return lambda: [utilities.expand_dictionary(mapping) for _ in range(20)]
+
+
+def _extract_lusid_model_from_attribute_type():
+    types = ["InstrumentDefinition", "dict(str, ModelProperty)", "dict(str, str)", "list[TaxLot]", "list[str]"] * 20
+    return lambda: [utilities.extract_lusid_model_from_attribute_type(attribute_type) for attribute_type in types]
+
+
+def _property_frame(rows=50):
+    return pd.DataFrame(
+        {
+            "strategy": ["Growth", "Income", "Value", None, "Growth"] * (rows // 5),
+            "trader": ["Alice", "Bob", "Carol", "Dan", "Eve"] * (rows // 5),
+            "fee": [1.5, 2.25, None, 0.0, 10.0] * (rows // 5),
+            "rating": [1, 2, 3, 4, 5] * (rows // 5),
+            "figi": [f"BBG{i:09d}" for i in range(rows)],
+            "isin": [f"GB{i:010d}" for i in range(rows)],
+        }
+    )
+
+
+def _create_property_values():
+    data_frame = _property_frame()[["strategy", "trader", "fee", "rating"]]
+    dtypes = data_frame.dtypes
+    rows = [row for _, row in data_frame.iterrows()]
+    return lambda: [
+        properties.create_property_values(
+            row=row, column_to_scope={}, scope="Operations", domain="Transaction", dtypes=dtypes
+        )
+        for row in rows
+    ]
+
+
+def _create_identifiers():
+    rows = list(_property_frame().iterrows())
+    return lambda: [
+        instruments.create_identifiers(
+            index=index,
+            row=row,
+            file_type="transaction",
+            instrument_identifier_mapping={"Figi": "figi", "Isin": "isin"},
+            unique_identifiers=["Figi", "Isin", "ClientInternal"],
+            full_key_format=True,
+        )
+        for index, row in rows
+    ]
+
+
+def _convert_cell_value_to_string():
+    values = ["text", 1.5, 7, None, ["a", "b"], {"key": "value"}, pd.NaT, True] * 25
+    return lambda: [utilities.convert_cell_value_to_string(value) for value in values]
+
+
+def _to_df():
+    holdings = [
+        (
+            f"LUID_{i:08d}",
+            PortfolioHolding(
+                instrument_uid=f"LUID_{i:08d}",
+                holding_type="P",
+                units=i,
+                settled_units=i,
+                cost=CurrencyAndAmount(amount=i * 10.0, currency="GBP"),
+                cost_portfolio_ccy=CurrencyAndAmount(amount=i * 10.0, currency="GBP"),
+                properties={
+                    "Instrument/default/Name": ModelProperty(
+                        key="Instrument/default/Name", value=PropertyValue(label_value=f"Instrument {i}")
+                    )
+                },
+            ),
+        )
+        for i in range(500)
+    ]
+    objects = [holding for _, holding in holdings]
+    columns = ["instrument_uid", "units", "cost.amount", "cost.currency"]
+    property_columns = ["P:Instrument/default/Name", "P:Instrument/default/Missing"]
+    # Attribute paths are read from the objects themselves, properties from (key, object) pairs
+    return lambda: (lpt.to_df(objects, columns), lpt.to_df(holdings, property_columns))
+
+
+class _Record:
+    openapi_types = {
+        "transaction_id": "str",
+        "units": "float",
+        "total_consideration": "CurrencyAndAmount",
+        "instrument_identifiers": "dict(str, str)",
+        "properties": "dict(str, PerpetualProperty)",
+    }
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class _Model:
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.__dict__.update(kwargs)
+
+
+def _from_df():
+    rows = 500
+    df = pd.DataFrame(
+        {
+            "transaction_id": [f"T{i}" for i in range(rows)],
+            "units": np.arange(rows, dtype=float),
+            "total_consideration.amount": np.arange(rows, dtype=float) * 10,
+            "total_consideration.currency": ["GBP", "USD"] * (rows // 2),
+            "instrument_uid": [f"Figi:BBG{i % 50:09d}" for i in range(rows)],
+            "P:Transaction/default/Broker": ["Alpha", None] * (rows // 2),
+        }
+    )
+    complex_types = {name: _Model for name in ("CurrencyAndAmount", "PerpetualProperty", "PropertyValue", "MetricValue")}
+    return lambda: lpt.from_df(df, _Record, complex_types)
+
+
+# The cases to time, each builds its inputs and returns the function to time
+CASES = {
+    "make_code_lusid_friendly": _make_code_lusid_friendly,
+    "DateOrCutLabel": _date_or_cut_label,
+    "camel_case_to_pep_8": _camel_case_to_pep_8,
+    "expand_dictionary": _expand_dictionary,
+    "extract_lusid_model_from_attribute_type": _extract_lusid_model_from_attribute_type,
+    "create_property_values": _create_property_values,
+    "create_identifiers": _create_identifiers,
+    "convert_cell_value_to_string": _convert_cell_value_to_string,
+    "lpt.to_df": _to_df,
+    "lpt.from_df": _from_df,
+}
+
+
+def measure(function, repeat: int = 5, min_time: float = 0.05) -> float:
+    """
+    Times a function, running it enough times that each measurement takes at least min_time
+
+    Parameters
+    ----------
+    function : Callable
+        The function to time
+    repeat : int
+        The number of measurements to take, the fastest is used as it is the least disturbed by other processes
+    min_time : float
+        The minimum duration of each measurement in seconds
+
+    Returns
+    -------
+    float
+        The time of a single call in seconds
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(cases=None, repeat: int = 5, min_time: float = 0.05) -> dict:
+    """
+    Times each of the cases along with the calibration workload
+
+    Parameters
+    ----------
+    cases : list[str] | None
+        The names of the cases to time, defaults to all of them
+    repeat : int
+        The number of measurements to take of each case
+    min_time : float
+        The minimum duration of each measurement in seconds
+
+    Returns
+    -------
+    dict
+        The calibration time and, for each case, its time in seconds and relative to the calibration
+    """
+    # The calibration is measured between the cases and the fastest measurement used, so that a burst of load on the
+    # machine while it is measured once does not shift every relative time
+    calibrations = [measure(_calibration, repeat, min_time)]
+    seconds = {}
+    for name in cases or CASES:
+        seconds[name] = measure(CASES[name](), repeat, min_time)
+        calibrations.append(measure(_calibration, repeat, min_time))
+
+    calibration = min(calibrations)
+    return {
+        "calibration": calibration,
+        "cases": {name: {"seconds": value, "relative": value / calibration} for name, value in seconds.items()},
+    }
+
+
+def remeasure(results: dict, cases, repeat: int = 5, min_time: float = 0.05) -> dict:
+    """
+    Times the cases again, keeping the faster of the two times, to tell a real regression from a noisy measurement
+
+    Parameters
+    ----------
+    results : dict
+        The results to update
+    cases : list[str]
+        The names of the cases to time again
+    repeat : int
+        The number of measurements to take of each case
+    min_time : float
+        The minimum duration of each measurement in seconds
+
+    Returns
+    -------
+    dict
+        The updated results
+    """
+    calibration = results["calibration"]
+    for name in cases:
+        seconds = min(results["cases"][name]["seconds"], measure(CASES[name](), repeat, min_time))
+        results["cases"][name] = {"seconds": seconds, "relative": seconds / calibration}
+    return results
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> dict:
+    """
+    Finds the cases which are slower than the baseline by more than the tolerance, relative to the calibration
+
+    Parameters
+    ----------
+    results : dict
+        The results of this run
+    baseline : dict
+        The stored baseline results
+    tolerance : float
+        The fraction by which a case may slow down e.g. 0.25 for 25%
+
+    Returns
+    -------
+    dict
+        The slowdown of each regressed case
+    """
+    regressions = {}
+    for name, result in results["cases"].items():
+        if name not in baseline["cases"]:
+            continue
+        change = result["relative"] / baseline["cases"][name]["relative"] - 1
+        if change > tolerance:
+            regressions[name] = change
+    return regressions
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description="Micro benchmarks of the per row helpers")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), help="the cases to run, defaults to all")
+    parser.add_argument("--repeat", type=int, default=5, help="the number of measurements of each case")
+    parser.add_argument("--min-time", type=float, default=0.05, help="the minimum seconds per measurement")
+    parser.add_argument("--baseline", default=str(BASELINE), help="the baseline results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="the allowed slowdown e.g. 0.25 for 25%%")
+    parser.add_argument("--retries", type=int, default=3, help="the times to re-measure a case before failing")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    return parser.parse_args(args)
+
+
+def main(args=None) -> int:
+    args = parse_args(args)
+    results = run(args.cases, args.repeat, args.min_time)
+
+    baseline = None
+    if Path(args.baseline).exists():
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        # The baseline is the faster of two measurements, as a regression run gets more than one attempt at each case
+        results = remeasure(results, list(results["cases"]), args.repeat, args.min_time)
+    elif baseline is not None:
+        for _ in range(args.retries):
+            regressions = compare_to_baseline(results, baseline, args.tolerance)
+            if len(regressions) == 0:
+                break
+            results = remeasure(results, regressions, args.repeat, args.min_time)
+
+    rows = []
+    for name, result in results["cases"].items():
+        row = {"case": name, "microseconds": result["seconds"] * 1e6, "relative": result["relative"]}
+        if baseline is not None and name in baseline["cases"]:
+            row["change"] = result["relative"] / baseline["cases"][name]["relative"] - 1
+        rows.append(row)
+    print(pd.DataFrame(rows).round(3).to_string(index=False))
+
+    if args.update_baseline:
+        Path(args.baseline).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        return 0
+
+    if baseline is not None:
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if len(regressions) > 0:
+            print(f"\nREGRESSION: slower than the baseline by more than {args.tolerance:.0%}")
+            for name, change in regressions.items():
+                print(f"  {name}: {change:+.0%}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+import numpy as np
+import pandas as pd
+
+from finbourne_sdk_utils.cocoon.utilities import load_json_file
+
+
+def _dates(count):
+    return [str(date.date()) for date in pd.date_range("2020-01-01", periods=max(1, count), freq="D")]
+
+
+def _properties(data_frame, property_width, rng):
+    """
+    Adds property_width property columns to the frame, alternating between string and numeric values
+    """
+    columns = []
+    for i in range(property_width):
+        column = f"prop_{i}"
+        if i % 2 == 0:
+            data_frame[column] = rng.choice(["Alpha", "Beta", "Gamma", "Delta"], size=len(data_frame))
+        else:
+            data_frame[column] = rng.random(len(data_frame)).round(4)
+        columns.append(column)
+    return columns
+
+
+def _instruments(rows, property_width, rng):
+    data_frame = pd.DataFrame(
+        {
+            "name": [f"Instrument {i}" for i in range(rows)],
+            "figi": [f"BBG{i:09d}" for i in range(rows)],
+            "isin": [f"GB{i:010d}" for i in range(rows)],
+            "client_internal": [f"CI{i}" for i in range(rows)],
+        }
+    )
+    return dict(
+        data_frame=data_frame,
+        mapping_required={"name": "name"},
+        mapping_optional={},
+        identifier_mapping={"Figi": "figi", "Isin": "isin", "ClientInternal": "client_internal"},
+        property_columns=_properties(data_frame, property_width, rng),
+    )
+
+
+def _instrument_properties(rows, property_width, rng):
+    data_frame = pd.DataFrame({"isin": [f"GB{i:010d}" for i in range(rows)]})
+    return dict(
+        data_frame=data_frame,
+        mapping_required={"identifier": "isin", "identifier_type": "$Isin"},
+        mapping_optional={},
+        # An instrument property load needs at least one property
+        property_columns=_properties(data_frame, max(1, property_width), rng),
+    )
+
+
+def _quotes(rows, dates, rng):
+    data_frame = pd.DataFrame(
+        {
+            "figi": [f"BBG{i // max(1, dates):09d}" for i in range(rows)],
+            "date": [_dates(dates)[i % max(1, dates)] for i in range(rows)],
+            "price": rng.random(rows).round(4) * 100,
+        }
+    )
+    return dict(
+        data_frame=data_frame,
+        mapping_required={
+            "quote_id.effective_at": "date",
+            "quote_id.quote_series_id.provider": "$Client",
+            "quote_id.quote_series_id.instrument_id": "figi",
+            "quote_id.quote_series_id.instrument_id_type": "$Figi",
+            "quote_id.quote_series_id.quote_type": "$Price",
+            "quote_id.quote_series_id.var_field": "$Mid",
+        },
+        mapping_optional={"metric_value.value": "price", "metric_value.unit": "$GBP"},
+    )
+
+
+def _transactions(rows, portfolios, dates, property_width, rng):
+    trade_dates = _dates(dates)
+    data_frame = pd.DataFrame(
+        {
+            "portfolio": [f"Port{i % portfolios}" for i in range(rows)],
+            "txn_id": [f"T{i}" for i in range(rows)],
+            "type": rng.choice(["Buy", "Sell"], size=rows),
+            "figi": [f"BBG{i % 1000:09d}" for i in range(rows)],
+            "trade_date": [trade_dates[i % len(trade_dates)] for i in range(rows)],
+            "settle_date": [trade_dates[i % len(trade_dates)] for i in range(rows)],
+            "units": rng.integers(1, 1000, size=rows).astype(float),
+            "price": rng.random(rows).round(4) * 100,
+        }
+    )
+    data_frame["total"] = data_frame["units"] * data_frame["price"]
+    return dict(
+        data_frame=data_frame,
+        mapping_required={
+            "code": "portfolio",
+            "transaction_id": "txn_id",
+            "type": "type",
+            "transaction_date": "trade_date",
+            "settlement_date": "settle_date",
+            "units": "units",
+            "transaction_price.price": "price",
+            "total_consideration.amount": "total",
+            "total_consideration.currency": "$GBP",
+        },
+        mapping_optional={},
+        identifier_mapping={"Figi": "figi"},
+        property_columns=_properties(data_frame, property_width, rng),
+    )
+
+
+def _holdings(rows, portfolios, dates, property_width, rng):
+    effective_dates = _dates(dates)
+    data_frame = pd.DataFrame(
+        {
+            "portfolio": [f"Port{i % portfolios}" for i in range(rows)],
+            "date": [effective_dates[(i // portfolios) % len(effective_dates)] for i in range(rows)],
+            "figi": [f"BBG{i:09d}" for i in range(rows)],
+            "units": rng.integers(1, 1000, size=rows).astype(float),
+        }
+    )
+    return dict(
+        data_frame=data_frame,
+        mapping_required={"code": "portfolio", "effective_at": "date", "tax_lots.units": "units"},
+        mapping_optional={"tax_lots.cost.currency": "$GBP"},
+        identifier_mapping={"Figi": "figi"},
+        property_columns=_properties(data_frame, property_width, rng),
+    )
+
+
+def _portfolios(rows, property_width, rng, reference=False):
+    data_frame = pd.DataFrame({"code": [f"Port{i}" for i in range(rows)]})
+    mapping_required = {"code": "code", "display_name": "code", "created": "$2020-01-01T00:00:00+00:00"}
+    if not reference:
+        mapping_required["base_currency"] = "$GBP"
+    return dict(
+        data_frame=data_frame,
+        mapping_required=mapping_required,
+        mapping_optional={},
+        property_columns=_properties(data_frame, property_width, rng),
+    )
+
+
+def _portfolio_groups(rows, portfolios):
+    data_frame = pd.DataFrame(
+        {
+            "group": [f"Group{i % max(1, rows // max(1, portfolios))}" for i in range(rows)],
+            "scope": "benchmark",
+            "portfolio": [f"Port{i}" for i in range(rows)],
+        }
+    )
+    return dict(
+        data_frame=data_frame,
+        mapping_required={"code": "group", "display_name": "group"},
+        mapping_optional={"values.scope": "scope", "values.code": "portfolio"},
+    )
+
+
+def file_types() -> list:
+    """
+    Returns the file types which can be loaded, as configured in domain_settings.json
+
+    Returns
+    -------
+    list[str]
+        The file types
+    """
+    return list(load_json_file("config/domain_settings.json").keys())
+
+
+def build_scenario(
+    file_type: str,
+    rows: int = 1000,
+    portfolios: int = 10,
+    dates: int = 5,
+    property_width: int = 5,
+    seed: int = 0,
+) -> dict:
+    """
+    Builds a synthetic DataFrame and the mappings needed to load it
+
+    Parameters
+    ----------
+    file_type : str
+        The file type to load, one of those in domain_settings.json
+    rows : int
+        The number of rows in the DataFrame
+    portfolios : int
+        The number of portfolios the rows are spread across, for the portfolio specific file types
+    dates : int
+        The number of distinct effective dates the rows are spread across, for holdings, transactions and quotes
+    property_width : int
+        The number of property columns to add
+    seed : int
+        The seed for the random values
+
+    Returns
+    -------
+    dict
+        The keyword arguments for load_from_data_frame, other than the api factory and scope
+    """
+    rng = np.random.default_rng(seed)
+    portfolios = max(1, min(portfolios, rows))
+
+    if file_type == "instrument":
+        scenario = _instruments(rows, property_width, rng)
+    elif file_type == "instrument_property":
+        scenario = _instrument_properties(rows, property_width, rng)
+    elif file_type == "quote":
+        scenario = _quotes(rows, dates, rng)
+    elif file_type in ("transaction", "transactions_with_commit_mode"):
+        scenario = _transactions(rows, portfolios, dates, property_width, rng)
+        if file_type == "transactions_with_commit_mode":
+            scenario["transactions_commit_mode"] = "Partial"
+    elif file_type == "holding":
+        scenario = _holdings(rows, portfolios, dates, property_width, rng)
+    elif file_type in ("portfolio", "reference_portfolio"):
+        scenario = _portfolios(rows, property_width, rng, reference=file_type == "reference_portfolio")
+    elif file_type == "portfolio_group":
+        scenario = _portfolio_groups(rows, portfolios)
+    else:
+        raise ValueError(f"There is no benchmark scenario for the file type {file_type}")
+
+    scenario["file_type"] = file_type
+    return scenario
@@ -0,0 +1,197 @@
+import random
+import threading
+import time
+from collections import Counter
+from http import HTTPStatus
+from types import SimpleNamespace
+
+from finbourne.sdk.exceptions import ApiException
+from finbourne.sdk.extensions import SyncApiClientFactory
+
+
+class SimulatedApiFactory(SyncApiClientFactory):
+    """
+    A stand-in for the api factory which answers every call made by load_from_data_frame. Each call waits for the
+    configured latency, plus or minus a random jitter, and writes fail with a server error at the configured rate.
+    Responses are kept minimal so that the time measured is spent in cocoon rather than in the stand-in
+    """
+
+    identifier_types = ["Figi", "Isin", "ClientInternal", "LusidInstrumentId"]
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        existing_portfolios: tuple = (),
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = Counter()
+        self.portfolios = {code: self.portfolio("", code) for code in existing_portfolios}
+        self.portfolio_groups = {}
+        self.property_definitions = {}
+
+    def build(self, api):  # type: ignore[override]
+        return self
+
+    def _call(self, endpoint, write=False):
+        with self.lock:
+            self.calls[endpoint] += 1
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            failed = write and self.random.random() < self.error_rate
+
+        if delay > 0:
+            time.sleep(delay)
+
+        if failed:
+            raise ApiException(status=HTTPStatus.INTERNAL_SERVER_ERROR, reason="Simulated error")
+
+    @staticmethod
+    def portfolio(scope, code):
+        return SimpleNamespace(id=SimpleNamespace(scope=scope, code=code))
+
+    # InstrumentsApi
+
+    def get_instrument_identifier_types(self):
+        self._call("get_instrument_identifier_types")
+        return SimpleNamespace(
+            values=[
+                SimpleNamespace(
+                    identifier_type=identifier_type,
+                    property_key=f"Instrument/default/{identifier_type}",
+                    is_unique_identifier_type=True,
+                )
+                for identifier_type in self.identifier_types
+            ]
+        )
+
+    def upsert_instruments(self, scope, request_body):
+        self._call("upsert_instruments", write=True)
+        return SimpleNamespace(values=list(request_body), failed={})
+
+    def upsert_instruments_properties(self, upsert_instrument_property_request):
+        self._call("upsert_instruments_properties", write=True)
+        return SimpleNamespace(as_at_date=None)
+
+    # SearchApi
+
+    def instruments_search(self, instrument_search_property, mastered_only=False):
+        self._call("instruments_search")
+        return [
+            SimpleNamespace(
+                mastered_instruments=[
+                    SimpleNamespace(
+                        identifiers={"LusidInstrumentId": SimpleNamespace(value=f"LUID_{search.value}")}
+                    )
+                ]
+            )
+            for search in instrument_search_property
+        ]
+
+    # PropertyDefinitionsApi
+
+    def get_property_definition(self, domain, scope, code):
+        self._call("get_property_definition")
+        key = f"{domain}/{scope}/{code}"
+        if key not in self.property_definitions:
+            raise ApiException(status=HTTPStatus.NOT_FOUND)
+        return self.property_definitions[key]
+
+    def create_property_definition(self, create_property_definition_request):
+        self._call("create_property_definition")
+        request = create_property_definition_request
+        definition = SimpleNamespace(
+            key=f"{request.domain}/{request.scope}/{request.code}",
+            data_type_id=request.data_type_id,
+        )
+        with self.lock:
+            self.property_definitions[definition.key] = definition
+        return definition
+
+    # QuotesApi
+
+    def upsert_quotes(self, scope, request_body):
+        self._call("upsert_quotes", write=True)
+        return SimpleNamespace(values=list(request_body), failed={})
+
+    # TransactionPortfoliosApi
+
+    def upsert_transactions(self, scope, code, transaction_request):
+        self._call("upsert_transactions", write=True)
+        return SimpleNamespace(version=None, href=None)
+
+    def batch_upsert_transactions(self, scope, code, success_mode, request_body):
+        self._call("batch_upsert_transactions", write=True)
+        return SimpleNamespace(values=list(request_body), failed={})
+
+    def set_holdings(self, scope, code, effective_at, adjust_holding_request):
+        self._call("set_holdings", write=True)
+        return SimpleNamespace(version=None, href=None)
+
+    def adjust_holdings(self, scope, code, effective_at, adjust_holding_request):
+        self._call("adjust_holdings", write=True)
+        return SimpleNamespace(version=None, href=None)
+
+    def get_details(self, scope, code):
+        self._call("get_details")
+        return SimpleNamespace(sub_holding_keys=[])
+
+    def patch_portfolio_details(self, scope, code, operation):
+        self._call("patch_portfolio_details", write=True)
+
+    def create_portfolio(self, scope, create_transaction_portfolio_request):
+        self._call("create_portfolio", write=True)
+        portfolio = self.portfolio(scope, create_transaction_portfolio_request.code)
+        with self.lock:
+            self.portfolios[portfolio.id.code] = portfolio
+        return portfolio
+
+    # ReferencePortfolioApi
+
+    def create_reference_portfolio(self, scope, create_reference_portfolio_request):
+        self._call("create_reference_portfolio", write=True)
+        portfolio = self.portfolio(scope, create_reference_portfolio_request.code)
+        with self.lock:
+            self.portfolios[portfolio.id.code] = portfolio
+        return portfolio
+
+    # PortfoliosApi
+
+    def list_portfolios_for_scope(self, scope, limit=None, page=None):
+        self._call("list_portfolios_for_scope")
+        return SimpleNamespace(values=list(self.portfolios.values()), next_page=None)
+
+    def get_portfolio(self, scope, code):
+        self._call("get_portfolio")
+        if code not in self.portfolios:
+            raise ApiException(status=HTTPStatus.NOT_FOUND)
+        return self.portfolios[code]
+
+    # PortfolioGroupsApi
+
+    def get_portfolio_group(self, scope, code):
+        self._call("get_portfolio_group")
+        if code not in self.portfolio_groups:
+            raise ApiException(status=HTTPStatus.NOT_FOUND)
+        return self.portfolio_groups[code]
+
+    def create_portfolio_group(self, scope, create_portfolio_group_request):
+        self._call("create_portfolio_group", write=True)
+        request = create_portfolio_group_request
+        group = SimpleNamespace(
+            id=SimpleNamespace(scope=scope, code=request.code), portfolios=list(request.values or [])
+        )
+        with self.lock:
+            self.portfolio_groups[request.code] = group
+        return group
+
+    def add_portfolio_to_group(self, scope, code, effective_at, resource_id):
+        self._call("add_portfolio_to_group", write=True)
+        group = self.portfolio_groups[code]
+        group.portfolios.append(resource_id)
+        return group
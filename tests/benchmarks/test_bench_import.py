@@ -0,0 +1,30 @@
+import pandas as pd
+
+from tests.benchmarks.bench_import import compare_to_baseline, measure, parse_importtime
+
+
+class TestBenchImport:
+    def test_parse_importtime(self):
+        output = "\n".join(
+            [
+                "import time: self [us] | cumulative | imported package",
+                "import time:       100 |        100 |   finbourne_sdk_utils._lazy",
+                "import time:        50 |        150 | finbourne_sdk_utils",
+            ]
+        )
+
+        assert parse_importtime(output) == [("finbourne_sdk_utils._lazy", 1, 100), ("finbourne_sdk_utils", 0, 150)]
+
+    def test_importing_the_package_is_light(self):
+        result = measure("import finbourne_sdk_utils", repeat=1)
+
+        assert result["import_ms"] > 0
+        assert not any(result[module] for module in ["finbourne.sdk.services.lusid", "pandas", "IPython"])
+
+    def test_regressions_against_a_baseline(self):
+        baseline = pd.DataFrame([{"statement": "import a", "import_ms": 10.0}, {"statement": "import b", "import_ms": 10.0}])
+        results = pd.DataFrame([{"statement": "import a", "import_ms": 12.0}, {"statement": "import b", "import_ms": 30.0}])
+
+        regressed = compare_to_baseline(results, baseline, tolerance=0.5)
+
+        assert list(regressed["statement"]) == ["import b"]
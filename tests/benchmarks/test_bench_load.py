@@ -0,0 +1,38 @@
+import json
+
+import pandas as pd
+import pytest
+
+from tests.benchmarks.bench_load import compare_to_baseline, main, run_benchmark
+from tests.benchmarks.load_scenarios import file_types
+
+
+class TestBenchLoad:
+    @pytest.mark.parametrize("file_type", file_types())
+    def test_every_file_type_loads(self, file_type):
+        result = run_benchmark(file_type, rows=20, portfolios=4, dates=2, property_width=2)
+
+        assert result["errors"] == 0
+        assert result["rows_per_sec"] > 0
+        assert result["calls"] > 0
+        assert result["model_conversion_s"] > 0
+
+    def test_simulated_errors_are_reported(self):
+        result = run_benchmark("quote", rows=20, batch_size=1, error_rate=1.0)
+
+        assert result["errors"] == 20
+
+    def test_regressions_against_a_baseline(self, tmp_path):
+        output = tmp_path / "results.json"
+
+        assert main(["--file-types", "instrument", "--rows", "10", "--repeat", "1", "--in-process", "--output", str(output)]) == 0
+        assert main(["--file-types", "instrument", "--rows", "10", "--repeat", "1", "--in-process", "--baseline", str(output), "--tolerance", "1"]) == 0
+
+        results = json.loads(output.read_text())
+        regressed = compare_to_baseline(
+            pd.DataFrame([{"file_type": "instrument", "rows_per_sec": results[0]["rows_per_sec"] / 20}]),
+            pd.DataFrame(results),
+            tolerance=0.2,
+        )
+
+        assert list(regressed["file_type"]) == ["instrument"]
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from tests.benchmarks.bench_micro import BASELINE, CASES, compare_to_baseline, main
+
+
+class TestBenchMicro:
+    @pytest.mark.parametrize("name", list(CASES))
+    def test_every_case_runs(self, name):
+        CASES[name]()()
+
+    def test_baseline_covers_every_case(self):
+        baseline = json.loads(BASELINE.read_text())
+
+        assert set(baseline["cases"]) == set(CASES)
+
+    def test_regressions_against_a_baseline(self, tmp_path):
+        baseline = tmp_path / "baseline.json"
+        arguments = ["--cases", "make_code_lusid_friendly", "--repeat", "1", "--min-time", "0.001", "--baseline", str(baseline)]
+
+        assert main(arguments + ["--update-baseline"]) == 0
+        assert main(arguments + ["--tolerance", "10"]) == 0
+
+        # A baseline ten times faster than the code is always a regression, however often the case is measured
+        results = json.loads(baseline.read_text())
+        results["cases"]["make_code_lusid_friendly"]["relative"] /= 10
+        baseline.write_text(json.dumps(results))
+
+        assert main(arguments + ["--retries", "1"]) == 1
+
+    def test_compare_to_baseline(self):
+        baseline = {"cases": {"a": {"relative": 1.0}, "b": {"relative": 1.0}}}
+        results = {"cases": {"a": {"relative": 1.2}, "b": {"relative": 1.5}, "c": {"relative": 9.0}}}
+
+        regressions = compare_to_baseline(results, baseline, tolerance=0.25)
+
+        assert list(regressions) == ["b"]
+        assert regressions["b"] == pytest.approx(0.5)
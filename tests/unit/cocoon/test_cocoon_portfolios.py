@@ -0,0 +1,162 @@
+from types import SimpleNamespace
+
+import finbourne.sdk.services.lusid as lusid
+from finbourne.sdk.exceptions import ApiException
+from finbourne.sdk.extensions import SyncApiClientFactory
+import pandas as pd
+import pytest
+
+from finbourne_sdk_utils import cocoon
+from finbourne_sdk_utils.lpt import CallStats
+
+
+class MockPortfoliosApiFactory(SyncApiClientFactory):
+    """
+    A mock api factory which serves a scope of existing portfolios over several pages and records any creations
+    """
+
+    def __init__(self, existing_codes: list, page_size: int = 2):
+        self.existing_codes = existing_codes
+        self.page_size = page_size
+        self.list_calls = 0
+        self.get_calls = 0
+        self.created = []
+
+    def build(self, api):  # type: ignore[override]
+        if api == lusid.InstrumentsApi:
+            return SimpleNamespace(
+                get_instrument_identifier_types=lambda: SimpleNamespace(values=[])
+            )
+        return self
+
+    @staticmethod
+    def portfolio(scope, code):
+        return lusid.Portfolio(
+            id=lusid.ResourceId(scope=scope, code=code),
+            type="Transaction",
+            display_name=code,
+            created="2020-01-01T00:00:00+00:00",
+            links=[],
+        )
+
+    def list_portfolios_for_scope(self, scope, limit=None, page=None):
+        self.list_calls += 1
+        start = 0 if page is None else int(page)
+        end = start + self.page_size
+        return SimpleNamespace(
+            values=[self.portfolio(scope, code) for code in self.existing_codes[start:end]],
+            next_page=str(end) if end < len(self.existing_codes) else None,
+        )
+
+    def get_portfolio(self, scope, code):
+        self.get_calls += 1
+        return self.portfolio(scope, code)
+
+    def create_portfolio(self, scope, create_transaction_portfolio_request):
+        self.created.append(create_transaction_portfolio_request.code)
+        return self.portfolio(scope, create_transaction_portfolio_request.code)
+
+    def create_reference_portfolio(self, scope, create_reference_portfolio_request):
+        self.created.append(create_reference_portfolio_request.code)
+        return self.portfolio(scope, create_reference_portfolio_request.code)
+
+
+class TestCocoonPortfolios:
+    @pytest.mark.parametrize(
+        "file_type, mapping_required",
+        [
+            (
+                "portfolios",
+                {
+                    "code": "code",
+                    "display_name": "code",
+                    "base_currency": "$GBP",
+                    "created": "$2020-01-01T00:00:00+00:00",
+                },
+            ),
+            (
+                "reference_portfolios",
+                {
+                    "code": "code",
+                    "display_name": "code",
+                    "created": "$2020-01-01T00:00:00+00:00",
+                },
+            ),
+        ],
+    )
+    def test_load_portfolios_only_creates_missing_portfolios(self, file_type, mapping_required):
+        api_factory = MockPortfoliosApiFactory(existing_codes=["P1", "P2", "P3"])
+        data_frame = pd.DataFrame({"code": ["P1", "P4", "P3", "P5"]})
+
+        responses = cocoon.cocoon.load_from_data_frame(
+            api_factory=api_factory,
+            scope="test",
+            data_frame=data_frame,
+            mapping_required=mapping_required,
+            mapping_optional={},
+            file_type=file_type,
+        )[file_type]
+
+        # The scope is listed once over each of its pages and the portfolios are never fetched individually
+        assert api_factory.list_calls == 2
+        assert api_factory.get_calls == 0
+        assert sorted(api_factory.created) == ["P4", "P5"]
+
+        assert [portfolio.id.code for portfolio in responses["success"]] == ["P1", "P4", "P3", "P5"]
+        assert [portfolio.id.code for portfolio in responses["existing"]] == ["P1", "P3"]
+        assert [portfolio.id.code for portfolio in responses["created"]] == ["P4", "P5"]
+
+    def test_load_portfolios_reports_a_portfolio_created_since_listing_as_existing(self):
+        api_factory = MockPortfoliosApiFactory(existing_codes=["P1"])
+
+        # P2 is created by someone else after the scope has been listed, so creating it conflicts
+        def create_portfolio(scope, create_transaction_portfolio_request):
+            if create_transaction_portfolio_request.code == "P2":
+                raise ApiException(status=409, reason="Conflict")
+            return MockPortfoliosApiFactory.create_portfolio(api_factory, scope, create_transaction_portfolio_request)
+
+        api_factory.create_portfolio = create_portfolio
+
+        responses = cocoon.cocoon.load_from_data_frame(
+            api_factory=api_factory,
+            scope="test",
+            data_frame=pd.DataFrame({"code": ["P1", "P2", "P3"]}),
+            mapping_required={
+                "code": "code",
+                "display_name": "code",
+                "base_currency": "$GBP",
+                "created": "$2020-01-01T00:00:00+00:00",
+            },
+            mapping_optional={},
+            file_type="portfolios",
+        )["portfolios"]
+
+        assert api_factory.get_calls == 1
+        assert len(responses["errors"]) == 0
+        assert [portfolio.id.code for portfolio in responses["existing"]] == ["P1", "P2"]
+        assert [portfolio.id.code for portfolio in responses["created"]] == ["P3"]
+
+    def test_load_portfolios_records_call_stats(self):
+        call_stats = CallStats()
+
+        cocoon.cocoon.load_from_data_frame(
+            api_factory=MockPortfoliosApiFactory(existing_codes=["P1", "P2", "P3"]),
+            scope="test",
+            data_frame=pd.DataFrame({"code": ["P1", "P4", "P5"]}),
+            mapping_required={
+                "code": "code",
+                "display_name": "code",
+                "base_currency": "$GBP",
+                "created": "$2020-01-01T00:00:00+00:00",
+            },
+            mapping_optional={},
+            file_type="portfolios",
+            call_stats=call_stats,
+        )
+
+        calls = call_stats.to_df().set_index("endpoint")["calls"].to_dict()
+        assert calls == {
+            "SimpleNamespace.get_instrument_identifier_types": 1,
+            "MockPortfoliosApiFactory.create_portfolio": 2,
+            "MockPortfoliosApiFactory.list_portfolios_for_scope": 2,
+        }
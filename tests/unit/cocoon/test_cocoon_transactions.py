@@ -0,0 +1,210 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import finbourne.sdk.services.lusid as lusid
+import pandas as pd
+import pytest
+
+from finbourne_sdk_utils import cocoon
+from .mock_api_factory import MockApiFactory
+
+
+class MockTransactionsApiFactory(MockApiFactory):
+    """
+    Extends the mock api factory with the calls required to load transactions with sub-holding keys
+    """
+
+    def __init__(self, sub_holding_keys_by_code: dict, delay: float = 0.0):
+        self.sub_holding_keys_by_code = sub_holding_keys_by_code
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.events = []
+
+    def build(self, api):  # type: ignore[override]
+        if api == lusid.PropertyDefinitionsApi:
+            return super().build(api)
+        if api == lusid.InstrumentsApi:
+            return SimpleNamespace(
+                get_instrument_identifier_types=lambda: SimpleNamespace(values=[])
+            )
+        return self
+
+    def get_details(self, scope, code):
+        time.sleep(self.delay)
+        with self.lock:
+            self.events.append(("get_details", code))
+        return SimpleNamespace(sub_holding_keys=self.sub_holding_keys_by_code[code])
+
+    def patch_portfolio_details(self, scope, code, operation):
+        with self.lock:
+            self.events.append(("patch", code))
+        self.sub_holding_keys_by_code[code] = operation[0]["value"]
+
+    def upsert_transactions(self, scope, code, transaction_request):
+        with self.lock:
+            self.events.append(("upsert", code))
+        return SimpleNamespace(code=code)
+
+
+class TestCocoonTransactions:
+    def test_sub_holding_keys_only_patched_where_missing_and_before_upload(self):
+        api_factory = MockTransactionsApiFactory(
+            {
+                "PortA": ["Transaction/Operations/Strategy"],
+                "PortB": [],
+                "PortC": None,
+            }
+        )
+        data_frame = pd.DataFrame(
+            {
+                "portfolio": ["PortA", "PortB", "PortC", "PortA"],
+                "txn_id": ["T1", "T2", "T3", "T4"],
+                "type": ["Buy"] * 4,
+                "instrument": ["LUID_00000001"] * 4,
+                "trade_date": ["2020-01-02"] * 4,
+                "settle_date": ["2020-01-04"] * 4,
+                "units": [100.0] * 4,
+                "price": [1.0] * 4,
+                "total": [100.0] * 4,
+                "Strategy": ["Growth"] * 4,
+            }
+        )
+
+        responses = cocoon.cocoon.load_from_data_frame(
+            api_factory=api_factory,
+            scope="Operations",
+            data_frame=data_frame,
+            mapping_required={
+                "code": "portfolio",
+                "transaction_id": "txn_id",
+                "type": "type",
+                "transaction_date": "trade_date",
+                "settlement_date": "settle_date",
+                "units": "units",
+                "transaction_price.price": "price",
+                "total_consideration.amount": "total",
+                "total_consideration.currency": "$GBP",
+            },
+            mapping_optional={},
+            file_type="transactions",
+            identifier_mapping={"LusidInstrumentId": "instrument"},
+            sub_holding_keys=["Strategy"],
+        )
+
+        assert len(responses["transactions"]["errors"]) == 0
+        assert len(responses["transactions"]["success"]) == 3
+        assert sorted(code for event, code in api_factory.events if event == "patch") == ["PortB", "PortC"]
+        assert sorted(code for event, code in api_factory.events if event == "get_details") == [
+            "PortA",
+            "PortB",
+            "PortC",
+        ]
+
+        # Every portfolio has its sub-holding keys set before any transactions are upserted
+        first_upsert = next(i for i, (event, _) in enumerate(api_factory.events) if event == "upsert")
+        assert all(event == "upsert" for event, _ in api_factory.events[first_upsert:])
+        assert api_factory.sub_holding_keys_by_code == {
+            code: ["Transaction/Operations/Strategy"] for code in ["PortA", "PortB", "PortC"]
+        }
+
+    def test_sub_holding_keys_are_awaited_when_model_conversion_fails(self, monkeypatch):
+        api_factory = MockTransactionsApiFactory({"PortA": [], "PortB": []}, delay=0.2)
+
+        def failing_conversion(**kwargs):
+            raise ValueError("conversion failed")
+
+        monkeypatch.setattr(cocoon.cocoon, "_convert_batch_to_models", failing_conversion)
+
+        with pytest.raises(ValueError, match="conversion failed"):
+            cocoon.cocoon.load_from_data_frame(
+                api_factory=api_factory,
+                scope="Operations",
+                data_frame=pd.DataFrame(
+                    {
+                        "portfolio": ["PortA", "PortB"],
+                        "txn_id": ["T1", "T2"],
+                        "type": ["Buy"] * 2,
+                        "instrument": ["LUID_00000001"] * 2,
+                        "trade_date": ["2020-01-02"] * 2,
+                        "settle_date": ["2020-01-04"] * 2,
+                        "units": [100.0] * 2,
+                        "price": [1.0] * 2,
+                        "total": [100.0] * 2,
+                        "Strategy": ["Growth"] * 2,
+                    }
+                ),
+                mapping_required={
+                    "code": "portfolio",
+                    "transaction_id": "txn_id",
+                    "type": "type",
+                    "transaction_date": "trade_date",
+                    "settlement_date": "settle_date",
+                    "units": "units",
+                    "transaction_price.price": "price",
+                    "total_consideration.amount": "total",
+                    "total_consideration.currency": "$GBP",
+                },
+                mapping_optional={},
+                file_type="transactions",
+                identifier_mapping={"LusidInstrumentId": "instrument"},
+                sub_holding_keys=["Strategy"],
+            )
+
+        # The portfolios were patched before the load raised rather than being left to finish in the background
+        assert sorted(code for event, code in api_factory.events if event == "patch") == ["PortA", "PortB"]
+
+    def test_sub_holding_keys_are_patched_with_bounded_concurrency(self, monkeypatch):
+        codes = [f"Port{i}" for i in range(6)]
+        api_factory = MockTransactionsApiFactory({code: [] for code in codes})
+        in_flight = []
+        patched = []
+
+        async def patch(api_factory, scope, code, sub_holding_keys, **kwargs):
+            in_flight.append(code)
+            patched.append((code, len(in_flight)))
+            await asyncio.sleep(0.01)
+            in_flight.remove(code)
+            return True
+
+        monkeypatch.setattr(cocoon.cocoon, "_patch_portfolio_sub_holding_keys", patch)
+
+        responses = cocoon.cocoon.load_from_data_frame(
+            api_factory=api_factory,
+            scope="Operations",
+            data_frame=pd.DataFrame(
+                {
+                    "portfolio": codes,
+                    "txn_id": [f"T{i}" for i in range(6)],
+                    "type": ["Buy"] * 6,
+                    "instrument": ["LUID_00000001"] * 6,
+                    "trade_date": ["2020-01-02"] * 6,
+                    "settle_date": ["2020-01-04"] * 6,
+                    "units": [100.0] * 6,
+                    "price": [1.0] * 6,
+                    "total": [100.0] * 6,
+                    "Strategy": ["Growth"] * 6,
+                }
+            ),
+            mapping_required={
+                "code": "portfolio",
+                "transaction_id": "txn_id",
+                "type": "type",
+                "transaction_date": "trade_date",
+                "settlement_date": "settle_date",
+                "units": "units",
+                "transaction_price.price": "price",
+                "total_consideration.amount": "total",
+                "total_consideration.currency": "$GBP",
+            },
+            mapping_optional={},
+            file_type="transactions",
+            identifier_mapping={"LusidInstrumentId": "instrument"},
+            sub_holding_keys=["Strategy"],
+            thread_pool_max_workers=2,
+        )
+
+        assert len(responses["transactions"]["success"]) == 6
+        assert sorted(code for code, _ in patched) == codes
+        assert max(count for _, count in patched) == 2
@@ -0,0 +1,88 @@
+import os
+import pstats
+import time
+import tracemalloc
+
+import pandas as pd
+import pytest
+
+from finbourne_sdk_utils import cocoon
+from finbourne_sdk_utils.cocoon.profiling import LoadProfiler
+from finbourne_sdk_utils.cocoon.spans import InMemorySpanSink, SpanRecorder
+from .test_cocoon_portfolios import MockPortfoliosApiFactory
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestLoadProfiler:
+    def load(self, profiler, file_type="portfolios", span_sink=None):
+        return cocoon.cocoon.load_from_data_frame(
+            api_factory=MockPortfoliosApiFactory(existing_codes=["P1"]),
+            scope="test",
+            data_frame=pd.DataFrame({"code": ["P1", "P2", "P3"]}),
+            mapping_required={
+                "code": "code",
+                "display_name": "code",
+                "base_currency": "$GBP",
+                "created": "$2020-01-01T00:00:00+00:00",
+            },
+            mapping_optional={},
+            file_type=file_type,
+            span_sink=span_sink,
+            profiler=profiler,
+        )
+
+    def test_load_writes_profiles_for_each_phase(self, tmp_path):
+        profiler = LoadProfiler(str(tmp_path), interval=0.001, include_idle=True)
+        sink = InMemorySpanSink()
+
+        responses = self.load(profiler, span_sink=sink)
+
+        assert len(responses["portfolios"]["success"]) == 3
+        assert not profiler.running
+        assert not tracemalloc.is_tracing()
+        assert len(sink.spans) > 0
+
+        files = os.listdir(tmp_path)
+        assert "cpu_load.pstats" in files
+        assert pstats.Stats(str(tmp_path / "cpu_load.pstats")).total_tt > 0
+
+        snapshots = sorted(file for file in files if file.endswith(".tracemalloc"))
+        assert snapshots[0] == "memory_00_start.tracemalloc"
+        assert snapshots[1] == "memory_01_validation.tracemalloc"
+        assert snapshots[-1].endswith("_end.tracemalloc")
+        assert len(tracemalloc.Snapshot.load(str(tmp_path / snapshots[-1])).traces) > 0
+        assert "validation: current" in (tmp_path / "memory.txt").read_text()
+        assert sorted(profiler.files) == sorted(str(tmp_path / file) for file in files)
+
+    def test_samples_are_attributed_to_phases_as_collapsed_stacks(self, tmp_path):
+        with LoadProfiler(str(tmp_path), memory=False, output_format="collapsed", interval=0.001) as profiler:
+            spans = SpanRecorder(profiler=profiler)
+            with spans.span("busy"):
+                _busy(0.2)
+            _busy(0.05)
+
+        busy = (tmp_path / "cpu_busy.collapsed").read_text().splitlines()
+        assert len(busy) > 0
+        assert all(line.startswith("MainThread;") for line in busy)
+        assert any("_busy (test_profiling.py" in line for line in busy)
+
+        samples = lambda lines: sum(int(line.rsplit(" ", 1)[1]) for line in lines)
+        assert samples((tmp_path / "cpu_load.collapsed").read_text().splitlines()) > samples(busy)
+
+    def test_profiles_are_written_when_the_load_fails(self, tmp_path):
+        profiler = LoadProfiler(str(tmp_path), cpu=False)
+
+        with pytest.raises(ValueError):
+            self.load(profiler, file_type="not_a_file_type")
+
+        assert not profiler.running
+        assert (tmp_path / "memory.txt").exists()
+
+    def test_unknown_output_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            LoadProfiler(str(tmp_path), output_format="svg")
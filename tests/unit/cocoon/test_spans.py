@@ -0,0 +1,143 @@
+import io
+import json
+import logging
+
+import pandas as pd
+import pytest
+
+from finbourne_sdk_utils import cocoon
+from finbourne_sdk_utils.cocoon.spans import (
+    InMemorySpanSink,
+    JsonLinesSpanSink,
+    LoggingSpanSink,
+    OpenTelemetrySpanSink,
+    SpanRecorder,
+)
+from .test_cocoon_portfolios import MockPortfoliosApiFactory
+
+
+class MockTracer:
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, start_time, attributes):
+        tracer = self
+
+        class _Span:
+            def end(self, end_time):
+                tracer.spans.append((name, start_time, end_time, attributes))
+
+        return _Span()
+
+
+class TestSpanRecorder:
+    def test_nested_spans_record_their_parent(self):
+        sink = InMemorySpanSink()
+        spans = SpanRecorder(sink)
+
+        with spans.span("outer", rows=2) as outer:
+            with spans.span("inner") as inner:
+                inner.set(bytes=10)
+            overlapping = spans.start("overlapping")
+        spans.finish(overlapping)
+
+        assert [span.name for span in sink.spans] == ["inner", "outer", "overlapping"]
+        assert sink.spans[0].parent_id == outer.span_id
+        assert sink.spans[2].parent_id == outer.span_id
+        assert sink.spans[1].parent_id is None
+        assert sink.summary()["inner"] == {"count": 1, "duration": sink.spans[0].duration, "bytes": 10}
+
+    def test_errors_are_recorded(self):
+        sink = InMemorySpanSink()
+
+        with pytest.raises(ValueError):
+            with SpanRecorder(sink).span("failing"):
+                raise ValueError()
+
+        assert sink.spans[0].error == "ValueError"
+
+    def test_no_sink_does_nothing(self):
+        spans = SpanRecorder()
+
+        with spans.span("phase") as span:
+            span.set(rows=1)
+        spans.finish(spans.start("phase").set(rows=1))
+
+        assert not spans.enabled
+
+    def test_sinks(self, caplog):
+        buffer = io.StringIO()
+        tracer = MockTracer()
+
+        for sink in (JsonLinesSpanSink(buffer), LoggingSpanSink(), OpenTelemetrySpanSink(tracer)):
+            with caplog.at_level(logging.INFO, logger="finbourne_sdk_utils.spans"):
+                with SpanRecorder(sink).span("upload", rows=3):
+                    pass
+
+        assert json.loads(buffer.getvalue())["attributes"] == {"rows": 3}
+        assert "upload took" in caplog.text and "rows=3" in caplog.text
+        name, start, end, attributes = tracer.spans[0]
+        assert name == "upload" and end >= start and attributes["rows"] == 3
+
+
+class TestLoadFromDataFrameSpans:
+    def test_each_phase_of_a_load_is_timed(self):
+        sink = InMemorySpanSink()
+
+        cocoon.cocoon.load_from_data_frame(
+            api_factory=MockPortfoliosApiFactory(existing_codes=["P1"]),
+            scope="test",
+            data_frame=pd.DataFrame({"code": ["P1", "P2", "P3"]}),
+            mapping_required={
+                "code": "code",
+                "display_name": "code",
+                "base_currency": "$GBP",
+                "created": "$2020-01-01T00:00:00+00:00",
+            },
+            mapping_optional={},
+            file_type="portfolios",
+            span_sink=sink,
+        )
+
+        summary = sink.summary()
+        assert list(summary) == [
+            "validation",
+            "nested_mapping",
+            "column_validation",
+            "normalization",
+            "property_definitions",
+            "batch_planning",
+            "model_conversion",
+            "upload",
+            "sync_batch",
+        ]
+        assert summary["upload"]["count"] == 3
+        assert summary["upload"]["rows"] == 3
+        assert summary["upload"]["bytes"] > 0
+        assert summary["batch_planning"]["async_batches"] == 3
+
+        sync_batch = next(span for span in sink.spans if span.name == "sync_batch")
+        assert all(span.parent_id == sync_batch.span_id for span in sink.spans if span.name == "upload")
+
+    def test_a_failing_phase_is_still_timed(self):
+        sink = InMemorySpanSink()
+
+        # The mapped column is missing so column validation fails
+        with pytest.raises(ValueError):
+            cocoon.cocoon.load_from_data_frame(
+                api_factory=MockPortfoliosApiFactory(existing_codes=[]),
+                scope="test",
+                data_frame=pd.DataFrame({"code": ["P1"]}),
+                mapping_required={
+                    "code": "missing",
+                    "display_name": "code",
+                    "base_currency": "$GBP",
+                    "created": "$2020-01-01T00:00:00+00:00",
+                },
+                mapping_optional={},
+                file_type="portfolios",
+                span_sink=sink,
+            )
+
+        assert [span.name for span in sink.spans] == ["validation", "nested_mapping", "column_validation"]
+        assert sink.spans[-1].error == "ValueError"
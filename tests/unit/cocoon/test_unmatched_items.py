@@ -0,0 +1,164 @@
+import concurrent.futures
+import threading
+from types import SimpleNamespace
+
+import finbourne.sdk.services.lusid as lusid
+from finbourne.sdk.extensions import SyncApiClientFactory
+import pandas as pd
+
+from finbourne_sdk_utils import cocoon
+
+
+class PagedTransactionsApiFactory(SyncApiClientFactory):
+    """
+    A mock api factory which serves unmatched transactions in pages and records the peak number of concurrent calls
+    """
+
+    def __init__(self, pages_by_code: dict, adjustments_by_code: dict | None = None):
+        self.pages_by_code = pages_by_code
+        self.adjustments_by_code = adjustments_by_code or {}
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = []
+
+    def build(self, api):  # type: ignore[override]
+        if api == lusid.TransactionPortfoliosApi:
+            return self
+
+    def _track(self):
+        with self.lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        threading.Event().wait(0.01)
+        with self.lock:
+            self.in_flight -= 1
+
+    def get_transactions(self, scope, code, from_transaction_date, to_transaction_date, filter, page=None):
+        self.calls.append((code, from_transaction_date, to_transaction_date, page))
+        self._track()
+        pages = self.pages_by_code[code]
+        index = 0 if page is None else int(page)
+        next_page = str(index + 1) if index + 1 < len(pages) else None
+        return SimpleNamespace(values=pages[index], next_page=next_page)
+
+    def get_holdings_adjustment(self, scope, code, effective_at):
+        self._track()
+        return SimpleNamespace(adjustments=self.adjustments_by_code[code])
+
+
+def transaction(txn_id):
+    return SimpleNamespace(transaction_id=txn_id, instrument_uid="LUID_ZZZZZZZZ")
+
+
+class TestUnmatchedItems:
+    mapping_required = {
+        "code": "portfolio",
+        "transaction_id": "txn_id",
+        "transaction_date": "trade_date",
+    }
+
+    def test_unmatched_transactions_pages_are_filtered_per_portfolio(self):
+        api_factory = PagedTransactionsApiFactory(
+            {
+                "PortA": [[transaction("A1"), transaction("X1")], [transaction("A2")]],
+                # A1 was only uploaded to PortA
+                "PortB": [[transaction("B1"), transaction("A1")]],
+            }
+        )
+        data_frame = pd.DataFrame(
+            {
+                "portfolio": ["PortA", "PortA", "PortB"],
+                "txn_id": ["A1", "A2", "B1"],
+                "trade_date": ["2020-01-02", "2020-01-05", "2020-01-03"],
+            }
+        )
+        sync_batches = [{"codes": ["PortA", "PortB"], "effective_at": [None, None]}]
+
+        result = cocoon.cocoon.unmatched_items(
+            api_factory=api_factory,
+            scope="test",
+            data_frame=data_frame,
+            mapping_required=self.mapping_required,
+            file_type="transaction",
+            returned_response={"errors": [], "success": []},
+            sync_batches=sync_batches,
+        )
+
+        assert sorted(txn.transaction_id for txn in result) == ["A1", "A2", "B1"]
+        # Each portfolio is only queried for the dates in its own part of the upload
+        assert {(code, start, end) for code, start, end, _ in api_factory.calls} == {
+            ("PortA", "2020-01-02T00:00:00+00:00", "2020-01-05T00:00:00+00:00"),
+            ("PortB", "2020-01-03T00:00:00+00:00", "2020-01-03T00:00:00+00:00"),
+        }
+
+    def test_unmatched_transactions_with_numeric_portfolio_codes(self):
+        api_factory = PagedTransactionsApiFactory(
+            {"1": [[transaction("A1"), transaction("X1")]], "2": [[transaction("B1")]]}
+        )
+        data_frame = pd.DataFrame(
+            {
+                "portfolio": [1, 1, 2],
+                "txn_id": ["A1", "A2", "B1"],
+                "trade_date": ["2020-01-02", "2020-01-05", "2020-01-03"],
+            }
+        )
+        # The batches hold the portfolio codes as strings, as created by load_from_data_frame
+        sync_batches = [{"codes": ["1", "2"], "effective_at": [None, None]}]
+
+        result = cocoon.cocoon.unmatched_items(
+            api_factory=api_factory,
+            scope="test",
+            data_frame=data_frame,
+            mapping_required=self.mapping_required,
+            file_type="transaction",
+            returned_response={"errors": [], "success": []},
+            sync_batches=sync_batches,
+        )
+
+        assert sorted(txn.transaction_id for txn in result) == ["A1", "B1"]
+        assert {(code, start, end) for code, start, end, _ in api_factory.calls} == {
+            ("1", "2020-01-02T00:00:00+00:00", "2020-01-05T00:00:00+00:00"),
+            ("2", "2020-01-03T00:00:00+00:00", "2020-01-03T00:00:00+00:00"),
+        }
+
+    def test_unmatched_holdings_respects_concurrency_limit(self):
+        codes = [f"Port{i}" for i in range(8)]
+        api_factory = PagedTransactionsApiFactory(
+            pages_by_code={},
+            adjustments_by_code={
+                code: [
+                    SimpleNamespace(instrument_uid="LUID_ZZZZZZZZ"),
+                    SimpleNamespace(instrument_uid="LUID_12345678"),
+                ]
+                for code in codes
+            },
+        )
+        sync_batches = [{"codes": codes, "effective_at": ["2020-01-01"] * len(codes)}]
+
+        result = cocoon.cocoon.unmatched_items(
+            api_factory=api_factory,
+            scope="test",
+            data_frame=pd.DataFrame(),
+            mapping_required=self.mapping_required,
+            file_type="holding",
+            returned_response={"errors": [], "success": []},
+            sync_batches=sync_batches,
+            max_concurrency=2,
+            thread_pool=concurrent.futures.ThreadPoolExecutor(max_workers=8),
+        )
+
+        assert len(result) == len(codes)
+        assert api_factory.peak_in_flight <= 2
+
+    def test_unmatched_items_not_checked_when_upload_has_errors(self):
+        result = cocoon.cocoon.unmatched_items(
+            api_factory=PagedTransactionsApiFactory({}),
+            scope="test",
+            data_frame=pd.DataFrame(),
+            mapping_required=self.mapping_required,
+            file_type="transaction",
+            returned_response={"errors": [Exception()], "success": []},
+        )
+
+        assert result == ["Please resolve all upload errors to check for unmatched items."]
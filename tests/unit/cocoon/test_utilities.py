@@ -2,6 +2,7 @@ import logging
 import copy
 import os
 import uuid
+from unittest import mock
 
 import pytest
 from datetime import datetime
@@ -21,6 +22,7 @@ from finbourne_sdk_utils.cocoon.utilities import (
     strip_whitespace,
     create_scope_id,
     default_fx_forward_model,
+    pair_transaction_legs,
     update_dict_value,
     group_request_into_one,
     extract_unique_portfolio_codes,
@@ -1332,6 +1334,52 @@ class TestCocoonUtilities:
 
         assert "__adjusted_quote" == mapping["quotes"]["required"]["metric_value.value"]
 
+    def test_scale_quote_of_type_with_multiple_scale_factors(self):
+        df = pd.DataFrame(
+            [
+                ["name1", "GBp", 1000.0],
+                ["name2", "GBP", 10.0],
+                ["name3", "ZAc", 500.0],
+                ["name4", "ILA", None],
+                ["name5", "b", 20000.0],
+            ],
+            columns=pd.Index(["name", "type", "price"]),
+        )
+        mapping = {
+            "quotes": {
+                "quote_scalar": {
+                    "price": "price",
+                    "type": "type",
+                    "type_code": "b",
+                    "scale_factor": 0.001,
+                    "scale_factors": {"GBp": 0.01, "ZAc": 0.01, "ILA": 0.01},
+                },
+                "required": {"metric_value.value": "price"},
+            }
+        }
+        result, mapping = cocoon.utilities.scale_quote_of_type(df=df, mapping=mapping)
+
+        assert list(result["__adjusted_quote"]) == [10.0, 10.0, 5.0, None, 20.0]
+        assert "__adjusted_quote" == mapping["quotes"]["required"]["metric_value.value"]
+
+    def test_scale_quote_of_type_logs_number_of_unadjusted_rows(self, caplog):
+        df = pd.DataFrame(
+            {"type": ["b"] * 20, "price": [None] * 19 + [10000.0]},
+        )
+        mapping = {
+            "quotes": {
+                "quote_scalar": {"price": "price", "type": "type", "type_code": "b", "scale_factor": 0.01},
+                "required": {"metric_value.value": "price"},
+            }
+        }
+
+        with caplog.at_level(logging.WARNING):
+            cocoon.utilities.scale_quote_of_type(df=df, mapping=mapping)
+
+        # Only the first few of the rows without a price are listed
+        assert "19 rows, the first at [0, 1, 2, 3, 4]" in caplog.text
+        assert "18" not in caplog.text
+
     @pytest.mark.parametrize("_, col_title, column, error_type", [
         ("invalid_type_column", "invalid_type_name", "type", KeyError),
         ("invalid_price_column", "invalid_price_name", "price", KeyError),
@@ -1355,6 +1403,48 @@ class TestCocoonUtilities:
         with pytest.raises(error_type):
             cocoon.utilities.scale_quote_of_type(df=df, mapping=mapping)
 
+    @pytest.mark.parametrize("_, num_header, num_footer, trailing_newline", [
+            ("no header or footer", 0, 0, True),
+            ("header and footer", 2, 3, True),
+            ("footer without trailing newline", 1, 2, False),
+            ("footer the size of the file", 0, 50, True),
+        ])
+    def test_load_data_to_df_and_detect_delimiter(self, tmp_path, _, num_header, num_footer, trailing_newline):
+        lines = [f"preamble line {i}" for i in range(num_header)]
+        lines += ["id|name|value"] + [f"{i}|name {i}|{i * 1.5}" for i in range(20)]
+        lines += [f"footer line {i}" for i in range(num_footer)]
+        file_path = tmp_path.joinpath("data.csv")
+        file_path.write_text("\n".join(lines) + ("\n" if trailing_newline else ""))
+
+        args = {"file_path": str(file_path), "delimiter": None, "num_header": num_header, "num_footer": num_footer}
+        result = cocoon.utilities.load_data_to_df_and_detect_delimiter(args)
+
+        expected = pd.read_csv(
+            file_path, delimiter="|", header=num_header, skipfooter=num_footer, engine="python"
+        )
+        assert_frame_equal(result, expected)
+
+    def test_load_data_to_df_and_detect_delimiter_in_chunks(self, tmp_path):
+        lines = ["id,value"] + [f"{i},{i}" for i in range(10)] + ["total,45"]
+        file_path = tmp_path.joinpath("data.csv")
+        file_path.write_text("\n".join(lines) + "\n")
+
+        args = {"file_path": str(file_path), "delimiter": ",", "num_header": 0, "num_footer": 1, "chunksize": 4}
+        opened = []
+        original_open = open
+
+        def recording_open(*open_args, **open_kwargs):
+            opened.append(original_open(*open_args, **open_kwargs))
+            return opened[-1]
+
+        with mock.patch("builtins.open", recording_open):
+            chunks = list(cocoon.utilities.load_data_to_df_and_detect_delimiter(args))
+
+        assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+        assert list(pd.concat(chunks)["value"]) == list(range(10))
+        # The file is closed once every chunk has been read
+        assert opened and all(f.closed for f in opened)
+
     @pytest.mark.parametrize("_, delimiter", [
             ("comma", ","),
             ("vertical bar", "|"),
@@ -1618,6 +1708,32 @@ class TestCocoonUtilities:
 
         assert mappings_expected_value == mappings_test
 
+    def test_identify_cash_items_first_matching_column_wins(self, caplog):
+        dataframe = pd.DataFrame(
+            {
+                "instrument_name": ["cash_gbp", "inst2", "cash_usd", "inst4", "inst5"],
+                "instrument_type": ["Cash", "Cash", "Equity", "Cash", "Equity"],
+                "internal_currency": ["GBP_IMP", "EUR_IMP", "USD_IMP", None, "JPY_IMP"],
+            }
+        )
+        mappings = {
+            "instruments": {"identifier_mapping": {}},
+            "cash_flag": {
+                "cash_identifiers": {
+                    "instrument_name": {"cash_gbp": "GBP", "cash_usd": "USD"},
+                    "instrument_type": ["Cash"],
+                },
+                "implicit": "internal_currency",
+            },
+        }
+
+        with caplog.at_level(logging.WARNING):
+            dataframe, mappings = identify_cash_items(dataframe, mappings, "instruments")
+
+        assert list(dataframe["__currency_identifier_for_LUSID"]) == ["GBP", "EUR_IMP", "USD", None, None]
+        # The cash item at row 3 has no currency code to use
+        assert "rows [3]" in caplog.text
+
     @pytest.mark.parametrize("_, val_1, val_2", [
             ("type_string", "GBP", "USD"),
             ("type_float", float(10.10), float(20.20)),
@@ -1933,6 +2049,105 @@ class TestCocoonUtilities:
                 df_with_no_fx_transactions, "FW", None, None, mapping
             )
 
+    def test_pair_transaction_legs_across_chunks_with_orphans(self):
+        df = pd.DataFrame(
+            data=[
+                [1000, "FW", "by", 100, "GBP"],
+                [1001, "SP", "sl", -150, "USD"],
+                [1002, "FW", "by", 200, "GBP"],
+                [1000, "FW", "sl", -120, "USD"],
+                [1001, "SP", "by", 110, "EUR"],
+                [1003, "FW", "by", 300, "GBP"],
+                [1003, "FW", "by", 300, "GBP"],
+                [1004, "FW", "~", 5, "GBP"],
+                [1005, "XX", "by", 5, "GBP"],
+            ],
+            columns=pd.Index(["TX_ID", "type", "leg", "quantity", "currency"]),
+        )
+        mapping = {
+            "transactions": {
+                "required": {
+                    "transaction_id": "TX_ID",
+                    "type": "type",
+                    "units": "quantity",
+                    "transaction_currency": "currency",
+                    "total_consideration.amount": "quantity",
+                    "total_consideration.currency": "currency",
+                }
+            }
+        }
+        rules = (lambda x: x["leg"] == "by", lambda x: x["leg"] == "sl")
+
+        paired, orphans, mapping_paired = pair_transaction_legs(
+            (df.iloc[i: i + 2] for i in range(0, len(df), 2)),
+            {"FW": rules, "SP": rules},
+            mapping,
+        )
+
+        assert list(paired["TX_ID"]) == [1000, 1001]
+        assert list(paired["currency_txn"]) == ["GBP", "EUR"]
+        assert list(paired["currency_tc"]) == ["USD", "USD"]
+        assert sorted(zip(orphans["TX_ID"], orphans["__orphan_reason"])) == [
+            (1002, "unpaired"),
+            (1003, "duplicate"),
+            (1003, "unpaired"),
+            (1004, "unclassified"),
+        ]
+        assert mapping_paired["transactions"]["required"]["units"] == "quantity_txn"
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 5])
+    def test_pair_transaction_legs_does_not_depend_on_chunks(self, chunk_size):
+        df = pd.DataFrame(
+            data=[
+                [1000, "FW", "by", 100, "GBP"],
+                [1000, "FW", "sl", -120, "USD"],
+                [1000, "FW", "by", 101, "GBP"],
+                [1001, "FW", "by", 200, "GBP"],
+                [1001, "FW", "by", 201, "GBP"],
+                [1001, "FW", "sl", -240, "USD"],
+                [1002, "FW", "sl", -300, "USD"],
+            ],
+            columns=pd.Index(["TX_ID", "type", "leg", "quantity", "currency"]),
+        )
+        mapping = {"transactions": {"required": {"transaction_id": "TX_ID", "type": "type"}}}
+        rules = {"FW": (lambda x: x["leg"] == "by", lambda x: x["leg"] == "sl")}
+
+        whole = pair_transaction_legs(df, rules, mapping)
+        chunked = pair_transaction_legs(
+            (df.iloc[i: i + chunk_size] for i in range(0, len(df), chunk_size)), rules, mapping
+        )
+
+        # The first leg of each side is paired and any later leg is a duplicate
+        for paired, orphans, _ in (whole, chunked):
+            assert list(zip(paired["TX_ID"], paired["quantity_txn"])) == [(1000, 100), (1001, 200)]
+            assert sorted(zip(orphans["TX_ID"], orphans["quantity"], orphans["__orphan_reason"])) == [
+                (1000, 101, "duplicate"),
+                (1001, 201, "duplicate"),
+                (1002, -300, "unpaired"),
+            ]
+
+    def test_default_fx_forward_model_logs_excluded_legs(self, caplog):
+        df = pd.DataFrame(
+            data=[
+                [1000, "FW", "by", 100, "GBP"],
+                [1000, "FW", "sl", -120, "USD"],
+                [1000, "FW", "by", 101, "GBP"],
+                [1001, "FW", "by", 200, "GBP"],
+            ],
+            columns=pd.Index(["TX_ID", "type", "leg", "quantity", "currency"]),
+        )
+        mapping = {"transactions": {"required": {"transaction_id": "TX_ID", "type": "type"}}}
+
+        with caplog.at_level(logging.WARNING):
+            fwds_txn_df, _ = default_fx_forward_model(
+                df, "FW", lambda x: x["leg"] == "by", lambda x: x["leg"] == "sl", mapping
+            )
+
+        assert list(fwds_txn_df["TX_ID"]) == [1000]
+        assert "1 duplicate legs of transactions of type FW" in caplog.text
+        assert "1 unpaired legs of transactions of type FW" in caplog.text
+        assert "[1001]" in caplog.text
+
     @pytest.mark.parametrize("_, d, search_key, new_value, top_level_values_to_search, gt", [
             (
                 "Replace one single matching value standard syntax",
@@ -2,15 +2,33 @@ import logging
 import os
 from finbourne_sdk_utils import logger
 from datetime import datetime
+import pandas
 import pytest
 import pytz
 
+from types import SimpleNamespace
+
+from finbourne.sdk.exceptions import ApiException
+from finbourne.sdk.extensions import SyncApiClientFactory
+
+from finbourne_sdk_utils.extract import (
+    get_holdings_for_group,
+    get_holdings_time_series_for_group,
+    stream_holdings_for_group,
+)
 from finbourne_sdk_utils.extract.group_holdings import _join_holdings
+from finbourne_sdk_utils.cocoon.profiling import LoadProfiler
+from finbourne_sdk_utils.lpt import ReadCache
 from finbourne.sdk.services.lusid.models import (
+    CompletePortfolio,
+    ExpandedGroup,
     PortfolioHolding,
     ModelProperty,
     PropertyValue,
     CurrencyAndAmount,
+    ResourceId,
+    Version,
+    VersionedResourceListOfPortfolioHolding,
 )
 
 now = datetime.now(pytz.UTC)
@@ -193,3 +211,285 @@ class TestCocoonExtractGroupHoldings:
         actual_dumps = {k: [h.model_dump() for h in v] for k, v in joined_holdings.items()}
         expected_dumps = {k: [h.model_dump() for h in v] for k, v in expected_outcome.items()}
         assert actual_dumps == expected_dumps
+
+
+class MockGroupApiFactory(SyncApiClientFactory):
+    """
+    A mock api factory which serves a tree of Portfolio Groups and the holdings of their Portfolios
+    """
+
+    def __init__(self, groups, holdings, expansion=True):
+        self.groups = groups
+        self.holdings = holdings
+        self.expansion = expansion
+        self.expansion_status = 501
+        self.calls = []
+
+    def build(self, api):  # type: ignore[override]
+        return self
+
+    def get_portfolio_group(self, scope, code, **kwargs):
+        self.calls.append(("get_portfolio_group", code))
+        portfolios, sub_groups = self.groups[code]
+        return SimpleNamespace(
+            portfolios=[ResourceId(scope=scope, code=c) for c in portfolios],
+            sub_groups=[ResourceId(scope=scope, code=c) for c in sub_groups],
+        )
+
+    def get_portfolio_group_expansion(self, scope, code, **kwargs):
+        self.calls.append(("get_portfolio_group_expansion", code))
+        if not self.expansion:
+            raise ApiException(status=self.expansion_status, reason="Not Implemented")
+
+        def expand(group_code):
+            portfolios, sub_groups = self.groups[group_code]
+            return ExpandedGroup(
+                id=ResourceId(scope=scope, code=group_code),
+                display_name=group_code,
+                values=[CompletePortfolio(id=ResourceId(scope=scope, code=c), version=self.version) for c in portfolios],
+                sub_groups=[expand(c) for c in sub_groups],
+            )
+
+        return expand(code)
+
+    def get_holdings(self, scope, code, **kwargs):
+        self.calls.append(("get_holdings", code))
+        return VersionedResourceListOfPortfolioHolding(version=self.version, values=self.holdings[code])
+
+    version = Version(
+        effective_from=datetime(2020, 1, 1, tzinfo=pytz.UTC), as_at_date=datetime(2020, 1, 1, tzinfo=pytz.UTC)
+    )
+
+
+def holding(instrument_uid, units, currency="GBP", properties=None):
+    return PortfolioHolding(
+        instrument_uid=instrument_uid,
+        holding_type="P",
+        units=units,
+        settled_units=units,
+        cost=CurrencyAndAmount(amount=units * 10, currency=currency),
+        cost_portfolio_ccy=CurrencyAndAmount(amount=units * 10, currency="GBP"),
+        properties=properties or {},
+    )
+
+
+class TestGetHoldingsForGroup:
+    name = {
+        "Instrument/default/Name": ModelProperty(
+            key="Instrument/default/Name", value=PropertyValue(label_value="Apple")
+        ),
+        "Holding/default/Note": ModelProperty(
+            key="Holding/default/Note", value=PropertyValue(label_value="ignored")
+        ),
+    }
+
+    # P1 is reachable from the top group and through both sub-groups
+    groups = {
+        "Top": (["P1", "P2"], ["Sub", "Other"]),
+        "Sub": (["P3"], ["Leaf"]),
+        "Leaf": (["P4", "P1"], []),
+        "Other": (["P1"], ["Leaf"]),
+    }
+
+    holdings = {
+        "P1": [holding("LUID_A", 1), holding("LUID_B", 2)],
+        "P2": [holding("LUID_A", 3, properties=name)],
+        "P3": [holding("LUID_A", 5, properties=name), holding("LUID_A", 7, currency="USD")],
+        "P4": [holding("LUID_C", 11, properties=name)],
+    }
+
+    @pytest.mark.parametrize("expansion", [True, False])
+    def test_each_portfolio_is_fetched_once(self, expansion):
+        api_factory = MockGroupApiFactory(self.groups, self.holdings, expansion=expansion)
+
+        result = get_holdings_for_group(api_factory, "Scope", "Top", max_concurrency=2)
+
+        assert sorted(code for call, code in api_factory.calls if call == "get_holdings") == ["P1", "P2", "P3", "P4"]
+        if expansion:
+            assert [call for call, _ in api_factory.calls if call != "get_holdings"] == ["get_portfolio_group_expansion"]
+        else:
+            assert sorted(code for call, code in api_factory.calls if call == "get_portfolio_group") == [
+                "Leaf", "Other", "Sub", "Top"
+            ]
+
+        assert list(result) == ["Scope : Top"]
+        joined = {(h.instrument_uid, h.cost.currency): h for h in result["Scope : Top"]}
+        # Sub-group holdings come first, so the order follows the deepest group
+        assert list(joined) == [("LUID_C", "GBP"), ("LUID_A", "GBP"), ("LUID_B", "GBP"), ("LUID_A", "USD")]
+        assert joined[("LUID_A", "GBP")].units == 9
+        assert joined[("LUID_A", "GBP")].cost.amount == 90
+        assert joined[("LUID_B", "GBP")].units == 2
+        # Only the instrument properties of the first holding are kept
+        assert list(joined[("LUID_C", "GBP")].properties) == ["Instrument/default/Name"]
+        assert joined[("LUID_A", "GBP")].properties == {}
+
+    def test_group_tree_is_cached_at_a_fixed_as_at(self):
+        api_factory = MockGroupApiFactory(self.groups, self.holdings)
+        effective_at = datetime(2024, 1, 1, tzinfo=pytz.UTC)
+        as_at = datetime(2024, 1, 2, tzinfo=pytz.UTC)
+
+        get_holdings_for_group(api_factory, "Scope", "Top", effective_at=effective_at, as_at=as_at)
+        get_holdings_for_group(api_factory, "Scope", "Top", effective_at=effective_at, as_at=as_at)
+
+        assert [call for call, _ in api_factory.calls].count("get_portfolio_group_expansion") == 1
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {},
+            {"as_at": datetime(2024, 1, 2, tzinfo=pytz.UTC)},
+            {"effective_at": datetime(2024, 1, 1, tzinfo=pytz.UTC)},
+            {"effective_at": datetime(2024, 1, 1, tzinfo=pytz.UTC), "as_at": datetime(2999, 1, 1, tzinfo=pytz.UTC)},
+        ],
+    )
+    def test_group_tree_is_not_cached_while_it_can_change(self, kwargs):
+        api_factory = MockGroupApiFactory(self.groups, self.holdings)
+
+        get_holdings_for_group(api_factory, "Scope", "Top", **kwargs)
+        get_holdings_for_group(api_factory, "Scope", "Top", **kwargs)
+
+        assert [call for call, _ in api_factory.calls].count("get_portfolio_group_expansion") == 2
+
+    @pytest.mark.parametrize("status", [403, 404])
+    def test_other_expansion_errors_are_raised_without_falling_back(self, status):
+        api_factory = MockGroupApiFactory(self.groups, self.holdings, expansion=False)
+        api_factory.expansion_status = status
+
+        with pytest.raises(ApiException):
+            get_holdings_for_group(api_factory, "Scope", "Top")
+
+        assert [call for call, _ in api_factory.calls] == ["get_portfolio_group_expansion"]
+
+    def test_holdings_as_data_frame(self):
+        api_factory = MockGroupApiFactory(self.groups, self.holdings)
+
+        result = get_holdings_for_group(api_factory, "Scope", "Top", as_data_frame=True)
+
+        df = result["Scope : Top"].set_index(["instrument_uid", "cost.currency"])
+        assert df.loc[("LUID_A", "GBP"), "units"] == 9
+        assert df.loc[("LUID_C", "GBP"), "P:Instrument/default/Name"] == "Apple"
+        assert df.loc[("LUID_B", "GBP"), "P:Instrument/default/Name"] is None
+        assert "P:Holding/default/Note" not in df.columns
+
+    def test_holdings_grouped_by_portfolio_as_data_frame(self):
+        api_factory = MockGroupApiFactory(self.groups, self.holdings)
+
+        result = get_holdings_for_group(
+            api_factory, "Scope", "Top", group_by_portfolio=True, as_data_frame=True
+        )
+
+        assert list(result) == ["Scope : P4", "Scope : P1", "Scope : P3", "Scope : P2"]
+        assert list(result["Scope : P3"]["units"]) == [5, 7]
+
+    def test_holdings_profiled(self, tmp_path):
+        api_factory = MockGroupApiFactory(self.groups, self.holdings)
+        profiler = LoadProfiler(str(tmp_path), cpu=False)
+
+        result = get_holdings_for_group(api_factory, "Scope", "Top", profiler=profiler)
+
+        assert result == get_holdings_for_group(api_factory, "Scope", "Top")
+        assert not profiler.running
+        assert sorted(file for file in os.listdir(tmp_path) if file.endswith(".tracemalloc")) == [
+            "memory_00_start.tracemalloc",
+            "memory_01_group_resolution.tracemalloc",
+            "memory_02_holdings_requests.tracemalloc",
+            "memory_03_join.tracemalloc",
+            "memory_04_end.tracemalloc",
+        ]
+
+
+class TestGetHoldingsTimeSeriesForGroup:
+    class DatedApiFactory(MockGroupApiFactory):
+        def get_portfolio_group_expansion(self, scope, code, **kwargs):
+            # P2 only joins the group on the second date
+            portfolios = ["P1", "P2"] if kwargs["effective_at"] == "2024-01-02" else ["P1"]
+            return SimpleNamespace(
+                id=ResourceId(scope=scope, code=code),
+                values=[SimpleNamespace(id=ResourceId(scope=scope, code=c)) for c in portfolios],
+                sub_groups=[],
+            )
+
+        def get_holdings(self, scope, code, **kwargs):
+            self.calls.append(("get_holdings", (code, kwargs["effective_at"], kwargs["as_at"])))
+            day = int(kwargs["effective_at"][-2:])
+            return SimpleNamespace(values=[holding("LUID_A", day), holding("LUID_B", 10 * day)])
+
+    def test_holdings_for_each_date_and_portfolio(self):
+        api_factory = self.DatedApiFactory({}, {})
+
+        df = get_holdings_time_series_for_group(
+            api_factory, "Scope", "Top", ["2024-01-01", "2024-01-02"], max_concurrency=2
+        )
+
+        assert list(df.columns[:4]) == ["effective_at", "portfolio", "instrument_uid", "holding_type"]
+        assert list(zip(df["effective_at"], df["portfolio"], df["instrument_uid"], df["units"])) == [
+            ("2024-01-01", "Scope : P1", "LUID_A", 1),
+            ("2024-01-01", "Scope : P1", "LUID_B", 10),
+            ("2024-01-02", "Scope : P1", "LUID_A", 2),
+            ("2024-01-02", "Scope : P1", "LUID_B", 20),
+            ("2024-01-02", "Scope : P2", "LUID_A", 2),
+            ("2024-01-02", "Scope : P2", "LUID_B", 20),
+        ]
+        # Every date is read as at the same time
+        assert len({as_at for call, (_, _, as_at) in api_factory.calls if call == "get_holdings"}) == 1
+
+    def test_effective_at_is_rejected(self):
+        with pytest.raises(ValueError):
+            get_holdings_time_series_for_group(
+                MockGroupApiFactory({}, {}), "Scope", "Top", ["2024-01-01"], effective_at="2024-01-01"
+            )
+
+
+class TestStreamHoldingsForGroup(TestGetHoldingsForGroup):
+    @pytest.mark.parametrize("max_concurrency", [1, 3])
+    def test_streamed_holdings_match_joined_holdings(self, max_concurrency):
+        api_factory = MockGroupApiFactory(self.groups, self.holdings)
+        received = []
+
+        streamed = stream_holdings_for_group(
+            api_factory,
+            "Scope",
+            "Top",
+            callback=lambda portfolio, holdings: received.append((portfolio, len(holdings))),
+            max_concurrency=max_concurrency,
+        )
+        joined = get_holdings_for_group(api_factory, "Scope", "Top")
+
+        assert sorted(received) == [("Scope : P1", 2), ("Scope : P2", 1), ("Scope : P3", 2), ("Scope : P4", 1)]
+        assert [h.model_dump() for h in streamed["Scope : Top"]] == [h.model_dump() for h in joined["Scope : Top"]]
+
+    def test_streamed_holdings_as_data_frame(self):
+        api_factory = MockGroupApiFactory(self.groups, self.holdings)
+
+        streamed = stream_holdings_for_group(api_factory, "Scope", "Top", as_data_frame=True)
+        joined = get_holdings_for_group(api_factory, "Scope", "Top", as_data_frame=True)
+
+        pandas.testing.assert_frame_equal(streamed["Scope : Top"], joined["Scope : Top"], check_dtype=False)
+
+    def test_stream_grouped_by_portfolio(self):
+        api_factory = MockGroupApiFactory(self.groups, self.holdings)
+        received = {}
+
+        result = stream_holdings_for_group(
+            api_factory, "Scope", "Top", callback=received.__setitem__, group_by_portfolio=True, as_data_frame=True
+        )
+
+        assert result is None
+        assert list(received["Scope : P3"]["units"]) == [5, 7]
+        with pytest.raises(ValueError):
+            stream_holdings_for_group(api_factory, "Scope", "Top", group_by_portfolio=True)
+
+    def test_holdings_at_a_fixed_as_at_are_served_from_a_read_cache(self, tmp_path):
+        api_factory = MockGroupApiFactory(self.groups, self.holdings)
+        as_at = datetime(2020, 1, 1, tzinfo=pytz.UTC)
+
+        first = get_holdings_for_group(
+            ReadCache(str(tmp_path / "cache.db")).api_factory(api_factory), "Scope", "Top", as_at=as_at
+        )
+        calls = len(api_factory.calls)
+        second = get_holdings_for_group(
+            ReadCache(str(tmp_path / "cache.db")).api_factory(api_factory), "Scope", "Top", as_at=as_at
+        )
+
+        assert len(api_factory.calls) == calls
+        assert [h.model_dump() for h in second["Scope : Top"]] == [h.model_dump() for h in first["Scope : Top"]]
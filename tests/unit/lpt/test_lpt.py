@@ -1,3 +1,6 @@
+import sys
+import threading
+
 import pandas
 import pytest
 from finbourne_sdk_utils.lpt.either import Either as _Either
@@ -23,10 +26,12 @@ from finbourne_sdk_utils.lpt import (
     records_to_df,
     Serialise,
     standard_flow,
+    stream_all_results,
     to_date,
     to_df,
     to_instrument_identifiers,
     trim_df,
+    write_output,
 )
 
 EMPTY_DF = pandas.DataFrame()
@@ -363,3 +368,536 @@ class TestIsPathSupportedExcelWithSheet:
         assert not lpt.is_path_supported_excel_with_sheet(input_path), (
             input_path + " should not be a valid excel path with a sheet."
         )
+
+
+class TestReadInputFormats:
+    """
+    Tests that columnar and compressed inputs are read and that mappings only read the columns which are kept.
+    """
+
+    source_df = pandas.DataFrame(
+        {
+            "id": ["a", "b", None],
+            "units": [1.5, 2.0, 3.0],
+            "unused": [1, 2, 3],
+        }
+    )
+
+    @pytest.mark.parametrize(
+        "file_name",
+        [
+            pytest.param("input.parquet", id="Parquet"),
+            pytest.param("input.feather", id="Feather"),
+            pytest.param("input.arrow", id="Arrow IPC"),
+            pytest.param("input.csv.gz", id="gzip compressed CSV"),
+        ],
+    )
+    def test_read_input_with_mappings(self, tmp_path, file_name):
+        pytest.importorskip("pyarrow")
+        path = str(tmp_path.joinpath(file_name))
+        if file_name.endswith(".parquet"):
+            self.source_df.to_parquet(path)
+        elif file_name.endswith(".gz"):
+            self.source_df.to_csv(path, index=False)
+        else:
+            self.source_df.to_feather(path)
+
+        df = lpt.read_input(path, mappings={"id": "ClientInternal", "units": "units"}, dtype=str)
+
+        assert sorted(df.columns) == ["ClientInternal", "units"]
+        assert list(df["ClientInternal"][:2]) == ["a", "b"]
+        assert pandas.isna(df["ClientInternal"][2])
+        assert list(df["units"]) == ["1.5", "2.0", "3.0"]
+
+    def test_read_columnar_only_reads_projected_columns(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        path = str(tmp_path.joinpath("input.arrow"))
+        self.source_df.to_feather(path)
+
+        df = lpt.read_columnar(path, projection=lambda column: column != "unused")
+
+        assert list(df.columns) == ["id", "units"]
+
+    def test_read_columnar_reads_feather_v1(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        import pyarrow.feather as feather
+
+        path = str(tmp_path.joinpath("input.feather"))
+        feather.write_feather(self.source_df, path, version=1)
+
+        df = lpt.read_columnar(path, projection=lambda column: column != "unused")
+
+        assert list(df.columns) == ["id", "units"]
+        assert list(df["units"]) == [1.5, 2.0, 3.0]
+
+    def test_read_input_accepts_csv_reader_arguments(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        path = str(tmp_path.joinpath("input.parquet"))
+        self.source_df.to_parquet(path)
+
+        # Options which only apply to CSV files are ignored, usecols chooses the columns to read
+        df = lpt.read_input(path, usecols=["id", "units"], keep_default_na=False, encoding="utf-8", use_threads=False)
+
+        assert list(df.columns) == ["id", "units"]
+
+    def test_read_columnar_without_pyarrow(self, tmp_path, monkeypatch):
+        monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+        with pytest.raises(ImportError, match=r"finbourne-sdk-utils\[pyarrow\]"):
+            lpt.read_columnar(str(tmp_path / "input.parquet"))
+
+
+class TestProcessInput:
+    """
+    Tests that multiple input files are combined and de-duplicated on their identifiers.
+    """
+
+    def test_process_input_combines_shards_and_removes_duplicates(self, tmp_path):
+        shards = [
+            pandas.DataFrame({"Figi": ["F1", "F2"], "name": ["one", "two"]}),
+            pandas.DataFrame({"Figi": ["F2", "F3"], "name": ["two again", "three"], "P:Sector": ["x", "y"]}),
+            pandas.DataFrame({"Figi": ["F4"], "name": ["four"]}),
+        ]
+        paths = []
+        for i, shard in enumerate(shards):
+            path = tmp_path.joinpath(f"shard_{i}.csv")
+            shard.to_csv(path, index=False)
+            paths.append(str(path))
+
+        class Args:
+            input = paths
+            mappings = ["Instrument/default/Figi=Figi"]
+            identifiers = ["Instrument/default/Figi"]
+
+        captured = {}
+
+        def fn(api, args, df, identifiers, prop_keys):
+            captured.update(df=df, identifiers=identifiers, prop_keys=prop_keys)
+
+        process_input({}, None, Args, fn)
+
+        df = captured["df"]
+        assert list(df.columns) == ["Instrument/default/Figi", "name", "P:Sector"]
+        assert list(df["Instrument/default/Figi"]) == ["F1", "F2", "F3", "F4"]
+        assert list(df["name"]) == ["one", "two", "three", "four"]
+        assert captured["identifiers"] == ["Instrument/default/Figi"]
+        assert captured["prop_keys"] == ["P:Sector"]
+
+    def test_process_input_keeps_distinct_rows_whose_hashes_collide(self, tmp_path, monkeypatch):
+        path = tmp_path.joinpath("input.csv")
+        pandas.DataFrame({"Figi": ["F1", "F2", "F1"]}).to_csv(path, index=False)
+
+        # Every row hashes to the same value, only rows with equal identifiers may be dropped
+        monkeypatch.setattr(
+            pandas.util, "hash_pandas_object", lambda obj, **kwargs: pandas.Series(0, index=obj.index, dtype="uint64")
+        )
+
+        class Args:
+            input = [str(path)]
+            mappings = []
+            identifiers = ["Figi"]
+
+        captured = {}
+        process_input({}, None, Args, lambda api, args, df, identifiers, prop_keys: captured.update(df=df))
+
+        assert list(captured["df"]["Figi"]) == ["F1", "F2"]
+
+
+class TestToDf:
+    """
+    Tests that to_df flattens objects using dot notation, property and sub-holding key columns.
+    """
+
+    @staticmethod
+    def prop(key, label=None, metric=None):
+        from types import SimpleNamespace
+
+        return SimpleNamespace(
+            key=key,
+            value=SimpleNamespace(
+                label_value=label,
+                metric_value=None if metric is None else SimpleNamespace(value=metric),
+            ),
+        )
+
+    def test_to_df(self):
+        from types import SimpleNamespace
+
+        holdings = [
+            (
+                "h1",
+                SimpleNamespace(
+                    instrument_uid="LUID_1",
+                    cost=SimpleNamespace(amount=10.0, currency="GBP"),
+                    properties=[self.prop("Instrument/default/Name", label="One"), self.prop("Instrument/default/Name", label="Dup")],
+                    sub_holding_keys={"Transaction/default/Strategy": self.prop("Transaction/default/Strategy", label="Growth")},
+                    extra={"a": 1},
+                ),
+            ),
+            (
+                "h2",
+                SimpleNamespace(
+                    instrument_uid="LUID_2",
+                    cost=None,
+                    properties={"Instrument/default/Name": self.prop("Instrument/default/Name", metric=5.0)},
+                    sub_holding_keys=None,
+                    extra=None,
+                ),
+            ),
+        ]
+        columns = [
+            "0",
+            "1.instrument_uid",
+            "1.cost.amount",
+            "P:Instrument/default/Name",
+            "P:Instrument/default/Missing",
+            "SHK:Transaction/default/Strategy",
+            "1.extra.KEY:a",
+        ]
+
+        class Response:
+            values = [SimpleNamespace(**{"0": h[0], "1": h[1]}) for h in holdings]
+
+        df = to_df(holdings, ["P:Instrument/default/Name", "P:Instrument/default/Missing", "SHK:Transaction/default/Strategy"])
+
+        assert list(df["P:Instrument/default/Name"]) == ["One", 5.0]
+        assert list(df["P:Instrument/default/Missing"]) == [None, None]
+        assert list(df["SHK:Transaction/default/Strategy"]) == ["Growth", None]
+
+        df = to_df(Response, columns[:3] + ["1.extra.KEY:a"])
+        assert list(df["1.instrument_uid"]) == ["LUID_1", "LUID_2"]
+        assert df["1.cost.amount"][0] == 10.0 and pandas.isna(df["1.cost.amount"][1])
+        assert df["1.extra.KEY:a"][0] == 1 and pandas.isna(df["1.extra.KEY:a"][1])
+
+    def test_to_df_empty(self):
+        df = to_df([], ["a", "b.c"])
+        assert list(df.columns) == ["a", "b.c"]
+        assert len(df) == 0
+
+
+class TestFromDf:
+    """
+    Tests that from_df builds records with simple, complex, property and instrument identifier fields.
+    """
+
+    class Record:
+        openapi_types = {
+            "transaction_id": "str",
+            "units": "float",
+            "total_consideration": "CurrencyAndAmount",
+            "instrument_identifiers": "dict(str, str)",
+            "properties": "dict(str, PerpetualProperty)",
+        }
+
+        def __init__(self, **kwargs):
+            self.__dict__.update(kwargs)
+
+    class Model:
+        def __init__(self, *args, **kwargs):
+            self.args = args
+            self.__dict__.update(kwargs)
+
+    complex_types = {
+        "CurrencyAndAmount": Model,
+        "PerpetualProperty": Model,
+        "PropertyValue": Model,
+        "MetricValue": Model,
+    }
+
+    def test_from_df(self):
+        df = pandas.DataFrame(
+            {
+                "transaction_id": ["T1", "T2", "T3"],
+                "units": [1.0, 2.0, 3.0],
+                "total_consideration.amount": [10.0, 20.0, 30.0],
+                "total_consideration.currency": ["GBP", "USD", "GBP"],
+                "instrument_uid": ["Figi:BBG1", "CCY_GBP", "Figi:BBG1"],
+                "P:Transaction/default/Broker": ["Alpha", None, "Beta"],
+                "P:Transaction/default/Fee": [None, 1.5, None],
+                "noise": ["x", "y", "z"],
+            }
+        )
+
+        records = from_df(df, self.Record, self.complex_types)
+
+        assert [r.transaction_id for r in records] == ["T1", "T2", "T3"]
+        assert [r.total_consideration.currency for r in records] == ["GBP", "USD", "GBP"]
+        assert [r.instrument_identifiers for r in records] == [
+            {"Instrument/default/Figi": "BBG1"},
+            {"Instrument/default/Currency": "GBP"},
+            {"Instrument/default/Figi": "BBG1"},
+        ]
+        # Shared instruments do not share a mutable identifiers dictionary
+        assert records[0].instrument_identifiers is not records[2].instrument_identifiers
+        assert not hasattr(records[0], "noise")
+        assert not hasattr(records[0], "instrument_uid")
+
+        assert list(records[0].properties) == ["Transaction/default/Broker"]
+        assert records[0].properties["Transaction/default/Broker"].value.label_value == "Alpha"
+        assert list(records[1].properties) == ["Transaction/default/Fee"]
+        assert records[1].properties["Transaction/default/Fee"].value.metric_value.args == (1.5,)
+
+    def test_from_df_related(self):
+        df = pandas.DataFrame({"transaction_id": ["T1", "T2"], "units": [1.0, 2.0]}, index=[5, 7])
+
+        records = from_df(
+            df,
+            self.Record,
+            self.complex_types,
+            related=lambda i, row, fields: {**fields, "units": row["units"] * i},
+        )
+        assert [r.units for r in records] == [5.0, 14.0]
+
+        records = from_df(df, self.Record, self.complex_types, related={7: {"units": 0.0}})
+        assert [r.units for r in records] == [1.0, 0.0]
+
+
+class TestPager:
+    """
+    Tests that results are paged by following NextPage links, with and without prefetching.
+    """
+
+    class Pages:
+        def __init__(self, pages, fail_on=None):
+            self.pages = pages
+            self.fail_on = fail_on
+            self.events = []
+
+        def token(self, index):
+            return "token%08d" % index
+
+        def fetch_page(self, token):
+            index = 0 if token is None else int(token[5:])
+            self.events.append(("fetch", index))
+            if index == self.fail_on:
+                return _Either(left="error")
+            links = []
+            if index + 1 < len(self.pages):
+                links.append(_Rec(relation="NextPage", href="https://host/api?page={}".format(self.token(index + 1))))
+            return _Either(right=_Rec(content=_Rec(links=links, values=self.pages[index])))
+
+        def page_handler(self, result):
+            index = len([e for e in self.events if e[0] == "handle"])
+            self.events.append(("handle", index))
+            return pandas.DataFrame({"value": result.content.values})
+
+    @pytest.mark.parametrize("prefetch", [True, False])
+    def test_page_all_results(self, prefetch):
+        pages = self.Pages([[1, 2], [3], [4, 5]])
+
+        df = page_all_results(pages.fetch_page, pages.page_handler, prefetch=prefetch)
+
+        assert list(df["value"]) == [1, 2, 3, 4, 5]
+        assert [e for e in pages.events if e[0] == "fetch"] == [("fetch", 0), ("fetch", 1), ("fetch", 2)]
+
+    def test_stream_all_results_prefetches_next_page(self):
+        pages = self.Pages([[1], [2], [3]])
+        second_page_requested = threading.Event()
+        overlapped = []
+
+        def fetch_page(token):
+            result = pages.fetch_page(token)
+            if token is not None:
+                second_page_requested.set()
+            return result
+
+        def page_handler(result):
+            # The first page is handled while the second page is being requested
+            if not overlapped:
+                overlapped.append(second_page_requested.wait(timeout=5))
+            return pages.page_handler(result)
+
+        stream = stream_all_results(fetch_page, page_handler)
+
+        assert [list(page.right["value"]) for page in stream] == [[1], [2], [3]]
+        assert overlapped == [True]
+
+    @pytest.mark.parametrize("prefetch", [True, False])
+    def test_page_all_results_returns_error(self, prefetch):
+        pages = self.Pages([[1], [2], [3]], fail_on=1)
+
+        result = page_all_results(pages.fetch_page, pages.page_handler, prefetch=prefetch)
+
+        assert isinstance(result, _Either)
+        assert result.left == "error"
+
+    @pytest.mark.parametrize("prefetch", [True, False])
+    def test_page_all_results_returns_handler_error(self, prefetch):
+        pages = self.Pages([[1], [2], [3]])
+        error = ValueError("bad page")
+
+        def page_handler(result):
+            if result.content.values == [2]:
+                raise error
+            return pages.page_handler(result)
+
+        result = page_all_results(pages.fetch_page, page_handler, prefetch=prefetch)
+
+        assert isinstance(result, _Either)
+        assert result.left is error
+
+    def test_page_all_results_skips_pages_handled_as_none(self):
+        pages = self.Pages([[1, 2], [3], [4]])
+
+        def page_handler(result):
+            return None if result.content.values == [3] else pages.page_handler(result)
+
+        df = page_all_results(pages.fetch_page, page_handler)
+
+        assert list(df["value"]) == [1, 2, 4]
+        assert page_all_results(self.Pages([[1]]).fetch_page, lambda result: None).empty
+
+    def test_page_all_results_spills_to_parquet(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        pages = self.Pages([[1, 2], [3], [4, 5], [6]])
+        path = str(tmp_path / "results.parquet")
+
+        result = page_all_results(pages.fetch_page, pages.page_handler, spill_path=path, spill_rows=2)
+
+        assert result == path
+        assert list(pandas.read_parquet(path)["value"]) == [1, 2, 3, 4, 5, 6]
+
+    def test_page_all_results_under_spill_rows(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        pages = self.Pages([[1, 2], [3]])
+        path = tmp_path / "results.parquet"
+
+        df = page_all_results(pages.fetch_page, pages.page_handler, spill_path=str(path), spill_rows=10)
+
+        assert list(df["value"]) == [1, 2, 3]
+        assert not path.exists()
+
+    def test_page_all_results_spill_without_pyarrow(self, tmp_path, monkeypatch):
+        # A module set to None in sys.modules fails to import
+        monkeypatch.setitem(sys.modules, "pyarrow", None)
+        pages = self.Pages([[1, 2], [3]])
+
+        with pytest.raises(ImportError, match=r"finbourne-sdk-utils\[pyarrow\]"):
+            page_all_results(
+                pages.fetch_page, pages.page_handler, spill_path=str(tmp_path / "results.parquet"), spill_rows=1
+            )
+
+        assert pages.events == []
+
+
+
+class TestWriteOutput:
+    """
+    Tests that query results are written in the format given by the file extension, a chunk at a time.
+    """
+
+    chunks = [
+        pandas.DataFrame({"id": ["a", "b"], "value": [1.0, 2.0]}),
+        pandas.DataFrame({"id": ["c"], "value": [3.0]}),
+    ]
+
+    @pytest.mark.parametrize("filename", ["out.csv", "out.csv.gz", "out.pk"])
+    def test_write_output(self, tmp_path, filename):
+        path = str(tmp_path / filename)
+
+        write_output(iter(self.chunks), path)
+
+        df = pandas.read_pickle(path) if filename.endswith(".pk") else pandas.read_csv(path)
+        assert list(df["id"]) == ["a", "b", "c"]
+        assert list(df["value"]) == [1.0, 2.0, 3.0]
+
+    @pytest.mark.parametrize("filename", ["out.csv.zip", "out.csv.zst", "out.csv.bz2", "out.csv.xz"])
+    def test_write_output_compressed_csv(self, tmp_path, filename):
+        if filename.endswith(".zst"):
+            pytest.importorskip("zstandard")
+        path = str(tmp_path / filename)
+
+        write_output(iter(self.chunks), path)
+
+        if filename.endswith(".zip"):
+            import zipfile
+
+            assert zipfile.is_zipfile(path)
+        else:
+            with open(path, "rb") as f:
+                assert not f.read().startswith(b"id,value")
+
+        df = read_input(path)
+        assert list(df["id"]) == ["a", "b", "c"]
+        assert list(df["value"]) == [1.0, 2.0, 3.0]
+
+    def test_write_output_explicit_csv_compression(self, tmp_path):
+        path = str(tmp_path / "out.csv")
+
+        write_output(iter(self.chunks), path, compression="gzip")
+
+        assert list(pandas.read_csv(path, compression="gzip")["id"]) == ["a", "b", "c"]
+
+        with pytest.raises(ValueError):
+            write_output(iter(self.chunks), path, compression="snappy")
+
+    @pytest.mark.parametrize(
+        "filename, compression",
+        [("out.parquet", None), ("out.parquet", "zstd"), ("out.arrow", None), ("out.feather", "zstd")],
+    )
+    def test_write_output_columnar(self, tmp_path, filename, compression):
+        pytest.importorskip("pyarrow")
+        path = str(tmp_path / filename)
+
+        write_output(iter(self.chunks), path, compression=compression)
+
+        df = lpt.read_columnar(path)
+        assert list(df["id"]) == ["a", "b", "c"]
+        assert list(df["value"]) == [1.0, 2.0, 3.0]
+
+    def test_standard_flow_writes_chunks(self, tmp_path):
+        from types import SimpleNamespace
+
+        path = str(tmp_path / "out.csv")
+        api = SimpleNamespace(dump_stats=lambda: None)
+
+        standard_flow(
+            lambda: SimpleNamespace(filename=path),
+            lambda args: api,
+            lambda api, args: (chunk for chunk in self.chunks),
+        )
+
+        assert list(pandas.read_csv(path)["id"]) == ["a", "b", "c"]
+
+    def test_standard_flow_writes_compressed_output(self, tmp_path):
+        from types import SimpleNamespace
+
+        path = str(tmp_path / "out.csv")
+        api = SimpleNamespace(dump_stats=lambda: None)
+
+        standard_flow(
+            lambda: SimpleNamespace(filename=path, compression="gzip"),
+            lambda args: api,
+            lambda api, args: (chunk for chunk in self.chunks),
+        )
+
+        assert list(pandas.read_csv(path, compression="gzip")["id"]) == ["a", "b", "c"]
+
+    def test_write_output_csv_chunks_in_the_columns_of_the_first(self, tmp_path):
+        path = str(tmp_path / "out.csv")
+        chunks = [self.chunks[0], self.chunks[1][["value", "id"]]]
+
+        write_output(iter(chunks), path)
+
+        df = pandas.read_csv(path)
+        assert list(df.columns) == ["id", "value"]
+        assert list(df["id"]) == ["a", "b", "c"]
+        assert list(df["value"]) == [1.0, 2.0, 3.0]
+
+
+class TestDisplayDf:
+    def test_display_df_previews_large_frames(self, capsys):
+        df = pandas.DataFrame({"value": range(100)})
+
+        display_df(df, max_rows=10)
+
+        out = capsys.readouterr().out
+        assert "[100 rows x 1 columns]" in out
+        assert "99" in out and "50" not in out
+
+    def test_display_df_small_frames(self, capsys):
+        display_df(pandas.DataFrame({"value": [1.0, None]}))
+
+        out = capsys.readouterr().out
+        assert "1.00" in out
+        assert "rows x" not in out
@@ -0,0 +1,199 @@
+import os
+import pickle
+import stat
+from types import SimpleNamespace
+from datetime import datetime, timedelta, timezone
+
+import finbourne.sdk.services.lusid.models as models
+import pytest
+from finbourne.sdk.exceptions import ApiException
+from finbourne.sdk.extensions import SyncApiClientFactory
+
+from finbourne_sdk_utils.lpt import CachedApiFactory, ReadCache
+
+past = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+class MockPortfoliosApi:
+    def __init__(self):
+        self.calls = []
+
+    def get_portfolio(self, scope, code, as_at=None):
+        self.calls.append((scope, code, as_at))
+        if code == "missing":
+            raise ApiException(status=404, reason="Not Found")
+        return {"scope": scope, "code": code, "padding": "x" * 100}
+
+    def get_holdings(self, scope, code, effective_at=None, as_at=None, to_effective_at=None, from_as_at=None):
+        self.calls.append((scope, code, as_at))
+        return {"scope": scope, "code": code, "effective_at": effective_at}
+
+    def get_portfolio_model(self, scope, code, as_at=None):
+        self.calls.append((scope, code, as_at))
+        return models.Portfolio.from_dict(
+            {
+                "id": {"scope": scope, "code": code},
+                "type": "Transaction",
+                "displayName": code,
+                "created": "2020-01-01T00:00:00+00:00",
+                "description": None,
+                "links": [],
+            }
+        )
+
+
+class MockApiFactory(SyncApiClientFactory):
+    def __init__(self):
+        self.api = MockPortfoliosApi()  # Skip parent __init__ which requires OAuth credentials
+
+    def build(self, api):  # type: ignore[override]
+        return self.api
+
+
+class TestReadCache:
+    def test_pinned_reads_are_served_from_the_cache(self, tmp_path):
+        cache = ReadCache(str(tmp_path / "cache.db"))
+        api = cache.wrap(MockPortfoliosApi())
+
+        first = api.get_portfolio("s", "c", as_at=past)
+        second = api.get_portfolio(scope="s", code="c", as_at=past)
+        api.get_portfolio("s", "c", as_at=past.isoformat())
+        api.get_portfolio("s", "d", as_at=past)
+
+        assert first == second
+        assert api._api.calls == [("s", "c", past), ("s", "d", past)]
+        assert cache.hits == 2
+
+    @pytest.mark.parametrize(
+        "as_at", [None, datetime.now(timezone.utc) + timedelta(days=1), "latest"]
+    )
+    def test_unpinned_reads_are_not_cached(self, tmp_path, as_at):
+        cache = ReadCache(str(tmp_path / "cache.db"))
+        api = cache.wrap(MockPortfoliosApi())
+
+        api.get_portfolio("s", "c", as_at=as_at)
+        api.get_portfolio("s", "c", as_at=as_at)
+
+        assert len(api._api.calls) == 2
+        assert len(cache) == 0
+
+    def test_errors_are_not_cached(self, tmp_path):
+        cache = ReadCache(str(tmp_path / "cache.db"))
+        api = cache.wrap(MockPortfoliosApi())
+
+        for _ in range(2):
+            with pytest.raises(ApiException):
+                api.get_portfolio("s", "missing", as_at=past)
+
+        assert len(api._api.calls) == 2
+        assert len(cache) == 0
+
+    def test_cache_persists_between_sessions(self, tmp_path):
+        path = str(tmp_path / "nested" / "cache.db")
+        factory = ReadCache(path).api_factory(MockApiFactory())
+        factory.build(MockPortfoliosApi).get_portfolio("s", "c", as_at=past)
+        factory.cache.close()
+
+        factory = CachedApiFactory(MockApiFactory(), ReadCache(path))
+        response = factory.build(MockPortfoliosApi).get_portfolio("s", "c", as_at=past)
+
+        assert response["code"] == "c"
+        assert factory.api_factory.api.calls == []
+
+    def test_least_recently_used_entries_are_evicted(self, tmp_path):
+        cache = ReadCache(str(tmp_path / "cache.db"))
+        api = cache.wrap(MockPortfoliosApi())
+        api.get_portfolio("s", "a", as_at=past)
+        cache.max_bytes = cache.size * 2
+
+        api.get_portfolio("s", "b", as_at=past)
+        api.get_portfolio("s", "a", as_at=past)
+        api.get_portfolio("s", "c", as_at=past)
+
+        assert len(cache) == 2
+        assert cache.size <= cache.max_bytes
+        # "b" was the least recently used so it is requested again, "a" is still cached
+        api.get_portfolio("s", "a", as_at=past)
+        api.get_portfolio("s", "b", as_at=past)
+        assert [code for _, code, _ in api._api.calls] == ["a", "b", "c", "b"]
+
+    def test_positional_as_at_is_cached(self, tmp_path):
+        cache = ReadCache(str(tmp_path / "cache.db"))
+        api = cache.wrap(MockPortfoliosApi())
+
+        api.get_portfolio("s", "c", past)
+        api.get_portfolio("s", "c", as_at=past)
+
+        assert len(api._api.calls) == 1
+        assert cache.hits == 1
+
+    def test_models_are_stored_as_json(self, tmp_path):
+        path = tmp_path / "cache.db"
+        cache = ReadCache(str(path))
+        api = cache.wrap(MockPortfoliosApi())
+
+        first = api.get_portfolio_model("s", "c", as_at=past)
+        second = api.get_portfolio_model("s", "c", as_at=past)
+
+        assert isinstance(second, models.Portfolio)
+        assert second == first
+        # The fields which were set, including nullable fields set to None, are kept
+        assert second.to_dict() == first.to_dict()
+        assert len(api._api.calls) == 1
+
+        blob = cache.connection.execute("SELECT value FROM entries").fetchone()[0]
+        assert blob.startswith(b'{"model":')
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    def test_unreadable_entries_are_replaced(self, tmp_path):
+        cache = ReadCache(str(tmp_path / "cache.db"))
+        api = cache.wrap(MockPortfoliosApi())
+        api.get_portfolio("s", "c", as_at=past)
+        # e.g. an entry written by an earlier version which pickled the responses
+        cache.connection.execute("UPDATE entries SET value = ?", (pickle.dumps({"code": "c"}),))
+
+        response = api.get_portfolio("s", "c", as_at=past)
+        api.get_portfolio("s", "c", as_at=past)
+
+        assert response["code"] == "c"
+        assert len(api._api.calls) == 2
+        assert cache.hits == 1
+
+    def test_eviction_stops_when_the_cache_is_empty(self, tmp_path):
+        cache = ReadCache(str(tmp_path / "cache.db"), max_bytes=50)
+        # The recorded size is larger than the entries in the file add up to
+        cache.size = 100
+
+        cache.put(cache.key("endpoint", {}), "endpoint", "x")
+
+        assert cache.size == 0
+        assert len(cache) == 0
+
+    def test_reads_which_default_to_now_are_not_cached(self, tmp_path):
+        cache = ReadCache(str(tmp_path / "cache.db"))
+        api = cache.wrap(MockPortfoliosApi())
+
+        # Only the call with both effective_at and to_effective_at set is cached, LUSID takes either to be now when
+        # it is left out. from_as_at defaults to the start of time so does not need to be set
+        for _ in range(2):
+            api.get_holdings("s", "c", as_at=past)
+            api.get_holdings("s", "c", effective_at="2020-01-01", as_at=past)
+            api.get_holdings("s", "c", effective_at="2020-01-01", to_effective_at="2020-01-02", as_at=past)
+
+        assert len(api._api.calls) == 5
+        assert cache.hits == 1
+
+    def test_reads_from_different_environments_do_not_share_entries(self, tmp_path):
+        cache = ReadCache(str(tmp_path / "cache.db"))
+        apis = []
+        for host in ("https://one.lusid.com/api", "https://two.lusid.com/api"):
+            api = MockPortfoliosApi()
+            api.sync_api_client = SimpleNamespace(configuration=SimpleNamespace(host=host))
+            apis.append(cache.wrap(api))
+
+        for api in apis * 2:
+            api.get_portfolio("s", "c", as_at=past)
+
+        assert [len(api._api.calls) for api in apis] == [1, 1]
+        assert cache.hits == 2
+
@@ -0,0 +1,181 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from finbourne.sdk.exceptions import ApiException
+from finbourne.sdk.extensions import SyncApiClientFactory
+from finbourne.sdk.extensions.retry import RetryingRestWrapper
+
+from finbourne_sdk_utils.lpt import CallStats, StatsApiFactory, standard_flow
+from finbourne_sdk_utils.lpt.stats import LatencyHistogram
+
+
+class MockPortfoliosApi:
+    def get_portfolio(self, scope, code):
+        if code == "missing":
+            raise ApiException(status=404, reason="Not Found")
+        return {"scope": scope, "code": code}
+
+
+class MockApiFactory(SyncApiClientFactory):
+    def __init__(self):
+        pass  # Skip parent __init__ which requires OAuth credentials
+
+    def build(self, api):  # type: ignore[override]
+        return MockPortfoliosApi()
+
+
+class MockRestClient:
+    def __init__(self, failures):
+        self.failures = failures
+
+    def request(self, method, url, query_params=None, headers=None, body=None, *args):
+        if self.failures > 0:
+            self.failures -= 1
+            error = ApiException(status=503, reason="Service Unavailable")
+            error.headers = {"Retry-After": "0"}
+            error.body = "unavailable"
+            raise error
+        return SimpleNamespace(status=200, data=b'{"scope": "scope", "code": "code"}')
+
+
+class MockInstrumentsApi:
+    # Calls through the SDK's retrying REST client as the generated apis do
+    def __init__(self, failures=0):
+        self.sync_api_client = SimpleNamespace(rest_client=RetryingRestWrapper(MockRestClient(failures), retries=3))
+
+    def upsert_instruments(self, body):
+        return self.sync_api_client.rest_client.request("POST", "/api/instruments", body=body)
+
+    def upsert_instruments_positionally(self, body):
+        return self.sync_api_client.rest_client.request("POST", "/api/instruments", None, None, body)
+
+
+class TestLatencyHistogram:
+    def test_quantiles_within_relative_error(self):
+        histogram = LatencyHistogram(relative_error=0.01)
+        latencies = [i / 1000 for i in range(1, 1001)]
+        for latency in latencies:
+            histogram.add(latency)
+
+        assert histogram.count == 1000
+        assert histogram.mean() == pytest.approx(sum(latencies) / 1000)
+        for q, expected in ((0.5, 0.5), (0.95, 0.95), (0.99, 0.99)):
+            assert histogram.quantile(q) == pytest.approx(expected, rel=0.02)
+
+    def test_empty(self):
+        assert LatencyHistogram().quantile(0.5) is None
+
+
+class TestCallStats:
+    def test_records_calls_through_api_factory(self):
+        stats = CallStats()
+        api_factory = stats.api_factory(MockApiFactory())
+
+        assert isinstance(api_factory, StatsApiFactory)
+        api = api_factory.build(MockPortfoliosApi)
+
+        assert api.get_portfolio("scope", "code") == {"scope": "scope", "code": "code"}
+        with pytest.raises(ApiException):
+            api.get_portfolio("scope", "missing")
+
+        df = stats.to_df()
+        assert list(df["endpoint"]) == ["MockPortfoliosApi.get_portfolio"]
+        assert df["calls"][0] == 2
+        assert df["errors"][0] == 1
+        assert stats.endpoints["MockPortfoliosApi.get_portfolio"].statuses == {200: 1, 404: 1}
+
+    def test_output_formats(self, tmp_path):
+        stats = CallStats()
+        for latency in (0.1, 0.2, 0.3):
+            stats.record("TransactionPortfoliosApi.upsert_transactions", 200, latency, request_bytes=100)
+        stats.record("TransactionPortfoliosApi.upsert_transactions", 429, 0.05, retries=2)
+        stats.record("QuotesApi.upsert_quotes", 200, 0.01, response_bytes=10)
+
+        df = stats.to_df()
+        assert list(df["endpoint"]) == ["QuotesApi.upsert_quotes", "TransactionPortfoliosApi.upsert_transactions"]
+        upserts = df.iloc[1]
+        assert (upserts["calls"], upserts["errors"], upserts["retries"], upserts["requestBytes"]) == (4, 1, 2, 300)
+        assert upserts["p50"] == pytest.approx(0.1, rel=0.02)
+        assert upserts["p99"] == pytest.approx(0.3, rel=0.02)
+
+        records = json.loads(stats.to_json())
+        assert records[1]["statuses"] == {"200": 3, "429": 1}
+
+        text = stats.to_prometheus()
+        assert "# TYPE lusid_sdk_request_duration_seconds summary" in text
+        assert 'lusid_sdk_requests_total{endpoint="TransactionPortfoliosApi.upsert_transactions",status="429"} 1' in text
+        assert 'lusid_sdk_request_duration_seconds_count{endpoint="QuotesApi.upsert_quotes"} 1' in text
+
+        for filename in ("stats.csv", "stats.json", "stats.prom"):
+            stats.dump(str(tmp_path / filename))
+            assert (tmp_path / filename).read_text()
+
+    def test_records_payload_sizes_and_retries_from_the_rest_client(self):
+        stats = CallStats()
+        api = stats.wrap(MockInstrumentsApi(failures=2))
+
+        api.upsert_instruments({"a": 1})
+
+        stats_df = stats.to_df()
+        assert stats_df["retries"][0] == 2
+        # Each of the three attempts sends the body and receives either the error or the response
+        assert stats_df["requestBytes"][0] == 3 * len('{"a": 1}')
+        assert stats_df["responseBytes"][0] == 2 * len("unavailable") + len('{"scope": "scope", "code": "code"}')
+
+    def test_the_callers_api_client_is_not_changed(self):
+        stats = CallStats()
+        instruments_api = MockInstrumentsApi()
+        rest_client = instruments_api.sync_api_client.rest_client
+        rest_object = rest_client.rest_object
+
+        stats.wrap(instruments_api).upsert_instruments({"a": 1})
+        # Calls made through the original api are not recorded
+        instruments_api.upsert_instruments({"a": 1})
+        instruments_api.sync_api_client.rest_client.request("POST", "/api/instruments", None, None, {"a": 1})
+
+        assert instruments_api.sync_api_client.rest_client is rest_client
+        assert rest_client.rest_object is rest_object
+        assert stats.to_df()["calls"].tolist() == [1]
+
+    def test_positional_request_arguments_are_forwarded(self):
+        stats = CallStats()
+
+        stats.wrap(MockInstrumentsApi()).upsert_instruments_positionally({"a": 1})
+
+        assert stats.to_df()["requestBytes"][0] == len('{"a": 1}')
+
+    def test_api_factory_forwards_to_the_wrapped_factory(self):
+        api_factory = MockApiFactory()
+        api_factory.configuration = SimpleNamespace(host="https://example.lusid.com/api")
+        api_factory.get_api_client = lambda: "client"
+
+        stats_factory = CallStats().api_factory(api_factory)
+
+        assert stats_factory.configuration is api_factory.configuration
+        assert stats_factory.get_api_client() == "client"
+
+    def test_prometheus_labels_are_escaped(self):
+        stats = CallStats()
+        stats.record('Api."quoted"', 200, 0.1)
+
+        text = stats.to_prometheus()
+
+        assert 'lusid_sdk_request_duration_seconds_sum{endpoint="Api.\\"quoted\\""} 0.1' in text
+        assert 'lusid_sdk_request_duration_seconds_count{endpoint="Api.\\"quoted\\""} 1' in text
+
+    def test_standard_flow_records_calls(self, tmp_path):
+        path = tmp_path / "stats.json"
+        dumped = []
+        connection = MockApiFactory()
+        connection.dump_stats = lambda: dumped.append(True)
+
+        standard_flow(
+            lambda: SimpleNamespace(call_stats=str(path)),
+            lambda args: connection,
+            lambda api, args: api.build(MockPortfoliosApi).get_portfolio("scope", "code") and None,
+        )
+
+        records = json.loads(path.read_text())
+        assert [record["endpoint"] for record in records] == ["MockPortfoliosApi.get_portfolio"]
+        assert dumped == [True]
@@ -0,0 +1,147 @@
+from datetime import datetime, timezone
+
+import finbourne.sdk.services.lusid.models as models
+from flatten_json import flatten
+import pandas as pd
+import pytest
+
+from finbourne_sdk_utils.pandas_utils import lusid_response_to_data_frame, models_to_data_frame
+
+effective_from = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def holding(i):
+    properties = {
+        "Instrument/default/Name": models.ModelProperty(
+            key="Instrument/default/Name",
+            value=models.PropertyValue(label_value=f"Name{i}"),
+            effective_from=effective_from,
+        )
+    }
+    if i % 2:
+        properties["Holding/test/Score"] = models.ModelProperty(
+            key="Holding/test/Score",
+            value=models.PropertyValue(metric_value=models.MetricValue(value=float(i))),
+        )
+    sub_holding_keys = (
+        {
+            "Transaction/test/Strategy": models.PerpetualProperty(
+                key="Transaction/test/Strategy", value=models.PropertyValue(label_value="Growth")
+            )
+        }
+        if i % 3
+        else {}
+    )
+    return models.PortfolioHolding(
+        instrument_uid=f"LUID_{i:08d}",
+        sub_holding_keys=sub_holding_keys,
+        properties=properties,
+        holding_type="P",
+        units=float(i),
+        settled_units=float(i),
+        cost=models.CurrencyAndAmount(amount=1.5 * i, currency="GBP"),
+        cost_portfolio_ccy=models.CurrencyAndAmount(amount=1.5 * i, currency="GBP"),
+        currency="GBP",
+        # Explicitly setting a nullable field to None keeps it in the to_dict() output
+        holding_id=i if i % 4 else None,
+    )
+
+
+def instrument(i):
+    return models.Instrument(
+        lusid_instrument_id=f"LUID_{i:08d}",
+        version=models.Version(effective_from=effective_from, as_at_date=effective_from),
+        name=f"Instrument{i}",
+        identifiers={"Figi": f"BBG{i:09d}"},
+        properties=[models.ModelProperty(key="Instrument/test/Sector", value=models.PropertyValue(label_value="Tech"))],
+        state="Active",
+        links=[],
+        # The equity definition's fields are flattened from its additional properties
+        instrument_definition=models.Equity(
+            instrument_type="Equity", dom_ccy="GBP", identifiers=models.EquityAllOfIdentifiers(isin=f"GB{i:010d}")
+        )
+        if i % 2
+        else None,
+    )
+
+
+class TestModelsToDataFrame:
+    @pytest.mark.parametrize("items", [[holding(i) for i in range(12)], [instrument(i) for i in range(4)]])
+    def test_matches_flattened_to_dict(self, items):
+        expected = pd.DataFrame(flatten(item.to_dict(), ".") for item in items)
+
+        result = models_to_data_frame(items)
+
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_matches_flattened_to_dict_with_enum_values(self):
+        # Models built without validation keep the enum members which to_dict() converts to their values
+        items = [holding(i) for i in range(1, 4)]
+        for i, item in enumerate(items):
+            item.transaction = models.Transaction.model_construct(
+                **{
+                    **dict.fromkeys(models.Transaction.model_fields),
+                    **models.Transaction(
+                        transaction_id=f"T{i}",
+                        type="Buy",
+                        instrument_identifiers={},
+                        instrument_uid=item.instrument_uid,
+                        transaction_date=effective_from,
+                        settlement_date=effective_from,
+                        units=item.units,
+                        transaction_price=models.TransactionPrice(price=1.0, type="Price"),
+                        total_consideration=models.CurrencyAndAmount(amount=item.units, currency="GBP"),
+                        source="s",
+                    ).__dict__,
+                    "transaction_price": models.TransactionPrice.model_construct(
+                        price=1.0, type=models.TransactionPriceType.PRICE
+                    ),
+                    "transaction_status": models.TransactionStatus.ACTIVE,
+                }
+            )
+        expected = pd.DataFrame(flatten(item.to_dict(), ".") for item in items)
+
+        result = models_to_data_frame(items)
+
+        assert type(result["transaction.transactionStatus"][0]) is str
+        assert type(result["transaction.transactionPrice.type"][0]) is str
+        assert "subHoldingKeys.Transaction/test/Strategy.value.labelValue" in result.columns
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_leaves_out_fields_which_to_dict_leaves_out(self):
+        # The name of a client is read only so to_dict() leaves it out unless it is explicitly set to None
+        items = [models.Client(), models.Client(name="a"), models.Client(name=None)]
+        expected = pd.DataFrame(flatten(item.to_dict(), ".") for item in items)
+
+        result = models_to_data_frame(items)
+
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_empty(self):
+        assert models_to_data_frame([]).empty
+
+    def test_lusid_response_to_data_frame(self):
+        response = models.VersionedResourceListOfPortfolioHolding(
+            version=models.Version(effective_from=effective_from, as_at_date=effective_from),
+            values=[holding(i) for i in range(1, 4)],
+        )
+
+        result = lusid_response_to_data_frame(response)
+
+        assert list(result["properties.Instrument/default/Name.value.labelValue"]) == ["Name1", "Name2", "Name3"]
+        assert list(result["subHoldingKeys.Transaction/test/Strategy.value.labelValue"].fillna("")) == [
+            "Growth",
+            "Growth",
+            "",
+        ]
+        # Columns with no values are dropped
+        assert "holdingId" in result.columns and "instrumentScope" not in result.columns
+
+    def test_rename_properties(self):
+        result = lusid_response_to_data_frame([holding(i) for i in range(1, 4)], rename_properties=True)
+
+        assert list(result["Name(default-Properties)"]) == ["Name1", "Name2", "Name3"]
+        assert list(result["Score(test-Properties)"].fillna(0)) == [1.0, 0, 3.0]
+        assert list(result["Strategy(test-Subholdingkeys)"].fillna("")) == ["Growth", "Growth", ""]
+        # The metadata of the properties and sub-holding keys is left out
+        assert not [column for column in result.columns if column.startswith(("properties.", "subHoldingKeys."))]
@@ -142,3 +142,48 @@ class TestPandasUtilsInitExports(unittest.TestCase):
     def test_export_lusid_response_to_data_frame(self):
         from finbourne_sdk_utils.pandas_utils import lusid_response_to_data_frame
         self.assertTrue(callable(lusid_response_to_data_frame))
+
+    def test_export_models_to_data_frame(self):
+        from finbourne_sdk_utils.pandas_utils import models_to_data_frame
+        self.assertTrue(callable(models_to_data_frame))
+
+
+class TestLazyImports(unittest.TestCase):
+    """Test that the subpackages and their dependencies are only imported when used."""
+
+    def imported_modules(self, statement):
+        import subprocess
+        import sys
+
+        completed = subprocess.run(
+            [sys.executable, "-c", f"import sys; {statement}; print(' '.join(sys.modules))"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return set(completed.stdout.split())
+
+    def test_import_package_imports_no_dependencies(self):
+        modules = self.imported_modules("import finbourne_sdk_utils")
+        for module in ["finbourne.sdk", "pandas", "IPython", "coloredlogs", "finbourne_sdk_utils.cocoon"]:
+            self.assertNotIn(module, modules)
+
+    def test_import_logger_does_not_import_ipython_or_the_sdk(self):
+        modules = self.imported_modules("from finbourne_sdk_utils.logger import LusidLogger")
+        for module in ["finbourne.sdk", "pandas", "IPython"]:
+            self.assertNotIn(module, modules)
+
+    def test_star_import_of_lazy_package(self):
+        namespace = {}
+        exec("from finbourne_sdk_utils.lpt import *", namespace)
+        self.assertTrue(callable(namespace["to_df"]))
+        self.assertTrue(isinstance(namespace["ReadCache"], type))
+
+    def test_unknown_attribute(self):
+        import finbourne_sdk_utils.cocoon
+        with self.assertRaises(AttributeError):
+            finbourne_sdk_utils.cocoon.not_an_attribute
+
+    def test_default_seed_mappings_are_loaded_when_used(self):
+        from finbourne_sdk_utils.cocoon import seed_sample_data
+        self.assertIn("transactions", seed_sample_data.default_mappings)